@@ -0,0 +1,89 @@
+"""
+Sync versus async read views under concurrent clients, served by Django's ASGI handler.
+
+    python -m benchmarks.async_read_load [--clients 50] [--requests 2000] [--db-delay-ms 2]
+
+``--db-delay-ms`` adds a sleep to every SQL statement to stand in for the network
+round trip to a database server; an in-memory SQLite database answers too fast
+for waiting on the database to matter otherwise.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.utils import report, setup_django, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--db-delay-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    setup_django()
+    from datetime import date
+    from types import ModuleType
+
+    from django.core.cache import cache
+    from django.db import connection
+    from django.db.backends.signals import connection_created
+    from django.test import AsyncClient, override_settings
+    from django.urls import path
+
+    from menu import async_views, views
+    from menu.models import Menu, Restaurant
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(args.db_delay_ms / 1000)
+        return execute(sql, params, many, context)
+
+    def add_delay(connection, **kwargs):
+        connection.execute_wrappers.append(delay)
+
+    restaurants = Restaurant.objects.bulk_create(Restaurant(name=f'Restaurant {i}') for i in range(20))
+    Menu.objects.bulk_create(
+        Menu(name=f'Menu {i}', restaurant=restaurants[i % 20], menu_date=date.today(),
+             menu_data={f'dish {j}': j for j in range(10)})
+        for i in range(20)
+    )
+    add_delay(connection)
+    connection_created.connect(add_delay)
+
+    urls = ['/menu/get_result_for_date', '/menu/get_all_menus']
+
+    async def drive(urlconf):
+        client = AsyncClient()
+        timings = []
+        remaining = iter(range(args.requests))
+
+        async def worker():
+            for i in remaining:
+                start = time.perf_counter()
+                response = await client.get(urls[i % len(urls)])
+                assert response.status_code == 200
+                timings.append(time.perf_counter() - start)
+
+        with override_settings(ROOT_URLCONF=urlconf):
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.clients)))
+            elapsed = time.perf_counter() - start
+        result = summarize(timings)
+        result['per_second'] = len(timings) / elapsed
+        return result
+
+    results = {}
+    for name, module in (('sync views', views), ('async views', async_views)):
+        cache.clear()
+        urlconf = ModuleType(f'{name} urls')
+        urlconf.urlpatterns = [
+            path('menu/get_all_menus', module.get_all_menus),
+            path('menu/get_result_for_date', module.get_result_for_date),
+        ]
+        results[name] = asyncio.run(drive(urlconf))
+    report(f'{args.clients} concurrent clients, {args.requests} requests, '
+           f'{args.db_delay_ms} ms per statement', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Database queries saved by coalescing bursts of identical reads.
+
+    python -m benchmarks.coalescing [--clients 100] [--bursts 20] [--ttl 0.05] [--db-delay-ms 2]
+
+Every burst, ``--clients`` clients request ``get_result_for_date`` and
+``get_menus_for_date`` for today at the same moment, as at noon; between bursts a
+vote is counted and the menus cache of the day is dropped, so every burst starts
+cold. Threads drive the sync views through the test client, as in a threaded
+WSGI worker, and one event loop calls the async views, as in an ASGI worker.
+The async views are called directly, without the middleware, so both columns
+count the statements of the views alone. Each runs with
+coalescing off, on, and on with a micro-cache of ``--ttl`` seconds, and prints
+the SQL statements run.
+"""
+import argparse
+import asyncio
+import itertools
+import threading
+import time
+
+from benchmarks.utils import setup_django
+
+URLS = ['/menu/get_result_for_date', '/menu/get_menus_for_date']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--bursts', type=int, default=20)
+    parser.add_argument('--ttl', type=float, default=0.05)
+    parser.add_argument('--db-delay-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    setup_django(concurrent_writes=True)
+    from datetime import date
+    from types import ModuleType
+
+    from django.db import connection
+    from django.db.backends.signals import connection_created
+    from django.test import Client, RequestFactory, override_settings
+    from django.urls import path
+
+    from menu import async_views, views
+    from menu.caching import invalidate_menus_for_date
+    from menu.coalescing import flight
+    from menu.models import Menu, Restaurant, VoteTally
+
+    statements = itertools.count()
+
+    def count(execute, sql, params, many, context):
+        next(statements)
+        time.sleep(args.db_delay_ms / 1000)
+        return execute(sql, params, many, context)
+
+    def add_counter(connection, **kwargs):
+        # First in the list: middleware pops its own wrapper off the end.
+        if count not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, count)
+
+    restaurants = Restaurant.objects.bulk_create(Restaurant(name=f'Restaurant {i}') for i in range(20))
+    menus = Menu.objects.bulk_create(
+        Menu(name=f'Menu {i}', restaurant=restaurants[i % 20], menu_date=date.today(),
+             menu_data={f'dish {j}': j for j in range(10)})
+        for i in range(20)
+    )
+
+    def between_bursts(burst):
+        VoteTally.increment(menus[burst % len(menus)].pk, date.today())
+        invalidate_menus_for_date(date.today())
+        flight.reset()
+
+    def threaded(urlconf):
+        barrier = threading.Barrier(args.clients + 1)
+
+        def client_thread(number):
+            client = Client()
+            for _ in range(args.bursts):
+                barrier.wait()
+                assert client.get(URLS[number % len(URLS)]).status_code == 200
+                barrier.wait()
+            connection.close()
+
+        threads = [threading.Thread(target=client_thread, args=(number,)) for number in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        elapsed = 0.0
+        for burst in range(args.bursts):
+            between_bursts(burst)
+            before, start = next(statements), time.perf_counter()
+            barrier.wait()
+            barrier.wait()
+            elapsed += time.perf_counter() - start
+            yield next(statements) - before - 1, elapsed
+        for thread in threads:
+            thread.join()
+
+    def asynchronous(urlconf):
+        factory = RequestFactory()
+        routes = [async_views.get_result_for_date, async_views.get_menus_for_date]
+
+        async def burst():
+            responses = await asyncio.gather(*(routes[number % len(routes)](factory.get(URLS[number % len(URLS)]))
+                                               for number in range(args.clients)))
+            assert {response.status_code for response in responses} == {200}
+
+        elapsed = 0.0
+        for number in range(args.bursts):
+            between_bursts(number)
+            before, start = next(statements), time.perf_counter()
+            asyncio.run(burst())
+            elapsed += time.perf_counter() - start
+            yield next(statements) - before - 1, elapsed
+
+    add_counter(connection)
+    connection_created.connect(add_counter)
+
+    requests = args.clients * args.bursts
+    print(f'{args.clients} concurrent clients x {args.bursts} bursts, {args.db_delay_ms} ms per statement')
+    print(f"{'workers':<10}{'coalescing':<16}{'statements':>12}{'per request':>13}{'saved':>8}{'requests/sec':>14}")
+    for name, module, drive in (('threads', views, threaded), ('asyncio', async_views, asynchronous)):
+        urlconf = ModuleType(f'{name} urls')
+        urlconf.urlpatterns = [
+            path('menu/get_result_for_date', module.get_result_for_date),
+            path('menu/get_menus_for_date', module.get_menus_for_date),
+        ]
+        baseline = None
+        for label, enabled, ttl in (('off', False, 0), ('on', True, 0), (f'on, ttl {args.ttl}s', True, args.ttl)):
+            with override_settings(ROOT_URLCONF=urlconf, READ_COALESCING=enabled, READ_COALESCING_TTL=ttl):
+                total = elapsed = 0
+                for run, elapsed in drive(urlconf):
+                    total += run
+            baseline = total if baseline is None else baseline
+            saved = 1 - total / baseline if baseline else 0.0
+            print(f'{name:<10}{label:<16}{total:>12}{total / requests:>13.3f}{saved:>8.0%}'
+                  f'{requests / elapsed:>14.0f}')
+
+
+if __name__ == '__main__':
+    main()
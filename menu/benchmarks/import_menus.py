@@ -0,0 +1,59 @@
+"""
+Import rate and memory of ``manage.py import_menus`` for a large menu file.
+
+    python -m benchmarks.import_menus [--menus 1000000] [--restaurants 1000] [--chunk-size 2000]
+
+Writes a JSON lines file of menus for future dates, imports it into a file
+database and prints rows/sec and the peak memory of the process, which should
+not depend on ``--menus``.
+"""
+import argparse
+import json
+import os
+import resource
+import tempfile
+from datetime import date, timedelta
+
+from benchmarks.utils import setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--menus', type=int, default=1_000_000)
+    parser.add_argument('--restaurants', type=int, default=1000)
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django(concurrent_writes=True)
+    from menu.importer import Importer, read_rows
+
+    directory = tempfile.mkdtemp(prefix='menu-import-')
+    restaurants_path = os.path.join(directory, 'restaurants.jsonl')
+    menus_path = os.path.join(directory, 'menus.jsonl')
+    with open(restaurants_path, 'w') as file:
+        for i in range(args.restaurants):
+            file.write(json.dumps({'name': f'Restaurant {i}'}) + '\n')
+    first_day = date.today() + timedelta(days=1)
+    with open(menus_path, 'w') as file:
+        for i in range(args.menus):
+            file.write(json.dumps({
+                'name': f'Menu {i}',
+                'restaurant': f'Restaurant {i % args.restaurants}',
+                'menu_date': (first_day + timedelta(days=i // args.restaurants % 365)).isoformat(),
+                'menu_data': {f'dish {j}': 5 + j for j in range(5)},
+            }) + '\n')
+    print(f'{args.menus} menus, {os.path.getsize(menus_path) / 2 ** 20:.0f} MiB of JSON lines')
+
+    importer = Importer(args.chunk_size)
+    with open(os.devnull, 'w') as rejects:
+        for name, run, path in (('restaurants', importer.import_restaurants, restaurants_path),
+                                ('menus', importer.import_menus, menus_path)):
+            stats = run(read_rows(path), rejects)
+            print(f'{name}: {stats.imported} imported, {stats.rejected} rejected in {stats.seconds:.1f}s '
+                  f'({stats.rows_per_second:.0f} rows/sec)')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'peak memory: {peak:.0f} MiB')
+
+
+if __name__ == '__main__':
+    main()
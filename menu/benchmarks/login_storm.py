@@ -0,0 +1,100 @@
+"""
+Logins per second through ``api/token/`` when everyone logs in at once.
+
+    python -m benchmarks.login_storm [--iterations 600000 100000] [--clients 16] [--logins 200] [--users 100]
+
+Concurrent clients post valid credentials to the token view for each PBKDF2
+cost in ``--iterations``. Prints logins/sec, CPU time per login, logins per
+second per core (logins divided by the CPU seconds of all threads; password
+hashing is nearly all of it) and SQL statements per login, which should be 1.
+"""
+import argparse
+import itertools
+import os
+import threading
+import time
+
+from benchmarks.utils import setup_django, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, nargs='+', default=[600_000, 100_000])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--users', type=int, default=100)
+    args = parser.parse_args()
+
+    setup_django(concurrent_writes=True)
+    from django.conf import settings
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from django.db import connection, connections
+    from django.db.backends.signals import connection_created
+    from django.test import Client, override_settings
+
+    from menu.models import EmployeeProfile
+
+    statements = itertools.count()
+
+    def count(execute, sql, params, many, context):
+        next(statements)
+        return execute(sql, params, many, context)
+
+    def add_counter(connection, **kwargs):
+        # First in the list: middleware pops its own wrapper off the end.
+        if count not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, count)
+
+    add_counter(connection)
+    connection_created.connect(add_counter)
+
+    def storm(prefix):
+        remaining = iter(range(args.logins))
+        lock = threading.Lock()
+        timings, failures = [], []
+
+        def client_thread():
+            client = Client()
+            while True:
+                with lock:
+                    i = next(remaining, None)
+                if i is None:
+                    break
+                start = time.perf_counter()
+                response = client.post('/api/token/', {'username': f'{prefix} {i % args.users}',
+                                                       'password': 'password123'},
+                                       content_type='application/json')
+                timings.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    failures.append(response.status_code)
+            connections.close_all()
+
+        threads = [threading.Thread(target=client_thread) for _ in range(args.clients)]
+        before, cpu, start = next(statements), time.process_time(), time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu
+        assert not failures, failures
+        return summarize(timings), elapsed, cpu, next(statements) - before - 1
+
+    print(f'{args.clients} clients, {args.logins} logins, {settings.LOGIN_HASH_WORKERS} hashing threads, '
+          f'{os.cpu_count()} cores')
+    print(f"{'iterations':>11}{'logins/sec':>12}{'p50 ms':>9}{'p95 ms':>9}{'cpu ms/login':>14}"
+          f"{'logins/sec/core':>17}{'queries':>9}")
+    for iterations in args.iterations:
+        with override_settings(PASSWORD_HASH_ITERATIONS=iterations):
+            prefix = f'user {iterations}'
+            password = make_password('password123')
+            users = User.objects.bulk_create(User(username=f'{prefix} {i}', password=password)
+                                             for i in range(args.users))
+            EmployeeProfile.objects.bulk_create(EmployeeProfile(user=user) for user in users)
+            row, elapsed, cpu, queries = storm(prefix)
+        print(f"{iterations:>11}{args.logins / elapsed:>12.1f}{row['p50_ms']:>9.0f}{row['p95_ms']:>9.0f}"
+              f"{cpu / args.logins * 1000:>14.1f}{args.logins / cpu:>17.1f}{queries / args.logins:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
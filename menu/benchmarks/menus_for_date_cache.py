@@ -0,0 +1,36 @@
+"""
+Latency of get_menus_for_date served from the cache versus rebuilt from the DB.
+
+    python -m benchmarks.menus_for_date_cache
+"""
+from benchmarks.utils import measure, report, setup_django
+
+
+def main():
+    setup_django()
+    from datetime import date
+
+    from django.core.cache import cache
+    from rest_framework.test import APIClient
+
+    from menu.models import Menu, Restaurant
+
+    restaurants = Restaurant.objects.bulk_create(Restaurant(name=f'Restaurant {i}') for i in range(50))
+    Menu.objects.bulk_create(
+        Menu(name=f'Menu {i}', restaurant=restaurants[i % 50], menu_date=date.today(),
+             menu_data={f'dish {j}': j for j in range(15)})
+        for i in range(50)
+    )
+    client = APIClient()
+    url = '/menu/get_menus_for_date'
+    etag = client.get(url)['ETag']
+
+    report('get_menus_for_date, 50 menus', {
+        'uncached (DB + serializer)': measure(lambda: client.get(url), before=cache.clear),
+        'cache hit': measure(lambda: client.get(url)),
+        'cache hit, 304': measure(lambda: client.get(url, HTTP_IF_NONE_MATCH=etag)),
+    })
+
+
+if __name__ == '__main__':
+    main()
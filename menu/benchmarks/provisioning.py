@@ -0,0 +1,37 @@
+"""
+Users provisioned per second by ``provision_users`` with one and with several hashing threads.
+
+    python -m benchmarks.provisioning [--users 200] [--workers 1 4 8]
+
+Uses the project's password hasher, so the hash step dominates; it should
+shrink with the number of workers up to the number of cores, while the one
+lookup and the bulk INSERTs stay a small part of the total.
+"""
+import argparse
+import os
+
+from benchmarks.utils import setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    setup_django()
+    from menu.provisioning import provision_users
+
+    print(f'{args.users} users, {os.cpu_count()} cores')
+    print(f"{'workers':>8}{'hash s':>9}{'write s':>9}{'total s':>9}{'users/sec':>11}")
+    for workers in args.workers:
+        rows = enumerate({'username': f'user_{workers}_{i}', 'password': f'password {i}'} for i in range(args.users))
+        report = provision_users(rows, workers=workers)
+        seconds = report.seconds
+        assert report.count('created') == args.users
+        print(f"{workers:>8}{seconds['hash']:>9.2f}{seconds['write']:>9.3f}{seconds['total']:>9.2f}"
+              f"{args.users / seconds['total']:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
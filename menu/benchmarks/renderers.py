@@ -0,0 +1,67 @@
+"""
+CPU time per get_all_menus response: serializer versus ``values_rows``, DRF JSON
+versus orjson versus MessagePack.
+
+    python -m benchmarks.renderers [--menus 500] [--iterations 50]
+
+Times the query, serialization and rendering of the full list with
+``time.process_time``, so waiting on the database is not counted.
+"""
+import argparse
+import time
+
+from benchmarks.utils import setup_django, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--menus', type=int, default=500)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    from datetime import date
+
+    from rest_framework.renderers import JSONRenderer
+
+    from menu.models import Menu, Restaurant
+    from menu.renderers import FastJSONRenderer, MessagePackRenderer, msgpack
+    from menu.serializers import MenuSerializer, values_rows
+
+    restaurants = Restaurant.objects.bulk_create(Restaurant(name=f'Restaurant {i}') for i in range(50))
+    Menu.objects.bulk_create(
+        Menu(name=f'Menu {i}', restaurant=restaurants[i % 50], menu_date=date(2023, 9, 23),
+             menu_data={f'dish {j}': {'price': j, 'allergens': ['gluten', 'milk'], 'vegan': j % 2 == 0}
+                        for j in range(15)})
+        for i in range(args.menus)
+    )
+
+    def serializer():
+        return MenuSerializer(Menu.objects.all(), many=True).data
+
+    def values():
+        return values_rows(Menu.objects.all(), MenuSerializer)
+
+    cases = {
+        'serializer + DRF JSON': (serializer, JSONRenderer()),
+        'serializer + orjson': (serializer, FastJSONRenderer()),
+        'values_rows + DRF JSON': (values, JSONRenderer()),
+        'values_rows + orjson': (values, FastJSONRenderer()),
+    }
+    if msgpack is not None:
+        cases['values_rows + MessagePack'] = (values, MessagePackRenderer())
+
+    print(f'get_all_menus, {args.menus} menus, CPU time per response')
+    print(f"{'path':<28}{'mean ms':>10}{'p95 ms':>10}{'bytes':>10}")
+    for name, (build, renderer) in cases.items():
+        timings = []
+        for _ in range(args.iterations):
+            start = time.process_time()
+            body = renderer.render(build(), renderer.media_type)
+            timings.append(time.process_time() - start)
+        row = summarize(timings)
+        print(f"{name:<28}{row['mean_ms']:>10.2f}{row['p95_ms']:>10.2f}{len(body):>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""
+A year of daily winners from get_results_for_range versus one get_result_for_date call per day.
+
+    python -m benchmarks.results_range [--scale small|full]
+"""
+import argparse
+
+from benchmarks.seed import SCALES, seed
+from benchmarks.utils import measure, report, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', choices=SCALES, default='full')
+    args = parser.parse_args()
+
+    setup_django()
+    from datetime import timedelta
+
+    from rest_framework.test import APIClient
+
+    data = seed(**SCALES[args.scale])
+    days = min(365, SCALES[args.scale]['days'])
+    last_day = data['today'] - timedelta(days=1)
+    first_day = last_day - timedelta(days=days - 1)
+    client = APIClient()
+
+    def per_day():
+        for offset in range(days):
+            client.get('/menu/get_result_for_date', {'day': (first_day + timedelta(days=offset)).isoformat()})
+
+    report(f'{days} days of results, {args.scale} dataset', {
+        'get_results_for_range': measure(lambda: client.get('/menu/get_results_for_range', {
+            'from': first_day.isoformat(), 'to': last_day.isoformat()}), iterations=50),
+        'get_result_for_date x days': measure(per_day, iterations=5),
+    })
+
+
+if __name__ == '__main__':
+    main()
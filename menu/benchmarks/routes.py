@@ -0,0 +1,220 @@
+"""
+Load test of every route in menu/urls.py.
+
+Seeds a test database, then drives each route with concurrent clients and
+reports latency percentiles, requests per second and SQL queries per request.
+Results are also written as JSON to benchmarks/results/ so runs can be compared
+across commits.
+
+    python -m benchmarks.routes [--scale small|full] [--clients 16] [--requests 500] [--routes vote ...]
+
+Runs against the database of DJANGO_SETTINGS_MODULE's test settings, e.g. a
+local Postgres or SQLite.
+"""
+import argparse
+import json
+import logging
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.seed import SCALES, seed
+from benchmarks.utils import setup_django, summarize
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+# Routes that are not part of the API.
+SKIPPED_ROUTES = {'admin/'}
+
+
+def build_cases(data):
+    """
+    Map every route to a function returning the request for the i-th call.
+
+    Each function returns ``(method, path, payload, headers)``.
+    """
+    from menu.tokens import EmployeeRefreshToken
+
+    today = data['today'].isoformat()
+    menus = data['today_menus']
+    employees = data['employees']
+    tokens = {}
+
+    def auth(i):
+        user = employees[i % len(employees)]
+        if user.pk not in tokens:
+            tokens[user.pk] = f'Bearer {EmployeeRefreshToken.for_user(user).access_token}'
+        return {'HTTP_AUTHORIZATION': tokens[user.pk]}
+
+    def staff_auth():
+        if 'staff' not in tokens:
+            token = EmployeeRefreshToken.for_user(employees[0])
+            token['is_staff'] = True
+            tokens['staff'] = f'Bearer {token.access_token}'
+        return {'HTTP_AUTHORIZATION': tokens['staff']}
+
+    def new_menu(i):
+        return {'name': f'Bench menu {i}', 'restaurant': 1, 'menu_data': {'dish': 10}, 'menu_date': today}
+
+    return {
+        'register/': lambda i: ('post', '/register/', {
+            'username': f'bench user {i}', 'password': 'password123', 'user_type': 'employee'}, {}),
+        'register/bulk': lambda i: ('post', '/register/bulk', {'users': [
+            {'username': f'bench bulk user {i}-{j}'.replace(' ', '_'), 'password': 'password123'} for j in range(2)]},
+            staff_auth()),
+        'api/token/': lambda i: ('post', '/api/token/', {
+            'username': employees[i % len(employees)].username, 'password': 'password123'}, {}),
+        'restaurants/get_all_restaurants': lambda i: ('get', '/restaurants/get_all_restaurants', {}, {}),
+        'restaurants/add_restaurants': lambda i: (
+            'post', '/restaurants/add_restaurants', {'name': f'Bench restaurant {i}'}, auth(i)),
+        'menu/get_all_menus': lambda i: ('get', '/menu/get_all_menus', {'page_size': 100}, {}),
+        'menu/get_menus_for_date': lambda i: ('get', '/menu/get_menus_for_date', {'day': today}, {}),
+        'menu/get_result_for_date': lambda i: ('get', '/menu/get_result_for_date', {'day': today}, {}),
+        'menu/get_results_for_range': lambda i: ('get', '/menu/get_results_for_range', {
+            'from': data['today'] - timedelta(days=365), 'to': today}, {}),
+        'menu/result_stream': lambda i: ('get', '/menu/result_stream', {'day': today}, {}),
+        'menu/add_restaurants': lambda i: (
+            'post', '/menu/add_restaurants', {'name': f'Bench restaurant {i}'}, auth(i)),
+        'menu/search_dishes': lambda i: ('get', '/menu/search_dishes', {
+            'dish': f'dish {i % 10}', 'max_price': 30, 'date_from': data['today'] - timedelta(days=7),
+            'date_to': today}, {}),
+        'menu/add_menu': lambda i: ('post', '/menu/add_menu', new_menu(i), auth(i)),
+        'vote': lambda i: ('post', '/vote', {
+            'menu': menus[(i // len(employees)) % len(menus)], 'vote_date': today}, auth(i)),
+        'analytics/restaurants': lambda i: ('get', '/analytics/restaurants', {
+            'period': 'month', 'from': data['today'] - timedelta(days=365), 'to': today}, auth(i)),
+        'changes': lambda i: ('get', '/changes', {'since': i * 500, 'limit': 500}, {}),
+        'metrics': lambda i: ('get', '/metrics', {}, staff_auth()),
+    }
+
+
+def api_routes():
+    """
+    Return the route strings of menu/urls.py, except SKIPPED_ROUTES.
+    """
+    from django.urls import get_resolver
+    routes = [str(pattern.pattern) for pattern in get_resolver().url_patterns]
+    return [route for route in routes if route not in SKIPPED_ROUTES]
+
+
+def call(client, request):
+    method, path, payload, headers = request
+    if method == 'get':
+        response = client.get(path, payload, **headers)
+    else:
+        response = client.post(path, json.dumps(payload), content_type='application/json', **headers)
+    if response.streaming:
+        # Streams stay open; read the first event and hang up.
+        next(iter(response.streaming_content))
+        response.close()
+    return response.status_code
+
+
+def run_route(make_request, requests, clients):
+    """
+    Send ``requests`` requests from ``clients`` threads and summarize them.
+    """
+    from django.db import connection, connections
+    from django.test import Client
+
+    lock = threading.Lock()
+    next_index = iter(range(requests))
+    timings, queries, failures = [], [], []
+
+    def worker():
+        client = Client()
+        counter = [0]
+
+        def count(execute, *args):
+            counter[0] += 1
+            return execute(*args)
+
+        with connection.execute_wrapper(count):
+            while True:
+                with lock:
+                    i = next(next_index, None)
+                if i is None:
+                    break
+                request = make_request(i)
+                counter[0] = 0
+                start = time.perf_counter()
+                status = call(client, request)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    timings.append(elapsed)
+                    queries.append(counter[0])
+                    if status >= 400:
+                        failures.append(status)
+        connections.close_all()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        for future in [pool.submit(worker) for _ in range(clients)]:
+            future.result()
+    elapsed = time.perf_counter() - start
+    result = summarize(timings)
+    result['per_second'] = len(timings) / elapsed
+    result['queries_per_request'] = sum(queries) / len(queries)
+    result['failures'] = len(failures)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', choices=SCALES, default='full')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--routes', nargs='*', help='Only run these routes.')
+    args = parser.parse_args()
+
+    setup_django(concurrent_writes=True)
+    from django.db import connection
+    # Failed requests are counted per route; their tracebacks would drown the report.
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+
+    started = time.perf_counter()
+    data = seed(**SCALES[args.scale])
+    print(f'Seeded {args.scale} dataset in {time.perf_counter() - started:.1f}s')
+
+    cases = build_cases(data)
+    routes = api_routes()
+    missing = [route for route in routes if route not in cases]
+    if missing:
+        raise SystemExit(f'No benchmark case for routes: {", ".join(missing)}')
+
+    results = {}
+    print(f"{'route':<36}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}{'failed':>8}")
+    for route in routes:
+        if args.routes and route not in args.routes:
+            continue
+        row = results[route] = run_route(cases[route], args.requests, args.clients)
+        print(f"{route:<36}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}{row['p99_ms']:>9.2f}"
+              f"{row['per_second']:>9.0f}{row['queries_per_request']:>9.1f}{row['failures']:>8}")
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    commit = git_commit()
+    output = RESULTS_DIR / f"routes-{commit}-{datetime.now():%Y%m%d%H%M%S}.json"
+    output.write_text(json.dumps({
+        'commit': commit,
+        'database': connection.vendor,
+        'scale': args.scale,
+        'dataset': SCALES[args.scale],
+        'clients': args.clients,
+        'requests': args.requests,
+        'results': results,
+    }, indent=2))
+    print(f'Wrote {output}')
+
+
+if __name__ == '__main__':
+    main()
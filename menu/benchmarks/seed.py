@@ -0,0 +1,64 @@
+"""
+Realistic data for the benchmarks.
+
+Menus cover ``days`` days up to and including today; every employee has voted on
+every past day, so the full scale holds about 1.5 million votes.
+"""
+import random
+from datetime import date, timedelta
+
+SCALES = {
+    'small': {'restaurants': 100, 'days': 60, 'menus_per_day': 10, 'employees': 200},
+    'full': {'restaurants': 2000, 'days': 730, 'menus_per_day': 10, 'employees': 2000},
+}
+
+BATCH_SIZE = 5000
+
+
+def seed(restaurants, days, menus_per_day, employees, rng=None):
+    """
+    Fill the database and return what the benchmark cases need.
+
+    Returns:
+        dict: ``today`` (date), ``today_menus`` (list of ids) and ``employees`` (list of Users).
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+
+    from menu.models import EmployeeProfile, Menu, Restaurant, Vote, VoteTally
+    from menu.rollups import rollup_pending_days
+
+    rng = rng or random.Random(1)
+    today = date.today()
+    restaurant_rows = Restaurant.objects.bulk_create(
+        (Restaurant(name=f'Restaurant {i}') for i in range(restaurants)), batch_size=BATCH_SIZE
+    )
+    # One hash for everyone; hashing each password would dominate the seeding time.
+    password = make_password('password123')
+    users = User.objects.bulk_create(
+        (User(username=f'employee {i}', password=password) for i in range(employees)),
+        batch_size=BATCH_SIZE,
+    )
+    EmployeeProfile.objects.bulk_create((EmployeeProfile(user=user) for user in users), batch_size=BATCH_SIZE)
+
+    today_menus = []
+    for offset in range(days - 1, -1, -1):
+        day = today - timedelta(days=offset)
+        menus = Menu.objects.bulk_create(
+            Menu(name=f'Menu {day} {i}', restaurant=rng.choice(restaurant_rows), menu_date=day,
+                 menu_data={f'dish {j}': rng.randint(5, 40) for j in range(rng.randint(5, 15))})
+            for i in range(menus_per_day)
+        )
+        if offset == 0:
+            today_menus = [menu.pk for menu in menus]
+            continue
+        # Skewed choice so every day has a clear winner, like real lunches.
+        weights = [rng.random() ** 2 for _ in menus]
+        Vote.objects.bulk_create(
+            (Vote(user=user, menu=menu, vote_date=day)
+             for user, menu in zip(users, rng.choices(menus, weights, k=len(users)))),
+            batch_size=BATCH_SIZE,
+        )
+    VoteTally.rebuild()
+    rollup_pending_days(today)
+    return {'today': today, 'today_menus': today_menus, 'employees': users}
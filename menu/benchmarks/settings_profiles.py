@@ -0,0 +1,108 @@
+"""
+Cold start and per-request overhead of the default and the API-only settings.
+
+    python -m benchmarks.settings_profiles [--settings menu.settings menu.settings_api]
+                                           [--starts 10] [--requests 2000]
+
+Startup is measured in fresh interpreters: the whole process until the WSGI
+handler and URLconf are loaded, and the ``django.setup()`` part of it. Requests
+go straight to the WSGI handler, through the full middleware stack, for a route
+that does almost no work of its own (``restaurants/get_all_restaurants`` on an empty
+table), so the difference between profiles is middleware and authentication.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.utils import setup_django, summarize
+
+STARTUP = '''
+import time
+start = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter() - start
+from django.core.handlers.wsgi import WSGIHandler
+from django.urls import get_resolver
+WSGIHandler()
+get_resolver().url_patterns
+print(setup, time.perf_counter() - start)
+'''
+
+
+def startup(settings_module, starts):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module}
+    walls, setups, loads = [], [], []
+    for _ in range(starts):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', STARTUP], env=env, check=True,
+                                capture_output=True, text=True).stdout
+        walls.append(time.perf_counter() - start)
+        setup, load = map(float, output.split())
+        setups.append(setup)
+        loads.append(load)
+    return {name: statistics.median(values) * 1000
+            for name, values in (('process_ms', walls), ('setup_ms', setups), ('loaded_ms', loads))}
+
+
+def requests(settings_module, count):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module}
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.settings_profiles', '--child', str(count)],
+                            env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def child(count):
+    setup_django()
+    import io
+
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+    statuses = []
+
+    def start_response(status, headers):
+        statuses.append(status)
+
+    def environ():
+        return {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': '/restaurants/get_all_restaurants', 'QUERY_STRING': '',
+            'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(b''), 'HTTP_ACCEPT': 'application/json',
+        }
+
+    timings = []
+    for _ in range(count):
+        request = environ()
+        start = time.perf_counter()
+        b''.join(handler(request, start_response))
+        timings.append(time.perf_counter() - start)
+    assert set(statuses) == {'200 OK'}, set(statuses)
+    print(json.dumps(summarize(timings[count // 10:])))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--settings', nargs='+', default=['menu.settings', 'menu.settings_api'])
+    parser.add_argument('--starts', type=int, default=10)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--child', type=int)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child)
+
+    print(f"{'settings':<24}{'process ms':>12}{'setup ms':>10}{'loaded ms':>11}{'request p50 ms':>16}"
+          f"{'requests/sec':>14}")
+    for settings_module in args.settings:
+        start = startup(settings_module, args.starts)
+        row = requests(settings_module, args.requests)
+        print(f"{settings_module:<24}{start['process_ms']:>12.1f}{start['setup_ms']:>10.1f}"
+              f"{start['loaded_ms']:>11.1f}{row['p50_ms']:>16.3f}{row['per_second']:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
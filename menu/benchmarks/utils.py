@@ -0,0 +1,100 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Benchmarks run from the ``menu`` directory against a throwaway test database:
+
+    python -m benchmarks.<name>
+
+Point DJANGO_SETTINGS_MODULE at another settings module to benchmark against
+a different database (the default settings expect the docker-compose Postgres).
+"""
+import os
+import statistics
+import time
+
+
+def setup_django(concurrent_writes=False):
+    """
+    Configure Django and create a fresh test database for the benchmark.
+
+    Args:
+        concurrent_writes (bool): Put a SQLite test database in a WAL-mode file
+            instead of shared memory, which fails concurrent writers at once
+            with "database table is locked".
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'menu.settings')
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    if concurrent_writes and connection.vendor == 'sqlite':
+        _use_sqlite_file(connection)
+    connection.creation.create_test_db(verbosity=0)
+
+
+def _use_sqlite_file(connection):
+    import tempfile
+    from django.db.backends.signals import connection_created
+
+    def enable_wal(connection, **kwargs):
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode=WAL')
+
+    directory = tempfile.mkdtemp(prefix='menu-benchmark-')
+    connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+    connection.settings_dict['OPTIONS']['timeout'] = 60
+    connection_created.connect(enable_wal, weak=False)
+
+
+def measure(func, iterations=1000, before=None):
+    """
+    Time repeated calls of a function.
+
+    Args:
+        func (callable): Code under test.
+        iterations (int): Number of timed calls.
+        before (callable): Untimed setup run before every call.
+
+    Returns:
+        dict: Latency percentiles in milliseconds and calls per second.
+    """
+    timings = []
+    for _ in range(iterations):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings)
+
+
+def summarize(timings):
+    """
+    Summarize latencies given in seconds.
+    """
+    timings = sorted(timings)
+
+    def percentile(p):
+        return timings[min(len(timings) - 1, int(len(timings) * p))] * 1000
+    return {
+        'calls': len(timings),
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'per_second': len(timings) / sum(timings),
+    }
+
+
+def report(title, results):
+    """
+    Print named results from ``measure`` as a table.
+    """
+    print(title)
+    print(f"{'case':<28}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'per sec':>12}")
+    for name, row in results.items():
+        print(f"{name:<28}{row['mean_ms']:>10.3f}{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}"
+              f"{row['p99_ms']:>10.3f}{row['per_second']:>12.0f}")
@@ -0,0 +1,93 @@
+"""
+Peak votes per second of the synchronous vote path versus the write-behind buffer.
+
+    python -m benchmarks.vote_buffer [--clients 20] [--votes 4000] [--db-delay-ms 1]
+
+Every client thread posts votes of distinct employees as fast as it can. For the
+buffer, the rate counts until the last vote is written, not just acknowledged.
+``--db-delay-ms`` adds a sleep to every SQL statement to stand in for the round
+trip to a database server.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.utils import setup_django, summarize
+
+DAY = '2023-09-23'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--votes', type=int, default=4000)
+    parser.add_argument('--db-delay-ms', type=float, default=1.0)
+    args = parser.parse_args()
+
+    setup_django(concurrent_writes=True)
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.db.backends.signals import connection_created
+    from django.test import override_settings
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from menu import views, vote_buffer
+    from menu.models import EmployeeProfile, Menu, Restaurant, Vote
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(args.db_delay_ms / 1000)
+        return execute(sql, params, many, context)
+
+    def add_delay(connection, **kwargs):
+        connection.execute_wrappers.append(delay)
+
+    restaurant = Restaurant.objects.create(name='Restaurant')
+    menus = [Menu.objects.create(name=f'Menu {i}', restaurant=restaurant, menu_data={}, menu_date=DAY)
+             for i in range(10)]
+    users = User.objects.bulk_create(User(username=f'user {i}') for i in range(args.votes * 2))
+    EmployeeProfile.objects.bulk_create(EmployeeProfile(user=user) for user in users)
+    connection.close()
+    connection_created.connect(add_delay)
+    factory = APIRequestFactory()
+
+    def post(user):
+        request = factory.post('/vote', {'menu': menus[user.pk % len(menus)].pk, 'vote_date': DAY},
+                               format='json')
+        force_authenticate(request, user=user)
+        response = views.vote(request)
+        assert response.status_code in (201, 202), response.data
+        return response.status_code
+
+    def drive(voters):
+        timings = []
+
+        def timed(user):
+            start = time.perf_counter()
+            post(user)
+            timings.append(time.perf_counter() - start)
+
+        with ThreadPoolExecutor(args.clients) as pool:
+            list(pool.map(timed, voters))
+        return timings
+
+    rows = {}
+    start = time.perf_counter()
+    timings = drive(users[:args.votes])
+    rows['synchronous'] = (summarize(timings), time.perf_counter() - start)
+
+    with override_settings(VOTE_BUFFER_ENABLED=True):
+        vote_buffer._buffer = None
+        start = time.perf_counter()
+        timings = drive(users[args.votes:])
+        vote_buffer.shutdown()
+        rows['write-behind buffer'] = (summarize(timings), time.perf_counter() - start)
+
+    assert Vote.objects.count() == args.votes * 2
+    print(f'vote, {args.votes} votes per path, {args.clients} clients, {args.db_delay_ms} ms per query')
+    print(f"{'path':<24}{'p50 ms':>10}{'p99 ms':>10}{'votes/sec':>12}")
+    for name, (row, elapsed) in rows.items():
+        print(f"{name:<24}{row['p50_ms']:>10.3f}{row['p99_ms']:>10.3f}{args.votes / elapsed:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
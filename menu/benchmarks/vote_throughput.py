@@ -0,0 +1,67 @@
+"""
+Votes per second through the vote endpoint versus the previous serializer path.
+
+    python -m benchmarks.vote_throughput
+"""
+from benchmarks.utils import measure, report, setup_django
+
+VOTES = 2000
+
+
+def main():
+    setup_django()
+    from itertools import count
+
+    from django.contrib.auth.models import User
+    from django.db import connection, transaction
+    from rest_framework.decorators import api_view, permission_classes
+    from rest_framework.permissions import IsAuthenticated
+    from rest_framework.response import Response
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from menu import views
+    from menu.models import EmployeeProfile, Menu, Restaurant, VoteTally
+    from menu.permissions import APIVersionPermission, CanVotePermission
+    from menu.serializers import VoteSerializer
+
+    @api_view(['POST'])
+    @permission_classes([IsAuthenticated, CanVotePermission, APIVersionPermission])
+    def serializer_vote(request):
+        # The vote view before the single-INSERT path.
+        serializer = VoteSerializer(data=request.data)
+        if serializer.is_valid():
+            serializer.validated_data['user'] = request.user
+            with transaction.atomic():
+                vote = serializer.save()
+                VoteTally.increment(vote.menu_id, vote.vote_date)
+            return Response(serializer.data, status=201)
+        return Response(serializer.errors, status=400)
+
+    restaurant = Restaurant.objects.create(name='Restaurant')
+    menu = Menu.objects.create(name='Menu', restaurant=restaurant, menu_data={}, menu_date='2023-09-23')
+    users = User.objects.bulk_create(User(username=f'user {i}') for i in range(VOTES * 2))
+    EmployeeProfile.objects.bulk_create(EmployeeProfile(user=user) for user in users)
+    factory = APIRequestFactory()
+    next_user = iter(users).__next__
+    queries = count()
+
+    def post(view):
+        user = next_user()
+        request = factory.post('/vote', {'user': user.pk, 'menu': menu.pk, 'vote_date': '2023-09-23'},
+                               format='json')
+        force_authenticate(request, user=user)
+        with connection.execute_wrapper(lambda execute, *args: (next(queries), execute(*args))[1]):
+            assert view(request).status_code == 201
+
+    results = {}
+    for name, view in (('serializer path', serializer_vote), ('single INSERT path', views.vote)):
+        queries = count()
+        results[name] = measure(lambda: post(view), iterations=VOTES)
+        results[name]['queries_per_vote'] = next(queries) / VOTES
+    report(f'vote, {VOTES} votes per path', results)
+    for name, row in results.items():
+        print(f"{name}: {row['queries_per_vote']:.1f} queries per vote")
+
+
+if __name__ == '__main__':
+    main()
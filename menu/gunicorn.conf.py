@@ -0,0 +1,50 @@
+"""
+Gunicorn configuration for the ASGI deployment.
+
+    ASYNC_READ_VIEWS=1 gunicorn -c gunicorn.conf.py menu.asgi:application
+
+Each worker process runs one uvicorn event loop. Async read views wait on the
+database without holding a thread. Sync views (writes, auth) run in the loop's
+thread pool.
+
+With more than one worker the cache, the result broadcaster and the vote buffer
+store must be shared between processes (CACHE_URL, RESULTS_BROADCASTER,
+VOTE_BUFFER_STORE); the server refuses to start with the in-process ones.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# Recycle workers now and then to bound memory growth.
+max_requests = 10000
+max_requests_jitter = 1000
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server):
+    if server.cfg.workers < 2:
+        return
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'menu.settings')
+    from django.conf import settings
+    local = []
+    if settings.CACHES['default']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+        local.append('CACHE_URL')
+    if settings.RESULTS_BROADCASTER == 'menu.events.LocalResultsBroadcaster':
+        local.append('RESULTS_BROADCASTER')
+    if settings.VOTE_BUFFER_ENABLED and settings.VOTE_BUFFER_STORE == 'menu.vote_buffer.LocalVoteStore':
+        local.append('VOTE_BUFFER_STORE')
+    if local:
+        raise RuntimeError(
+            f'{server.cfg.workers} workers need shared backends; set {", ".join(local)} '
+            'or run a single worker (GUNICORN_WORKERS=1).'
+        )
+
+
+def worker_exit(server, worker):
+    # Write the votes still held by the write-behind buffer (VOTE_BUFFER=1).
+    from menu.vote_buffer import shutdown
+    shutdown()
@@ -1,7 +1,9 @@
 from django.contrib import admin
-from .models import Vote, Restaurant, Menu
+from .models import Vote, Restaurant, Menu, VoteTally, RestaurantRollup
 
 
 admin.site.register(Vote)
 admin.site.register(Restaurant)
 admin.site.register(Menu)
+admin.site.register(VoteTally)
+admin.site.register(RestaurantRollup)
@@ -0,0 +1,159 @@
+"""
+Async versions of the read endpoints, for serving under ASGI.
+
+Enabled by setting ASYNC_READ_VIEWS=1 (see urls.py). They return the same data
+as the DRF views in views.py but query through Django's async ORM, so a slow
+query does not hold a worker thread while it waits. Bodies are rendered with the
+renderer the ``Accept`` header selects from ``DEFAULT_RENDERER_CLASSES``, except
+the browsable API, which only renders DRF views; streamed lists are JSON only.
+"""
+from datetime import date
+from functools import partial, wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseNotAllowed, HttpResponseNotModified, StreamingHttpResponse
+from rest_framework.exceptions import NotAcceptable
+
+from menu import views
+from menu.models import Menu, VoteTally
+from menu.serializers import (
+    DayQuerySerializer, MenuFieldsQuerySerializer, MenuSerializer, MenusForDateQuerySerializer, avalues_rows,
+    sparse_queryset,
+)
+from .caching import acached_menus_for_date, cache_headers, is_not_modified
+from .coalescing import acoalesced_response
+from .events import aresult_events
+from .metrics import timed
+from .pagination import async_streamed_response, is_paginated, is_streamed
+from .renderers import content_type, negotiate
+from .replicas import replica_reads
+
+
+def get_only(view):
+    """
+    Async counterpart of ``require_GET``, whose Django 4.2 wrapper is sync-only.
+
+    Also answers 406 when no renderer matches the ``Accept`` header.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        try:
+            return await view(request, *args, **kwargs)
+        except NotAcceptable as exc:
+            return HttpResponse(str(exc.detail), status=exc.status_code, content_type='text/plain')
+    return wrapper
+
+
+def _render(request, data, **kwargs):
+    renderer, media_type = negotiate(request)
+    with timed('render_time'):
+        body = renderer.render(data, media_type, {})
+    return HttpResponse(body, content_type=content_type(renderer, media_type), **kwargs)
+
+
+@replica_reads
+@get_only
+async def get_all_menus(request):
+    """
+    Get a list of all menus.
+
+    Keyset pages are delegated to the sync view, streamed lists use ``.aiterator()``.
+    Takes the same ``fields``/``expand`` parameters as the sync view.
+
+    Args:
+        request: HTTP request object.
+
+    Returns:
+        HttpResponse: Response with a list of all menus.
+    """
+    if is_paginated(request):
+        return await sync_to_async(views.get_all_menus)(request)
+    query = MenuFieldsQuerySerializer(data=request.GET)
+    if not query.is_valid():
+        return _render(request, query.errors, status=400)
+    fields, expand = query.validated_data['fields'], query.validated_data['expand']
+    menus = Menu.objects.all()
+    if is_streamed(request):
+        menus = sparse_queryset(menus, MenuSerializer, fields, expand)
+        return async_streamed_response(menus, partial(MenuSerializer, fields=fields, expand=expand))
+    return _render(request, await avalues_rows(menus, MenuSerializer, fields, expand))
+
+
+@replica_reads
+@get_only
+async def get_menus_for_date(request):
+    """
+    Get a list of menus for a specific date, from the same cache as the sync view.
+
+    Args:
+        request: HTTP request object.
+
+    Returns:
+        HttpResponse: Response containing a list of menus for the specified date.
+    """
+    query = MenusForDateQuerySerializer(data=request.GET)
+    if not query.is_valid():
+        return _render(request, query.errors, status=400)
+    day, fields, expand = (query.validated_data[name] for name in ('day', 'fields', 'expand'))
+
+    async def build():
+        return await avalues_rows(Menu.objects.filter(menu_date=day), MenuSerializer, fields, expand)
+
+    entry = await acached_menus_for_date(day, build, query.cache_variant())
+    if is_not_modified(request, entry):
+        return HttpResponseNotModified(headers=cache_headers(entry))
+
+    async def payload():
+        return entry['data'], 200
+
+    return await acoalesced_response(request, ('menus_for_date', entry['etag']), payload, cache_headers(entry))
+
+
+@replica_reads
+@get_only
+async def get_result_for_date(request):
+    """
+    Get the most voted menu for a specific date, coalesced like the sync view.
+
+    Args:
+        request: HTTP request object.
+
+    Returns:
+        HttpResponse: Response with the most voted menu for the specified date.
+    """
+    day = request.GET.get('day', date.today())
+
+    async def build():
+        leader = await VoteTally.totals_for_menu_date(day).afirst()
+        if leader:
+            most_voted_menu = await Menu.objects.filter(pk=leader['menu']).afirst()
+        else:
+            most_voted_menu = await Menu.objects.filter(menu_date=day).afirst()
+        if most_voted_menu:
+            return MenuSerializer(most_voted_menu).data, 200
+        return {'message': f'No menus found for the specified day({day}).'}, 404
+
+    return await acoalesced_response(request, ('result_for_date', str(day)), build)
+
+
+@get_only
+async def result_stream(request):
+    """
+    Stream the vote totals of a date as server-sent events, see ``views.result_stream``.
+
+    Args:
+        request: HTTP request object.
+
+    Returns:
+        StreamingHttpResponse: ``text/event-stream`` response, or 400 for a malformed ``day``.
+    """
+    query = DayQuerySerializer(data=request.GET)
+    if not query.is_valid():
+        return _render(request, query.errors, status=400)
+    response = StreamingHttpResponse(aresult_events(query.validated_data['day'].isoformat()),
+                                     content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,166 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .coalescing import acoalesce, coalesce, coalesced_response
+from .replicas import primary_reads
+
+
+def _stamp_key(day):
+    return f'menus_for_date:{day}:stamp'
+
+
+def _date_stamp(day):
+    """
+    Return the time the cached menus for the day were last invalidated.
+
+    The stamp is part of every payload key, so replacing it drops all cached
+    payloads of the day at once.
+    """
+    key = _stamp_key(day)
+    stamp = cache.get(key)
+    if stamp is None:
+        cache.add(key, time.time(), settings.MENU_CACHE_TIMEOUT)
+        stamp = cache.get(key, time.time())
+    return stamp
+
+
+async def _adate_stamp(day):
+    key = _stamp_key(day)
+    stamp = await cache.aget(key)
+    if stamp is None:
+        await cache.aadd(key, time.time(), settings.MENU_CACHE_TIMEOUT)
+        stamp = await cache.aget(key, time.time())
+    return stamp
+
+
+def _modified_key(day):
+    return f'menus_for_date:{day}:modified'
+
+
+def _payload_key(day, stamp, variant):
+    return f'menus_for_date:{day}:{stamp}:{variant}'
+
+
+def _make_entry(data, last_modified):
+    data = list(data)
+    body = JSONEncoder(sort_keys=True).encode(data).encode()
+    return {
+        'data': data,
+        'etag': quote_etag(hashlib.md5(body).hexdigest()),
+        'last_modified': last_modified,
+    }
+
+
+def invalidate_menus_for_date(day):
+    """
+    Drop the cached menus for a day and record when they changed.
+
+    Args:
+        day (date or str): Date of the saved menu.
+    """
+    now = time.time()
+    cache.set(_stamp_key(str(day)), now, settings.MENU_CACHE_TIMEOUT)
+    # Kept without expiry: a stamp made by a read after this one expired says nothing about the data.
+    cache.set(_modified_key(str(day)), now, None)
+
+
+def cached_menus_for_date(day, build, variant=''):
+    """
+    Get the cached payload for a day, building it on a miss.
+
+    Concurrent misses of the same payload share one ``build``, which reads from
+    the primary: right after ``invalidate_menus_for_date`` a lagging replica
+    would cache the list as it was before the write.
+
+    Args:
+        day (date): Requested date.
+        build (callable): Returns the serialized data when the cache misses.
+        variant (str): Distinguishes differently shaped payloads of the same day.
+
+    Returns:
+        dict: ``data``, ``etag`` and ``last_modified`` of the payload: the unix time
+        of the last ``invalidate_menus_for_date`` of the day, None when unknown.
+    """
+    stamp = _date_stamp(day)
+    key = _payload_key(day, stamp, variant)
+    entry = cache.get(key)
+    if entry is None:
+        entry = coalesce(key, lambda: _fill(day, key, build))
+    return entry
+
+
+def _fill(day, key, build):
+    # Read before the data, so it is never later than the change the data shows.
+    last_modified = cache.get(_modified_key(day))
+    with primary_reads():
+        data = build()
+    entry = _make_entry(data, last_modified)
+    cache.set(key, entry, settings.MENU_CACHE_TIMEOUT)
+    return entry
+
+
+async def acached_menus_for_date(day, build, variant=''):
+    """
+    Async variant of ``cached_menus_for_date``; ``build`` is a coroutine function.
+    """
+    stamp = await _adate_stamp(day)
+    key = _payload_key(day, stamp, variant)
+    entry = await cache.aget(key)
+    if entry is None:
+        async def fill():
+            last_modified = await cache.aget(_modified_key(day))
+            with primary_reads():
+                data = await build()
+            entry = _make_entry(data, last_modified)
+            await cache.aset(key, entry, settings.MENU_CACHE_TIMEOUT)
+            return entry
+
+        entry = await acoalesce(key, fill)
+    return entry
+
+
+def cache_headers(entry):
+    """
+    Return the ETag and, when known, Last-Modified headers of a cached payload.
+    """
+    if entry['last_modified'] is None:
+        return {'ETag': entry['etag']}
+    return {'ETag': entry['etag'], 'Last-Modified': http_date(entry['last_modified'])}
+
+
+def is_not_modified(request, entry):
+    """
+    Whether the client's conditional GET headers match the cached payload.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        return entry['etag'] in (tag.strip() for tag in if_none_match.split(','))
+    if entry['last_modified'] is None:
+        return False
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and since >= int(entry['last_modified'])
+
+
+def conditional_response(request, entry):
+    """
+    Build the response for a cached payload, honoring conditional GET headers.
+
+    Args:
+        request: DRF request object.
+        entry (dict): Payload returned by ``cached_menus_for_date``.
+
+    Returns:
+        Response: 304 when the client's copy is current, otherwise the payload,
+        rendered once for concurrent requests of the same ETag.
+    """
+    if is_not_modified(request, entry):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(entry))
+    return coalesced_response(request, ('menus_for_date', entry['etag']), lambda: (entry['data'], status.HTTP_200_OK),
+                              cache_headers(entry))
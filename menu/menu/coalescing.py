@@ -0,0 +1,210 @@
+"""
+Single-flight coalescing of identical reads.
+
+When many clients ask for the same thing at once (``get_result_for_date`` for
+today at noon), only the first request of a key computes it; requests arriving
+while it runs wait and share its result, here the rendered response body. With
+``settings.READ_COALESCING_TTL`` above zero the result is also kept that many
+seconds, so requests arriving just after it finished reuse it too; results can
+then be that much older than the latest vote.
+
+``SingleFlight.do`` coordinates threads (WSGI workers, sync views under ASGI)
+and ``SingleFlight.ado`` coroutines of one event loop. Each process coalesces
+its own requests. ``coalesce``/``acoalesce`` skip it when
+``settings.READ_COALESCING`` is off.
+"""
+import asyncio
+import threading
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+from .metrics import timed
+from .renderers import content_type, negotiate
+
+# Expired micro-cache entries are dropped once it holds more keys than this.
+MAX_RECENT = 256
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time and shares its result.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+        self._recent = {}
+
+    def _fresh(self, key):
+        hit = self._recent.get(key)
+        if hit is not None and hit[0] > time.monotonic():
+            return hit
+        return None
+
+    def _remember(self, key, result, ttl):
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        if len(self._recent) >= MAX_RECENT:
+            self._recent = {k: hit for k, hit in self._recent.items() if hit[0] > now}
+        self._recent[key] = (now + ttl, result)
+
+    def do(self, key, func, ttl=0):
+        """
+        Return ``func()``, or the result of the call of the same key already running.
+
+        Args:
+            key: Hashable identity of the computation.
+            func (callable): Computes the result.
+            ttl (float): Seconds the result is reused after the call finished.
+        """
+        with self._lock:
+            hit = self._fresh(key)
+            if hit is not None:
+                return hit[1]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None:
+                    self._remember(key, call.result, ttl)
+            call.done.set()
+        return call.result
+
+    async def ado(self, key, func, ttl=0):
+        """
+        Async variant of ``do``; ``func`` is a coroutine function.
+
+        A waiter that is cancelled (client gone) does not cancel the shared computation.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            hit = self._fresh(key)
+            if hit is not None:
+                return hit[1]
+            task = self._tasks.get((loop, key))
+            if task is None:
+                task = self._tasks[(loop, key)] = loop.create_task(func())
+                task.add_done_callback(lambda task: self._finish(loop, key, task, ttl))
+        return await asyncio.shield(task)
+
+    def _finish(self, loop, key, task, ttl):
+        with self._lock:
+            del self._tasks[(loop, key)]
+            if not task.cancelled() and task.exception() is None:
+                self._remember(key, task.result(), ttl)
+
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+
+
+flight = SingleFlight()
+
+
+def coalesce(key, func, ttl=0):
+    """
+    ``flight.do`` unless ``settings.READ_COALESCING`` is off.
+    """
+    if not settings.READ_COALESCING:
+        return func()
+    return flight.do(key, func, ttl)
+
+
+async def acoalesce(key, func, ttl=0):
+    """
+    ``flight.ado`` unless ``settings.READ_COALESCING`` is off.
+    """
+    if not settings.READ_COALESCING:
+        return await func()
+    return await flight.ado(key, func, ttl)
+
+
+def coalesced_response(request, key, build, headers=None):
+    """
+    Respond to a DRF request with a body shared by concurrent identical requests.
+
+    The body is rendered once per key and accepted media type, with the renderer
+    DRF negotiated for the request, and kept ``settings.READ_COALESCING_TTL``
+    seconds. HTML pages embed the request that asked for them (forms, user, URL),
+    so for those only the data is shared and DRF renders each page.
+
+    Args:
+        request: DRF request object.
+        key (tuple): Identity of the payload.
+        build (callable): Returns ``(data, status code)``.
+        headers (dict): Extra response headers.
+
+    Returns:
+        Response: The payload, already rendered unless it is HTML.
+    """
+    renderer, media_type = request.accepted_renderer, request.accepted_media_type
+    if renderer.media_type == 'text/html':
+        data, status = coalesce((key, None), build, settings.READ_COALESCING_TTL)
+        return Response(data, status=status, headers=headers)
+    renderer_context = {'view': request.parser_context.get('view'), 'request': request}
+
+    def render():
+        data, status = build()
+        with timed('render_time'):
+            return data, status, renderer.render(data, media_type, renderer_context)
+
+    data, status, body = coalesce((key, media_type), render, settings.READ_COALESCING_TTL)
+    response = Response(data, status=status, headers=headers)
+    # Setting the content marks the response rendered, so DRF does not render it again.
+    response.content = body
+    response['Content-Type'] = content_type(renderer, media_type)
+    return response
+
+
+async def acoalesced_response(request, key, build, headers=None):
+    """
+    Async counterpart of ``coalesced_response`` for the async views.
+
+    The renderer is negotiated from ``DEFAULT_RENDERER_CLASSES`` without the
+    browsable API (see ``renderers.negotiate``).
+
+    Args:
+        request: Django request object.
+        key (tuple): Identity of the payload.
+        build (callable): Coroutine function returning ``(data, status code)``.
+        headers (dict): Extra response headers.
+
+    Returns:
+        HttpResponse: The payload.
+
+    Raises:
+        NotAcceptable: No renderer matches the ``Accept`` header.
+    """
+    renderer, media_type = negotiate(request)
+
+    async def render():
+        data, status = await build()
+        with timed('render_time'):
+            return data, status, renderer.render(data, media_type, {})
+
+    data, status, body = await acoalesce((key, media_type), render, settings.READ_COALESCING_TTL)
+    return HttpResponse(body, status=status, content_type=content_type(renderer, media_type), headers=headers)
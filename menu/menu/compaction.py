@@ -0,0 +1,70 @@
+"""
+Compaction of the Vote table for closed days.
+
+For every vote date older than the retention window, ``compact_day`` makes the
+day's VoteTally rows exact (one shard per menu), rolls the day up for analytics
+while its raw votes still exist, records an ArchivedVoteDay and then deletes the
+raw votes in small batches, each in its own short transaction. Results and
+analytics read tallies and rollups, so they answer the same for compacted days.
+"""
+import json
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import ArchivedVoteDay, RolledUpDay, Vote, VoteTally
+from .rollups import rollup_days
+
+
+def compactable_days(retention_days=None, today=None):
+    """
+    Return the vote dates older than the retention window that still have raw votes.
+    """
+    if retention_days is None:
+        retention_days = settings.VOTE_RETENTION_DAYS
+    cutoff = (today or date.today()) - timedelta(days=retention_days)
+    return list(
+        Vote.objects
+        .filter(vote_date__lt=cutoff)
+        .exclude(vote_date__in=ArchivedVoteDay.objects.values('day'))
+        .values_list('vote_date', flat=True)
+        .distinct()
+        .order_by('vote_date')
+    )
+
+
+def compact_day(day, batch_size=5000, archive=None):
+    """
+    Compact the votes of one day.
+
+    Args:
+        day (date): Vote date to compact.
+        batch_size (int): Votes deleted per transaction.
+        archive (file): Text file the raw votes are written to as JSON lines before deletion.
+
+    Returns:
+        int: Number of raw votes removed.
+    """
+    with transaction.atomic():
+        VoteTally.rebuild([day])
+        ArchivedVoteDay.objects.create(day=day, votes=Vote.objects.filter(vote_date=day).count())
+    # Menus dated on this day need their raw votes for distinct voter counts.
+    if not RolledUpDay.objects.filter(day=day).exists():
+        rollup_days([day])
+
+    removed = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Vote.objects.filter(vote_date=day).order_by('pk')
+                .values('id', 'user', 'menu', 'vote_date')[:batch_size]
+            )
+            if not batch:
+                break
+            if archive is not None:
+                for vote in batch:
+                    archive.write(json.dumps(vote, default=str) + '\n')
+            Vote.objects.filter(pk__in=[vote['id'] for vote in batch]).delete()
+        removed += len(batch)
+    return removed
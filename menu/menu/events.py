@@ -0,0 +1,207 @@
+"""
+Live vote results for the result_stream endpoints.
+
+The vote view publishes the voted menu once its transaction commits, which bumps
+that menu's version in the configured broadcaster (``settings.RESULTS_BROADCASTER``)
+without looking up its date. The streams show the totals of the menus of a date,
+whatever day the votes were cast: every open stream checks the versions of its
+day's menus once per ``settings.RESULTS_PUSH_INTERVAL`` and pushes the day's
+totals when they changed, so a burst of votes turns into at most one event per
+interval per client. Adding menus publishes their date, which makes the streams
+of that day reload its menus. The menus and totals of a day are computed once
+per version in each process and shared by all of its streams.
+"""
+import asyncio
+import json
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from .models import Menu, VoteTally
+
+KEEPALIVE_SECONDS = 15
+# A computed snapshot is reused for the same version for at most this long, in case
+# the broadcaster's versions restart (e.g. the cache was flushed).
+SNAPSHOT_MAX_AGE = 60
+
+
+class LocalResultsBroadcaster:
+    """
+    Keeps result versions in process memory.
+
+    Only streams served by the process that recorded the vote see it, so use it
+    with a single worker process.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = {}
+
+    def publish(self, key):
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def version(self, key):
+        return self._versions.get(key, 0)
+
+    def versions(self, keys):
+        return sum(self._versions.get(key, 0) for key in keys)
+
+
+class CacheResultsBroadcaster:
+    """
+    Keeps result versions in the Django cache.
+
+    With a shared cache backend (CACHE_URL) votes reach the streams of every
+    worker process.
+    """
+    def _key(self, key):
+        return f'results_version:{key}'
+
+    def publish(self, key):
+        key = self._key(key)
+        if not cache.add(key, 1, None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Evicted between add and incr.
+                cache.add(key, 1, None)
+
+    def version(self, key):
+        return cache.get(self._key(key), 0)
+
+    def versions(self, keys):
+        return sum(cache.get_many([self._key(key) for key in keys]).values())
+
+
+class ResultsFeed:
+    """
+    Computes the menus and totals of a day once per version and shares them between streams.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._menus = {}
+        self._snapshots = {}
+
+    def menu_keys(self, day, version):
+        """
+        Return the broadcaster keys of the day's menus at the given day version.
+        """
+        with self._lock:
+            cached = self._menus.get(day)
+            if cached is not None and cached[0] == version and time.monotonic() - cached[1] < SNAPSHOT_MAX_AGE:
+                return cached[2]
+            keys = [menu_key(pk) for pk in Menu.objects.filter(menu_date=day).values_list('pk', flat=True)]
+            self._menus[day] = (version, time.monotonic(), keys)
+            return keys
+
+    def snapshot(self, day, version):
+        """
+        Return the event payload for the day at the given version.
+        """
+        with self._lock:
+            cached = self._snapshots.get(day)
+            if cached is not None and cached[0] == version and time.monotonic() - cached[1] < SNAPSHOT_MAX_AGE:
+                return cached[2]
+            results = [
+                {'menu': row['menu'], 'vote_count': row['vote_count']}
+                for row in VoteTally.totals_for_menu_date(day)
+            ]
+            payload = f"event: result\ndata: {json.dumps({'day': day, 'results': results})}\n\n"
+            self._snapshots[day] = (version, time.monotonic(), payload)
+            return payload
+
+
+_broadcaster = None
+_feed = ResultsFeed()
+
+
+def get_broadcaster():
+    """
+    Return the process-wide broadcaster configured by ``settings.RESULTS_BROADCASTER``.
+    """
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = import_string(settings.RESULTS_BROADCASTER)()
+    return _broadcaster
+
+
+def menu_key(menu_id):
+    """
+    Return the broadcaster key of a menu's results.
+    """
+    return f'menu:{menu_id}'
+
+
+def publish_result(day):
+    """
+    Announce that the menus of a day changed.
+
+    Args:
+        day (date or str): The date of the added menus.
+    """
+    get_broadcaster().publish(str(day))
+
+
+def publish_menu_results(menu_ids):
+    """
+    Announce that the results of these menus changed.
+
+    Args:
+        menu_ids (iterable): Primary keys of the voted menus.
+    """
+    broadcaster = get_broadcaster()
+    for menu_id in set(menu_ids):
+        broadcaster.publish(menu_key(menu_id))
+
+
+def _version(broadcaster, day):
+    """
+    Return the version of a day's results: its menus and their votes.
+    """
+    day_version = broadcaster.version(day)
+    return day_version, broadcaster.versions(_feed.menu_keys(day, day_version))
+
+
+def result_events(day):
+    """
+    Yield server-sent events with the day's totals until the stream times out.
+
+    Clients reconnect on their own (EventSource), which frees sync workers
+    after ``settings.RESULTS_STREAM_MAX_SECONDS``.
+    """
+    broadcaster = get_broadcaster()
+    deadline = time.monotonic() + settings.RESULTS_STREAM_MAX_SECONDS
+    last_version, last_sent = None, time.monotonic()
+    while time.monotonic() < deadline:
+        version = _version(broadcaster, day)
+        if version != last_version:
+            yield _feed.snapshot(day, version)
+            last_version, last_sent = version, time.monotonic()
+        elif time.monotonic() - last_sent > KEEPALIVE_SECONDS:
+            yield ': keepalive\n\n'
+            last_sent = time.monotonic()
+        time.sleep(settings.RESULTS_PUSH_INTERVAL)
+
+
+async def aresult_events(day):
+    """
+    Async variant of ``result_events``; waiting between checks holds no thread.
+    """
+    broadcaster = get_broadcaster()
+    version_of = sync_to_async(_version)
+    snapshot = sync_to_async(_feed.snapshot)
+    deadline = time.monotonic() + settings.RESULTS_STREAM_MAX_SECONDS
+    last_version, last_sent = None, time.monotonic()
+    while time.monotonic() < deadline:
+        version = await version_of(broadcaster, day)
+        if version != last_version:
+            yield await snapshot(day, version)
+            last_version, last_sent = version, time.monotonic()
+        elif time.monotonic() - last_sent > KEEPALIVE_SECONDS:
+            yield ': keepalive\n\n'
+            last_sent = time.monotonic()
+        await asyncio.sleep(settings.RESULTS_PUSH_INTERVAL)
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2 hasher with the cost taken from ``settings.PASSWORD_HASH_ITERATIONS``.
+
+    Every login hashes the password once, so the iteration count sets how many
+    logins a core verifies per second. Hashes keep the count they were made
+    with; a login with a different configured count rehashes the password.
+    """
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
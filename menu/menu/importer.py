@@ -0,0 +1,189 @@
+"""
+Streaming import of restaurant and menu files, used by ``manage.py import_menus``.
+
+Files are JSON lines or CSV (by extension), one restaurant or menu per row:
+
+    restaurants: name
+    menus:       name, restaurant (the restaurant's name), menu_date, menu_data
+                 (a JSON object; a JSON string in CSV files)
+
+Rows are read and written ``chunk_size`` at a time, so memory use does not grow
+with the file; only the restaurant name -> id map is kept. Each row is validated
+with RestaurantSerializer/MenuSerializer, each chunk is saved with ``bulk_create``
+in its own transaction, after which the menu cache of every date it touched is
+dropped (see menu.caching), and rows already in the database (a restaurant of the
+same name, a menu with the same restaurant, date and name) are skipped, so an
+interrupted import can simply be run again. Rejected rows are written with
+their errors to a JSON lines side file.
+"""
+import csv
+import json
+import time
+from itertools import islice
+
+from django.db import reset_queries, transaction
+from rest_framework import serializers
+
+from .caching import invalidate_menus_for_date
+from .events import publish_result
+from .models import Menu, Restaurant
+from .serializers import MenuSerializer, RestaurantSerializer
+
+CHUNK_SIZE = 2000
+
+
+def read_rows(path):
+    """
+    Yield ``(line number, row)`` from a JSON lines or CSV file.
+
+    Lines that are not valid JSON are yielded as their raw text.
+    """
+    with open(path, newline='', encoding='utf-8') as file:
+        if str(path).endswith('.csv'):
+            reader = csv.DictReader(file)
+            for row in reader:
+                row.pop(None, None)
+                if row.get('menu_data'):
+                    try:
+                        row['menu_data'] = json.loads(row['menu_data'])
+                    except ValueError:
+                        pass
+                yield reader.line_num, row
+            return
+        for number, line in enumerate(file, start=1):
+            if line.strip():
+                try:
+                    yield number, json.loads(line)
+                except ValueError:
+                    yield number, line.rstrip('\n')
+
+
+class ImportStats:
+    """
+    Outcome of importing one file.
+
+    Attributes:
+        imported (int): Rows saved.
+        skipped (int): Rows already in the database or earlier in the file.
+        rejected (int): Rows that failed validation.
+        seconds (float): Time taken.
+    """
+    def __init__(self):
+        self.imported = self.skipped = self.rejected = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        total = self.imported + self.skipped + self.rejected
+        return total / self.seconds if self.seconds else 0.0
+
+
+class Importer:
+    """
+    Imports restaurant and menu rows.
+
+    ``import_restaurants`` and ``import_menus`` take ``(line number, row)`` pairs
+    as yielded by ``read_rows`` and a text file receiving one JSON line per
+    rejected row, and return an ImportStats.
+
+    Args:
+        chunk_size (int): Rows validated and saved per transaction.
+    """
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.rejects = None
+        # The oldest restaurant wins when names repeat.
+        self.restaurant_ids = dict(Restaurant.objects.order_by('-id').values_list('name', 'id'))
+
+    def import_restaurants(self, rows, rejects):
+        return self._run(rows, rejects, self._restaurant_chunk)
+
+    def import_menus(self, rows, rejects):
+        return self._run(rows, rejects, self._menu_chunk)
+
+    def _run(self, rows, rejects, save_chunk):
+        self.rejects = rejects
+        stats = ImportStats()
+        start = time.perf_counter()
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            with transaction.atomic():
+                save_chunk(chunk, stats)
+            # With DEBUG on, Django keeps the last 9000 statements, here large INSERTs.
+            reset_queries()
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+    def _reject(self, stats, number, row, errors):
+        stats.rejected += 1
+        self.rejects.write(json.dumps({'line': number, 'row': row, 'errors': errors}, default=str) + '\n')
+
+    def _validate(self, serializer, number, row, stats):
+        if not isinstance(row, dict):
+            self._reject(stats, number, row, {'non_field_errors': ['Not a JSON object.']})
+            return None
+        try:
+            return serializer.run_validation(row)
+        except serializers.ValidationError as exc:
+            self._reject(stats, number, row, exc.detail)
+            return None
+
+    def _restaurant_chunk(self, chunk, stats):
+        serializer = RestaurantSerializer()
+        restaurants = []
+        for number, row in chunk:
+            attrs = self._validate(serializer, number, row, stats)
+            if attrs is None:
+                continue
+            if attrs['name'] in self.restaurant_ids:
+                stats.skipped += 1
+                continue
+            self.restaurant_ids[attrs['name']] = None
+            restaurants.append(Restaurant(**attrs))
+        for restaurant in Restaurant.objects.bulk_create(restaurants):
+            self.restaurant_ids[restaurant.name] = restaurant.pk
+        stats.imported += len(restaurants)
+
+    def _menu_chunk(self, chunk, stats):
+        valid = []
+        restaurants = {}
+        for number, row in chunk:
+            if isinstance(row, dict) and 'restaurant' in row:
+                name = row['restaurant']
+                restaurant_id = self.restaurant_ids.get(name) if isinstance(name, str) else None
+                if restaurant_id is None:
+                    self._reject(stats, number, row, {'restaurant': [f'Unknown restaurant "{name}".']})
+                    continue
+                restaurants[restaurant_id] = Restaurant(pk=restaurant_id, name=name)
+                row = {**row, 'restaurant': restaurant_id}
+            valid.append((number, row))
+        serializer = MenuSerializer(context={'restaurants': restaurants})
+        menus = []
+        for number, row in valid:
+            attrs = self._validate(serializer, number, row, stats)
+            if attrs is not None:
+                menus.append(Menu(**attrs))
+        if not menus:
+            return
+        # Menus saved by an earlier run, or earlier in this file.
+        existing = set(
+            Menu.objects
+            .filter(menu_date__in={menu.menu_date for menu in menus}, restaurant__in=restaurants)
+            .values_list('restaurant_id', 'menu_date', 'name')
+        )
+        new = []
+        for menu in menus:
+            key = (menu.restaurant_id, menu.menu_date, menu.name)
+            if key in existing:
+                stats.skipped += 1
+            else:
+                existing.add(key)
+                new.append(menu)
+        Menu.objects.bulk_create(new)
+        stats.imported += len(new)
+        for day in {menu.menu_date for menu in new}:
+            transaction.on_commit(lambda day=day: invalidate_menus_for_date(day))
+            transaction.on_commit(lambda day=day: publish_result(day))
@@ -0,0 +1,85 @@
+"""
+Credential checks for the token endpoint.
+
+Everyone logs in right before the vote opens, and each login verifies a
+deliberately slow password hash (``settings.PASSWORD_HASH_ITERATIONS``). The
+hashes run on a process-wide pool of ``settings.LOGIN_HASH_WORKERS`` threads:
+hashlib releases the GIL, so the pool keeps that many cores busy, and logins
+beyond it wait in its queue instead of taking the CPU from every other request
+of the worker. ``register/bulk`` hashes the passwords of new users on the same pool.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, get_hasher, identify_hasher, make_password
+from django.contrib.auth.models import User
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_login_executor():
+    """
+    Return the process-wide pool verifying login passwords.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(settings.LOGIN_HASH_WORKERS, thread_name_prefix='login-hash')
+    return _executor
+
+
+def verify_password(encoded, password):
+    """
+    Check a password against a stored value, without touching the database.
+
+    Args:
+        encoded (str): The stored password, or None when the username is unknown;
+            a hash is computed anyway so both fail equally slowly.
+        password (str): Password sent by the client.
+
+    Returns:
+        tuple: Whether the password matches, and whether the stored value should
+        be replaced by a hash with the current hasher and cost.
+    """
+    if encoded is None:
+        make_password(password)
+        return False, False
+    if encoded.startswith(UNUSABLE_PASSWORD_PREFIX):
+        return False, False
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        # Accounts saved in plaintext before registration hashed passwords.
+        return encoded == password, True
+    if not hasher.verify(password, encoded):
+        return False, False
+    preferred = get_hasher()
+    return True, hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+def authenticate(username, password):
+    """
+    Return the active user with these credentials, or None.
+
+    The user is loaded with their EmployeeProfile in one query, for the token's
+    ``employee`` claim. The password is verified on the login pool and rehashed
+    when it is stored in plaintext or with an outdated cost.
+
+    Args:
+        username (str): Username sent by the client.
+        password (str): Password sent by the client.
+    """
+    if not isinstance(username, str) or not isinstance(password, str):
+        return None
+    user = User.objects.select_related('employeeprofile').filter(username=username).first()
+    encoded = user.password if user is not None else None
+    matches, rehash = get_login_executor().submit(verify_password, encoded, password).result()
+    if not matches or not user.is_active:
+        return None
+    if rehash:
+        user.set_password(password)
+        user.save(update_fields=['password'])
+    return user
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from menu.compaction import compact_day, compactable_days
+
+
+class Command(BaseCommand):
+    """
+    Compact raw votes older than the retention window into VoteTally rows.
+
+    Usage:
+        python manage.py compact_votes [--retention-days N] [--batch-size N] [--archive-file votes.jsonl]
+    """
+    help = 'Replace votes older than the retention window with per-menu daily counts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=settings.VOTE_RETENTION_DAYS,
+                            help='Keep raw votes of this many recent days.')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Votes deleted per transaction.')
+        parser.add_argument('--archive-file',
+                            help='Append the removed votes to this file as JSON lines.')
+
+    def handle(self, *args, **options):
+        days = compactable_days(options['retention_days'])
+        archive = open(options['archive_file'], 'a') if options['archive_file'] else None
+        try:
+            for day in days:
+                start = time.perf_counter()
+                removed = compact_day(day, options['batch_size'], archive)
+                self.stdout.write(f'{day}: removed {removed} votes in {time.perf_counter() - start:.1f}s')
+        finally:
+            if archive is not None:
+                archive.close()
+        self.stdout.write(self.style.SUCCESS(f'Compacted {len(days)} days.'))
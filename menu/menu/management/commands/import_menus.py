@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from menu.importer import CHUNK_SIZE, Importer, read_rows
+
+
+class Command(BaseCommand):
+    """
+    Import restaurants and menus from JSON lines or CSV files.
+
+    Usage:
+        python manage.py import_menus [--restaurants FILE] [--menus FILE] [--chunk-size N]
+
+    Restaurant files are imported first. Rejected rows of ``FILE`` are written
+    to ``FILE.rejected.jsonl``. Safe to run again; see menu.importer.
+    """
+    help = 'Stream restaurants and menus from JSON lines or CSV files into the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurants', action='append', default=[], help='Restaurant file; repeatable.')
+        parser.add_argument('--menus', action='append', default=[], help='Menu file; repeatable.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows saved per transaction.')
+
+    def handle(self, *args, **options):
+        if not options['restaurants'] and not options['menus']:
+            raise CommandError('Pass --restaurants and/or --menus.')
+        importer = Importer(options['chunk_size'])
+        files = [(path, importer.import_restaurants) for path in options['restaurants']]
+        files += [(path, importer.import_menus) for path in options['menus']]
+        for path, run in files:
+            rejects_path = f'{path}.rejected.jsonl'
+            with open(rejects_path, 'w', encoding='utf-8') as rejects:
+                stats = run(read_rows(path), rejects)
+            self.stdout.write(
+                f'{path}: {stats.imported} imported, {stats.skipped} skipped, {stats.rejected} rejected '
+                f'in {stats.seconds:.1f}s ({stats.rows_per_second:.0f} rows/sec)'
+            )
+            if stats.rejected:
+                self.stdout.write(self.style.WARNING(f'Rejected rows written to {rejects_path}'))
+        self.stdout.write(self.style.SUCCESS('Import finished.'))
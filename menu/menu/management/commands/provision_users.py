@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from menu.importer import read_rows
+from menu.provisioning import provision_users
+
+
+class Command(BaseCommand):
+    """
+    Create user accounts in bulk from a JSON lines or CSV file.
+
+    Usage:
+        python manage.py provision_users FILE [--workers N] [--batch-size N]
+
+    Rows have ``username``, ``password`` and optionally ``user_type`` ('employee'
+    by default, or 'basic'). The outcome of every row is written to
+    ``FILE.report.jsonl``. Usernames already registered are skipped, so the
+    command can be run again; see menu.provisioning.
+    """
+    help = 'Create users and employee profiles in bulk from a JSON lines or CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='JSON lines or CSV file of users.')
+        parser.add_argument('--workers', type=int, help='Password hashing threads.')
+        parser.add_argument('--batch-size', type=int, help='Rows per INSERT.')
+
+    def handle(self, *args, **options):
+        path = options['file']
+        report = provision_users(read_rows(path), options['batch_size'], options['workers']).as_dict()
+        report_path = f'{path}.report.jsonl'
+        with open(report_path, 'w', encoding='utf-8') as file:
+            for row in report['rows']:
+                file.write(json.dumps(row, default=str) + '\n')
+        seconds = report['seconds']
+        self.stdout.write(
+            f"{path}: {report['created']} created, {report['exists']} already registered, "
+            f"{report['duplicate']} duplicated, {report['rejected']} rejected in {seconds['total']:.1f}s "
+            f"(validate {seconds['validate']:.2f}s, lookup {seconds['lookup']:.2f}s, "
+            f"hash {seconds['hash']:.2f}s, write {seconds['write']:.2f}s)"
+        )
+        if report['rejected']:
+            self.stdout.write(self.style.WARNING(f'Rejected rows are listed in {report_path}'))
+        self.stdout.write(self.style.SUCCESS('Provisioning finished.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from menu.models import VoteTally
+
+
+class Command(BaseCommand):
+    """
+    Recount VoteTally rows from the Vote table.
+
+    Usage:
+        python manage.py rebuild_vote_tallies [--day YYYY-MM-DD ...]
+    """
+    help = 'Rebuild the per-day vote tallies from the Vote table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--day', action='append', dest='days',
+                            help='Vote date to rebuild (repeatable). Defaults to every date.')
+
+    def handle(self, *args, **options):
+        rows = VoteTally.rebuild(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} tally rows.'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from menu.rollups import rollup_pending_days
+
+
+class Command(BaseCommand):
+    """
+    Fill RestaurantRollup for closed days that were not rolled up yet.
+
+    Usage:
+        python manage.py rollup_restaurant_stats
+
+    Meant to run after lunch (e.g. from cron); runs with nothing to do are cheap.
+    """
+    help = 'Roll up restaurant statistics for closed days.'
+
+    def handle(self, *args, **options):
+        days = rollup_pending_days()
+        if days:
+            self.stdout.write(self.style.SUCCESS(f'Rolled up {len(days)} days ({days[0]} to {days[-1]}).'))
+        else:
+            self.stdout.write('Nothing to roll up.')
@@ -0,0 +1,253 @@
+"""
+Per-route request metrics in the Prometheus text format.
+
+MetricsMiddleware times a sample of requests (``settings.METRICS_SAMPLE_RATE``)
+and records, per URL pattern: a latency histogram, the SQL query count and the
+time spent in the database (on every alias, replicas included), the time spent
+serializing data (serializer ``.data`` and ``values_rows``, without their SQL)
+and the time spent rendering the response body. The ``metrics`` view serves the totals to staff users and to the scrapers
+in ``settings.METRICS_ALLOWED_IPS``.
+
+Metrics are kept per process; with several workers each one reports its own.
+"""
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+
+from .permissions import MetricsScraperPermission
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RouteMetrics:
+    """
+    Totals for one route and method.
+    """
+    __slots__ = ('buckets', 'count', 'latency', 'queries', 'db_time', 'serialize_time', 'render_time', 'statuses')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.latency = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+        self.statuses = {}
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of RouteMetrics keyed by (route, method).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def observe(self, route, method, status, latency, queries, db_time, serialize_time, render_time):
+        with self._lock:
+            metrics = self._routes.get((route, method))
+            if metrics is None:
+                metrics = self._routes[(route, method)] = RouteMetrics()
+            metrics.buckets[bisect_left(LATENCY_BUCKETS, latency)] += 1
+            metrics.count += 1
+            metrics.latency += latency
+            metrics.queries += queries
+            metrics.db_time += db_time
+            metrics.serialize_time += serialize_time
+            metrics.render_time += render_time
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    def render(self):
+        """
+        Return all metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines = [
+                '# HELP menu_http_requests_total Sampled requests by route, method and status.',
+                '# TYPE menu_http_requests_total counter',
+            ]
+            for (route, method), metrics in routes:
+                for status, count in sorted(metrics.statuses.items()):
+                    lines.append(f'menu_http_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}')
+
+            lines += [
+                '# HELP menu_http_request_duration_seconds Latency of sampled requests.',
+                '# TYPE menu_http_request_duration_seconds histogram',
+            ]
+            for (route, method), metrics in routes:
+                labels = f'route="{route}",method="{method}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), metrics.buckets):
+                    cumulative += count
+                    lines.append(f'menu_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'menu_http_request_duration_seconds_sum{{{labels}}} {metrics.latency}')
+                lines.append(f'menu_http_request_duration_seconds_count{{{labels}}} {metrics.count}')
+
+            for name, attribute, description in (
+                ('menu_http_db_queries_total', 'queries', 'SQL queries run by sampled requests.'),
+                ('menu_http_db_duration_seconds_total', 'db_time', 'Time sampled requests spent in SQL.'),
+                ('menu_http_serialize_duration_seconds_total', 'serialize_time',
+                 'Time sampled requests spent serializing data, without SQL.'),
+                ('menu_http_render_duration_seconds_total', 'render_time',
+                 'Time sampled requests spent rendering the response body.'),
+            ):
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} counter']
+                for (route, method), metrics in routes:
+                    lines.append(f'{name}{{route="{route}",method="{method}"}} {getattr(metrics, attribute)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class _RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+# Stats of the sampled request being served, for ``timed``.
+_current = ContextVar('metrics_request_stats', default=None)
+
+
+@contextmanager
+def timed(attribute):
+    """
+    Add the time of the block, minus its SQL, to ``attribute`` of the sampled request's stats.
+
+    Args:
+        attribute (str): 'serialize_time' or 'render_time'.
+    """
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start, db_time = time.perf_counter(), stats.db_time
+    try:
+        yield
+    finally:
+        setattr(stats, attribute,
+                getattr(stats, attribute) + time.perf_counter() - start - (stats.db_time - db_time))
+
+
+def _install(stats):
+    # Every alias, so reads routed to a replica are counted too.
+    for conn in connections.all():
+        conn.execute_wrappers.append(stats)
+
+
+def _uninstall(stats):
+    for conn in connections.all():
+        if stats in conn.execute_wrappers:
+            conn.execute_wrappers.remove(stats)
+
+
+class MetricsMiddleware:
+    """
+    Record the metrics of a sample of requests into ``registry``.
+
+    Register it first in ``MIDDLEWARE`` so the latency includes the other middleware.
+    Works in sync and async chains; under ASGI the query counter is installed in
+    the thread that runs the request's queries (``sync_to_async(thread_sensitive=True)``).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            return self.get_response(request)
+        stats = request._metrics = _RequestStats()
+        start = time.perf_counter()
+        _install(stats)
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+            _uninstall(stats)
+        self._observe(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            return await self.get_response(request)
+        stats = request._metrics = _RequestStats()
+        start = time.perf_counter()
+        await sync_to_async(_install)(stats)
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+            await sync_to_async(_uninstall)(stats)
+        self._observe(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def _observe(self, request, response, stats, latency):
+        match = request.resolver_match
+        route = match.route if match is not None else 'unmatched'
+        registry.observe(route, request.method, response.status_code, latency,
+                         stats.queries, stats.db_time, stats.serialize_time, stats.render_time)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time the rendering.
+        stats = getattr(request, '_metrics', None)
+        if stats is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                stats.render_time += time.perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+        return response
+
+
+@api_view(['GET'])
+@permission_classes([MetricsScraperPermission | IsAdminUser])
+def metrics(request):
+    """
+    Serve the collected metrics for Prometheus to scrape.
+
+    Open to staff users and to the addresses in ``settings.METRICS_ALLOWED_IPS``.
+
+    Args:
+        request: HTTP request object.
+
+    Returns:
+        HttpResponse: Metrics in the Prometheus text format.
+    """
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_tallies(apps, schema_editor):
+    Vote = apps.get_model('menu', 'Vote')
+    VoteTally = apps.get_model('menu', 'VoteTally')
+    counts = Vote.objects.values('menu', 'vote_date').annotate(total=models.Count('id')).order_by()
+    VoteTally.objects.bulk_create(
+        VoteTally(menu_id=row['menu'], vote_date=row['vote_date'], count=row['total'])
+        for row in counts.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0003_employeeprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vote_date', models.DateField()),
+                ('shard', models.PositiveSmallIntegerField(default=0)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('menu', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='menu.menu')),
+            ],
+            options={
+                'unique_together': {('menu', 'vote_date', 'shard')},
+            },
+        ),
+        migrations.RunPython(fill_tallies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0004_votetally'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(fields=['menu_date'], name='menu_menu_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['vote_date', 'menu'], name='menu_vote_date_menu_idx'),
+        ),
+    ]
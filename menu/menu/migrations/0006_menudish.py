@@ -0,0 +1,55 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+from decimal import Decimal, InvalidOperation
+
+
+def fill_dishes(apps, schema_editor):
+    Menu = apps.get_model('menu', 'Menu')
+    MenuDish = apps.get_model('menu', 'MenuDish')
+    dishes = []
+    for menu in Menu.objects.iterator(chunk_size=1000):
+        if not isinstance(menu.menu_data, dict):
+            continue
+        for dish, price in menu.menu_data.items():
+            if isinstance(price, bool) or not isinstance(price, (int, float, str)):
+                continue
+            try:
+                price = Decimal(str(price)).quantize(Decimal('0.01'))
+            except InvalidOperation:
+                continue
+            if abs(price) >= 10 ** 8:
+                continue
+            name = str(dish)[:200]
+            dishes.append(MenuDish(menu_id=menu.pk, menu_date=menu.menu_date, dish=name,
+                                   dish_key=name.lower(), price=price))
+        if len(dishes) >= 1000:
+            MenuDish.objects.bulk_create(dishes)
+            dishes = []
+    MenuDish.objects.bulk_create(dishes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0005_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuDish',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('menu_date', models.DateField()),
+                ('dish', models.CharField(max_length=200)),
+                ('dish_key', models.CharField(max_length=200)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('menu', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dishes', to='menu.menu')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dish_key', 'menu_date'], name='menu_dish_key_date_idx'), models.Index(fields=['menu_date', 'price'], name='menu_dish_date_price_idx')],
+            },
+        ),
+        migrations.RunPython(fill_dishes, migrations.RunPython.noop),
+    ]
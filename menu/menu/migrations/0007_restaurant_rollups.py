@@ -0,0 +1,39 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0006_menudish'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RolledUpDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RestaurantRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('menus', models.PositiveIntegerField(default=0)),
+                ('votes', models.PositiveIntegerField(default=0)),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('voters', models.PositiveIntegerField(default=0)),
+                ('employees', models.PositiveIntegerField(default=0)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='menu.restaurant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'period_start'], name='menu_rollup_period_idx')],
+                'unique_together': {('restaurant', 'period', 'period_start')},
+            },
+        ),
+    ]
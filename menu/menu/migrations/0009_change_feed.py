@@ -0,0 +1,45 @@
+# Generated by Django 4.2.5 on 2026-10-18 12:00
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def number_existing_rows(apps, schema_editor):
+    # Restaurants first, then menus, so a client syncing from 0 can resolve every menu's restaurant.
+    Restaurant = apps.get_model('menu', 'Restaurant')
+    Menu = apps.get_model('menu', 'Menu')
+    ChangeSequence = apps.get_model('menu', 'ChangeSequence')
+    db = schema_editor.connection.alias
+    offset = Restaurant.objects.using(db).aggregate(last=Max('id'))['last'] or 0
+    Restaurant.objects.using(db).update(change_seq=F('id'))
+    Menu.objects.using(db).update(change_seq=F('id') + offset)
+    last = offset + (Menu.objects.using(db).aggregate(last=Max('id'))['last'] or 0)
+    ChangeSequence.objects.using(db).create(pk=1, value=last)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0008_archivedvoteday'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='menu',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(number_existing_rows, migrations.RunPython.noop),
+    ]
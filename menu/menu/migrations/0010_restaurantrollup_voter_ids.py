@@ -0,0 +1,34 @@
+# Generated by Django 4.2.5 on 2026-10-18 12:49
+
+from django.db import migrations, models
+
+
+def fill_daily_voter_ids(apps, schema_editor):
+    # Days whose raw votes were already compacted keep an empty list.
+    RestaurantRollup = apps.get_model('menu', 'RestaurantRollup')
+    Vote = apps.get_model('menu', 'Vote')
+    db = schema_editor.connection.alias
+    voters = {}
+    for day, restaurant, user in (Vote.objects.using(db)
+                                  .values_list('menu__menu_date', 'menu__restaurant', 'user').distinct()):
+        voters.setdefault((day, restaurant), []).append(user)
+    rows = list(RestaurantRollup.objects.using(db).filter(period='day'))
+    for row in rows:
+        row.voter_ids = sorted(voters.get((row.period_start, row.restaurant_id), []))
+    RestaurantRollup.objects.using(db).bulk_update(rows, ['voter_ids'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0009_change_feed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurantrollup',
+            name='voter_ids',
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.RunPython(fill_daily_voter_ids, migrations.RunPython.noop),
+    ]
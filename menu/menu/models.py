@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import F
 
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
+import random
 
 
 class EmployeeProfile(models.Model):
@@ -16,7 +20,87 @@ class EmployeeProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
 
 
-class Restaurant(models.Model):
+class ChangeSequence(models.Model):
+    """
+    Single-row counter numbering the saves of menus and restaurants for the change feed.
+
+    ``allocate`` updates the row, which keeps it locked until the saving
+    transaction ends. Numbers therefore become visible in increasing order, and a
+    client that has read up to a number never misses a row committed later with
+    a lower one.
+
+    Fields:
+        value (int): Last number handed out.
+    """
+    value = models.BigIntegerField(default=0)
+
+    @classmethod
+    def allocate(cls, count=1, using=None):
+        """
+        Reserve ``count`` consecutive numbers. Call inside the transaction that saves the rows.
+
+        Args:
+            count (int): How many numbers to reserve.
+            using (str): Database alias the rows are saved to.
+
+        Returns:
+            range: The reserved numbers.
+        """
+        rows = cls.objects.using(using).filter(pk=1)
+        if not rows.update(value=F('value') + count):
+            try:
+                with transaction.atomic(using=using):
+                    cls.objects.using(using).create(pk=1, value=count)
+            except IntegrityError:
+                # Another transaction created the row first.
+                rows.update(value=F('value') + count)
+        last = rows.values_list('value', flat=True).get()
+        return range(last - count + 1, last + 1)
+
+    @classmethod
+    def stamp(cls, objs, using=None):
+        """
+        Set the ``change_seq`` of each object to a new number, in order.
+        """
+        for obj, seq in zip(objs, cls.allocate(len(objs), using)):
+            obj.change_seq = seq
+
+
+class ChangeTrackedManager(models.Manager):
+    """
+    Manager that numbers the rows of ``bulk_create`` for the change feed.
+    """
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            ChangeSequence.stamp(objs, self.db)
+            return super().bulk_create(objs, *args, **kwargs)
+
+
+class ChangeTracked(models.Model):
+    """
+    Abstract base of the models listed by the change feed (the changes endpoint).
+
+    Fields:
+        change_seq (int): ChangeSequence number of the last save.
+    """
+    change_seq = models.BigIntegerField(null=True, editable=False, db_index=True)
+
+    objects = ChangeTrackedManager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            ChangeSequence.stamp([self], using)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'change_seq'}
+            super().save(*args, **kwargs)
+
+
+class Restaurant(ChangeTracked):
     """
     Menu supliers.
 
@@ -32,7 +116,17 @@ class Restaurant(models.Model):
         return self.name
 
 
-class Menu(models.Model):
+class MenuManager(ChangeTrackedManager):
+    """
+    Manager of Menu that keeps the MenuDish index in sync on ``bulk_create``.
+    """
+    def bulk_create(self, objs, *args, **kwargs):
+        menus = super().bulk_create(objs, *args, **kwargs)
+        MenuDish.sync(menus)
+        return menus
+
+
+class Menu(ChangeTracked):
     """
     Menu for a specific date and restaurant.
 
@@ -42,17 +136,105 @@ class Menu(models.Model):
         menu_data (dict): JSON field for dishes in menu.
         menu_date (date): The date of the menu. Defaults to the current date.
 
+    Meta:
+        indexes (list): Index on menu_date, which every read endpoint filters on.
+
     Methods:
         __str__(): String representation of the menu.
+        save(): Save the menu and refresh its MenuDish rows.
     """
     name = models.CharField(max_length=100)
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE)
     menu_data = models.JSONField()
     menu_date = models.DateField(default=datetime.now().strftime('%Y-%m-%d'))
 
+    objects = MenuManager()
+
+    class Meta:
+        indexes = [models.Index(fields=['menu_date'], name='menu_menu_date_idx')]
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            MenuDish.sync([self])
+
+
+class MenuDish(models.Model):
+    """
+    A dish of a menu, derived from Menu.menu_data (dish -> price) for searching.
+
+    Rows are rewritten whenever a menu is saved or bulk created; edit menus
+    through the ORM, not raw SQL, to keep them in sync.
+
+    Fields:
+        menu (Menu): The menu offering the dish.
+        menu_date (date): Copy of the menu's date.
+        dish (str): Dish name as written in the menu.
+        dish_key (str): Lowercased dish name, for case-insensitive prefix search.
+        price (Decimal): Price of the dish.
+
+    Meta:
+        indexes (list): (dish_key, menu_date) for name prefix searches and
+            (menu_date, price) for searches by date and price only.
+
+    Methods:
+        sync(menus): Rewrite the dish rows of the given menus.
+    """
+    menu = models.ForeignKey(Menu, on_delete=models.CASCADE, related_name='dishes')
+    menu_date = models.DateField()
+    dish = models.CharField(max_length=200)
+    dish_key = models.CharField(max_length=200)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['dish_key', 'menu_date'], name='menu_dish_key_date_idx'),
+            models.Index(fields=['menu_date', 'price'], name='menu_dish_date_price_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dish} ({self.price}) in {self.menu_id}."
+
+    @classmethod
+    def from_menu(cls, menu):
+        """
+        Build the dish rows of a menu. Entries without a numeric price are skipped.
+        """
+        if not isinstance(menu.menu_data, dict):
+            return []
+        dishes = []
+        for dish, price in menu.menu_data.items():
+            if isinstance(price, bool) or not isinstance(price, (int, float, str)):
+                continue
+            try:
+                price = Decimal(str(price)).quantize(Decimal('0.01'))
+            except InvalidOperation:
+                continue
+            if abs(price) >= 10 ** 8:
+                continue
+            name = str(dish)[:200]
+            dishes.append(cls(menu_id=menu.pk, menu_date=menu.menu_date, dish=name,
+                              dish_key=name.lower(), price=price))
+        return dishes
+
+    @classmethod
+    def sync(cls, menus):
+        """
+        Rewrite the dish rows of the given saved menus.
+        """
+        menus = [menu for menu in menus if menu.pk is not None]
+        if not menus:
+            return
+        with transaction.atomic():
+            cls.objects.filter(menu__in=[menu.pk for menu in menus]).delete()
+            cls.objects.bulk_create(
+                [dish for menu in menus for dish in cls.from_menu(menu)],
+                batch_size=settings.BULK_CREATE_BATCH_SIZE,
+            )
+
 
 class Vote(models.Model):
     """
@@ -65,6 +247,7 @@ class Vote(models.Model):
 
     Meta:
         unique_together (tuple): Ensures the combination of user, menu, and vote date is unique.
+        indexes (list): Index on (vote_date, menu) for counting a day's votes per menu.
 
     Methods:
         __str__(): String representation of the vote.
@@ -75,6 +258,223 @@ class Vote(models.Model):
 
     class Meta:
         unique_together = ('user', 'menu', 'vote_date')
+        indexes = [models.Index(fields=['vote_date', 'menu'], name='menu_vote_date_menu_idx')]
 
     def __str__(self):
         return f"Vote by {self.user.username} for {self.menu.name} on {self.vote_date}."
+
+
+class VoteTally(models.Model):
+    """
+    Running number of votes for a menu on a date.
+
+    The count is split over ``settings.VOTE_TALLY_SHARDS`` rows per menu and date,
+    so concurrent votes for the current leader do not all queue on one row lock.
+    The total for a menu is the sum of its shards.
+
+    Fields:
+        menu (Menu): Counted menu.
+        vote_date (date): The date of the counted votes.
+        shard (int): Shard number of this row.
+        count (int): Number of votes recorded on this shard.
+
+    Meta:
+        unique_together (tuple): One row per menu, vote date and shard.
+
+    Methods:
+        increment(menu_id, vote_date): Add one vote to a random shard.
+        rebuild(days=None): Recount the tallies from the Vote table.
+        totals_for_menu_date(day): Vote totals of the day's menus, highest first.
+        winners_between(first_day, last_day): Winner and runner-up of every day in a range.
+    """
+    # Order of menus ranked by their ``vote_count`` total; ties go to the menu added first.
+    RANKING = ('-vote_count', 'menu')
+
+    menu = models.ForeignKey(Menu, on_delete=models.CASCADE)
+    vote_date = models.DateField()
+    shard = models.PositiveSmallIntegerField(default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('menu', 'vote_date', 'shard')
+
+    def __str__(self):
+        return f"{self.count} votes for menu {self.menu_id} on {self.vote_date} (shard {self.shard})."
+
+    @classmethod
+    def increment(cls, menu_id, vote_date, votes=1):
+        """
+        Add ``votes`` votes for the menu on the date.
+
+        Must be called inside the transaction that inserts the Vote, so the tally
+        commits or rolls back together with it.
+        """
+        shard = random.randrange(settings.VOTE_TALLY_SHARDS)
+        rows = cls.objects.filter(menu_id=menu_id, vote_date=vote_date, shard=shard)
+        if rows.update(count=F('count') + votes):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(menu_id=menu_id, vote_date=vote_date, shard=shard, count=votes)
+        except IntegrityError:
+            # Another transaction created the shard row first.
+            rows.update(count=F('count') + votes)
+
+    @classmethod
+    def totals_for_menu_date(cls, day):
+        """
+        Vote totals of the menus dated ``day``, highest first, ties in ``RANKING`` order.
+
+        Returns:
+            QuerySet: ``{'menu': id, 'vote_count': int}`` rows. Menus without votes are missing.
+        """
+        return (
+            cls.objects
+            .filter(menu__menu_date=day)
+            .values('menu')
+            .annotate(vote_count=models.Sum('count'))
+            .order_by(*cls.RANKING)
+        )
+
+    @classmethod
+    def winners_between(cls, first_day, last_day):
+        """
+        Winner and runner-up of every menu date in a range, from one aggregate query.
+
+        Days without votes are left out.
+
+        Returns:
+            list: ``{'day', 'winner', 'runner_up'}`` dicts ordered by day; winner and
+            runner-up are ``{'menu', 'name', 'vote_count'}`` dicts, runner-up may be None.
+        """
+        rows = (
+            cls.objects
+            .filter(menu__menu_date__range=(first_day, last_day))
+            .values('menu__menu_date', 'menu', 'menu__name')
+            .annotate(vote_count=models.Sum('count'))
+            .order_by('menu__menu_date', *cls.RANKING)
+        )
+        days = []
+        for row in rows:
+            entry = {'menu': row['menu'], 'name': row['menu__name'], 'vote_count': row['vote_count']}
+            if days and days[-1]['day'] == row['menu__menu_date']:
+                if days[-1]['runner_up'] is None:
+                    days[-1]['runner_up'] = entry
+            else:
+                days.append({'day': row['menu__menu_date'], 'winner': entry, 'runner_up': None})
+        return days
+
+    @classmethod
+    def rebuild(cls, days=None):
+        """
+        Replace the tallies with counts taken from the Vote table.
+
+        Days archived by ``compact_votes`` are skipped.
+
+        Args:
+            days (iterable): Vote dates to rebuild. All dates are rebuilt when omitted.
+
+        Returns:
+            int: Number of tally rows written.
+        """
+        # Archived days have no raw votes left; their tallies are the record.
+        archived = ArchivedVoteDay.objects.values('day')
+        tallies = cls.objects.exclude(vote_date__in=archived)
+        votes = Vote.objects.exclude(vote_date__in=archived)
+        if days is not None:
+            days = list(days)
+            tallies = tallies.filter(vote_date__in=days)
+            votes = votes.filter(vote_date__in=days)
+        counts = votes.values('menu', 'vote_date').annotate(total=models.Count('id')).order_by()
+        with transaction.atomic():
+            tallies.delete()
+            created = cls.objects.bulk_create(
+                cls(menu_id=row['menu'], vote_date=row['vote_date'], count=row['total'])
+                for row in counts.iterator()
+            )
+        return len(created)
+
+
+class RestaurantRollup(models.Model):
+    """
+    Precomputed statistics of a restaurant over a day, ISO week or month.
+
+    Filled by ``rollup_restaurant_stats`` for closed days, so analytics never
+    aggregate the Vote table while people are voting.
+
+    Fields:
+        restaurant (Restaurant): Described restaurant.
+        period (str): 'day', 'week' or 'month'.
+        period_start (date): The day, the Monday of the week or the first of the month.
+        menus (int): Menus the restaurant served in the period.
+        votes (int): Votes for those menus.
+        wins (int): Days on which one of its menus got the most votes.
+        voters (int): Distinct users who voted for its menus.
+        voter_ids (list): Ids of those users, on daily rows only. Weeks and months
+            count the union of their days', so they stay exact once the raw votes
+            are compacted.
+        employees (int): Employees (EmployeeProfile rows) when the period was rolled up.
+
+    Meta:
+        unique_together (tuple): One row per restaurant, period and start.
+
+    Methods:
+        average_votes: Votes per menu served.
+        participation_rate: Share of employees who voted for the restaurant.
+    """
+    PERIODS = [('day', 'Day'), ('week', 'Week'), ('month', 'Month')]
+
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE)
+    period = models.CharField(max_length=5, choices=PERIODS)
+    period_start = models.DateField()
+    menus = models.PositiveIntegerField(default=0)
+    votes = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)
+    voters = models.PositiveIntegerField(default=0)
+    voter_ids = models.JSONField(default=list, editable=False)
+    employees = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('restaurant', 'period', 'period_start')
+        indexes = [models.Index(fields=['period', 'period_start'], name='menu_rollup_period_idx')]
+
+    def __str__(self):
+        return f"{self.restaurant_id} {self.period} of {self.period_start}."
+
+    @property
+    def average_votes(self):
+        return self.votes / self.menus if self.menus else 0.0
+
+    @property
+    def participation_rate(self):
+        return self.voters / self.employees if self.employees else 0.0
+
+
+class RolledUpDay(models.Model):
+    """
+    Marks a menu date whose RestaurantRollup rows are complete.
+
+    Fields:
+        day (date): The rolled up date.
+    """
+    day = models.DateField(unique=True)
+
+    def __str__(self):
+        return str(self.day)
+
+
+class ArchivedVoteDay(models.Model):
+    """
+    A vote date whose raw Vote rows were compacted into VoteTally and removed.
+
+    Fields:
+        day (date): The compacted vote date.
+        votes (int): Number of Vote rows the day had.
+        archived_at (datetime): When the day was compacted.
+    """
+    day = models.DateField(unique=True)
+    votes = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.votes} votes on {self.day}."
@@ -0,0 +1,114 @@
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the primary key.
+
+    Pages are fetched with ``WHERE id > <cursor>`` instead of an OFFSET, so every
+    page costs the same no matter how deep the client has scrolled.
+
+    Query params:
+        cursor (str): Opaque cursor from the previous page's ``next`` link.
+        page_size (int): Number of rows per page, up to ``max_page_size``.
+    """
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+def is_paginated(request):
+    """
+    Whether the client asked for a paginated response.
+
+    Unpaginated requests keep returning a plain list for existing clients.
+    """
+    params = request.GET
+    return 'cursor' in params or IdCursorPagination.page_size_query_param in params
+
+
+def is_streamed(request):
+    """
+    Whether the client asked for a streamed response (``?stream=1``).
+    """
+    return request.GET.get('stream') in ('1', 'true')
+
+
+def paginated_response(request, queryset, serializer_class):
+    """
+    Serialize one keyset page of the queryset.
+
+    Args:
+        request: DRF request object.
+        queryset (QuerySet): Rows to paginate.
+        serializer_class (type): Serializer for a single row.
+
+    Returns:
+        Response: ``{"next": ..., "previous": ..., "results": [...]}``.
+    """
+    paginator = IdCursorPagination()
+    page = paginator.paginate_queryset(queryset, request)
+    serializer = serializer_class(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
+def _encode_chunk(chunk, serializer_class, first):
+    encoder = JSONEncoder()
+    items = [encoder.encode(item) for item in serializer_class(chunk, many=True).data]
+    return ('' if first else ',') + ','.join(items)
+
+
+def streamed_response(queryset, serializer_class, chunk_size=500):
+    """
+    Stream the queryset as one JSON array.
+
+    Rows are read with ``.iterator()`` and serialized ``chunk_size`` at a time, so
+    memory use stays flat however large the table is.
+
+    Args:
+        queryset (QuerySet): Rows to stream.
+        serializer_class (type): Serializer for a single row.
+        chunk_size (int): Rows fetched and serialized per step.
+
+    Returns:
+        StreamingHttpResponse: JSON array response.
+    """
+    def chunks():
+        rows = queryset.order_by('id').iterator(chunk_size=chunk_size)
+        yield '['
+        first = True
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            yield _encode_chunk(chunk, serializer_class, first)
+            first = False
+        yield ']'
+
+    return StreamingHttpResponse(chunks(), content_type='application/json')
+
+
+def async_streamed_response(queryset, serializer_class, chunk_size=500):
+    """
+    Async variant of ``streamed_response`` for async views, reading with ``.aiterator()``.
+    """
+    async def chunks():
+        yield '['
+        first = True
+        chunk = []
+        async for row in queryset.order_by('id').aiterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield _encode_chunk(chunk, serializer_class, first)
+                first = False
+                chunk = []
+        if chunk:
+            yield _encode_chunk(chunk, serializer_class, first)
+        yield ']'
+
+    return StreamingHttpResponse(chunks(), content_type='application/json')
@@ -1,4 +1,6 @@
+from django.conf import settings
 from rest_framework import permissions
+from rest_framework_simplejwt.models import TokenUser
 
 from menu.models import EmployeeProfile
 
@@ -6,13 +8,20 @@ from menu.models import EmployeeProfile
 class CanVotePermission(permissions.BasePermission):
     def has_permission(self, request, view):
         user = request.user
-        try:
-            return user.employee_profile is not None
-        except EmployeeProfile.DoesNotExist:
-            return False
+        if isinstance(user, TokenUser) and 'employee' in user.token:
+            return bool(user.token['employee'])
+        return EmployeeProfile.objects.filter(user_id=user.id).exists()
 
 
 class APIVersionPermission(permissions.BasePermission):
     def has_permission(self, request, view):
         version = request.META.get('HTTP_API_VERSION', 'latest')
         return version in ['latest']
+
+
+class MetricsScraperPermission(permissions.BasePermission):
+    """
+    Allows requests from the addresses in ``settings.METRICS_ALLOWED_IPS``.
+    """
+    def has_permission(self, request, view):
+        return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
@@ -0,0 +1,131 @@
+"""
+Bulk creation of user accounts, used by ``register/bulk`` and ``manage.py provision_users``.
+
+Rows are validated with ProvisionUserSerializer. Usernames already taken are
+found with one query and skipped, so a list can be submitted again after a
+failure. Passwords are hashed in a thread pool: PBKDF2 runs in hashlib with the
+GIL released, so hashing, which dominates the cost, scales with
+``settings.PROVISION_HASH_WORKERS`` cores. ``register/bulk`` hashes on the
+bounded login pool instead, shared by all requests of the worker. Users and then the EmployeeProfile
+rows of employees are saved with ``bulk_create`` in one transaction.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from rest_framework import serializers
+
+from .models import EmployeeProfile
+from .serializers import ProvisionUserSerializer
+
+
+class ProvisionReport:
+    """
+    Outcome of a provisioning run.
+
+    Attributes:
+        rows (list): One dict per input row: ``row``, ``username``, ``status``
+            ('created', 'exists', 'duplicate' or 'rejected'), plus ``id`` of
+            created users and ``errors`` of rejected rows.
+        seconds (dict): Time spent validating, looking up existing usernames,
+            hashing, writing, and in total.
+    """
+    def __init__(self):
+        self.rows = []
+        self.seconds = {}
+
+    def add(self, number, username, outcome, **details):
+        self.rows.append({'row': number, 'username': username, 'status': outcome, **details})
+
+    def count(self, outcome):
+        return sum(1 for row in self.rows if row['status'] == outcome)
+
+    def as_dict(self):
+        self.rows.sort(key=lambda row: row['row'])
+        return {
+            **{outcome: self.count(outcome) for outcome in ('created', 'exists', 'duplicate', 'rejected')},
+            'seconds': self.seconds,
+            'rows': self.rows,
+        }
+
+
+def provision_users(rows, batch_size=None, workers=None, executor=None):
+    """
+    Create the users of a list in bulk.
+
+    Args:
+        rows (iterable): ``(row number, row)`` pairs, as yielded by ``menu.importer.read_rows``.
+        batch_size (int): Rows per INSERT. Defaults to ``settings.BULK_CREATE_BATCH_SIZE``.
+        workers (int): Hashing threads. Defaults to ``settings.PROVISION_HASH_WORKERS``.
+        executor (Executor): Existing pool to hash on instead of starting one.
+
+    Returns:
+        ProvisionReport: The outcome of every row and the time of each step.
+
+    Raises:
+        IntegrityError: A username was taken concurrently; nothing was saved.
+    """
+    report = ProvisionReport()
+    clock = start = time.perf_counter()
+
+    def lap(step):
+        nonlocal clock
+        now = time.perf_counter()
+        report.seconds[step] = now - clock
+        clock = now
+
+    serializer = ProvisionUserSerializer()
+    accepted = {}
+    for number, row in rows:
+        if not isinstance(row, dict):
+            report.add(number, None, 'rejected', errors={'non_field_errors': ['Not a JSON object.']})
+            continue
+        try:
+            attrs = serializer.run_validation(row)
+        except serializers.ValidationError as exc:
+            report.add(number, row.get('username'), 'rejected', errors=exc.detail)
+            continue
+        if attrs['username'] in accepted:
+            report.add(number, attrs['username'], 'duplicate')
+        else:
+            accepted[attrs['username']] = (number, attrs)
+    lap('validate')
+
+    existing = set(User.objects.filter(username__in=accepted).values_list('username', flat=True))
+    new = []
+    for username, (number, attrs) in accepted.items():
+        if username in existing:
+            report.add(number, username, 'exists')
+        else:
+            new.append((number, attrs))
+    lap('lookup')
+
+    passwords = [attrs['password'] for _, attrs in new]
+    if executor is not None:
+        hashes = list(executor.map(make_password, passwords))
+    else:
+        with ThreadPoolExecutor(max_workers=workers or settings.PROVISION_HASH_WORKERS) as pool:
+            hashes = list(pool.map(make_password, passwords))
+    lap('hash')
+
+    users = [User(username=attrs['username'], password=password) for (_, attrs), password in zip(new, hashes)]
+    batch_size = batch_size or settings.BULK_CREATE_BATCH_SIZE
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=batch_size)
+        if not connection.features.can_return_rows_from_bulk_insert:
+            ids = dict(User.objects.filter(username__in=[user.username for user in users])
+                       .values_list('username', 'id'))
+            for user in users:
+                user.pk = ids[user.username]
+        EmployeeProfile.objects.bulk_create(
+            [EmployeeProfile(user=user) for user, (_, attrs) in zip(users, new) if attrs['user_type'] == 'employee'],
+            batch_size=batch_size,
+        )
+    for user, (number, _) in zip(users, new):
+        report.add(number, user.username, 'created', id=user.pk)
+    lap('write')
+    report.seconds['total'] = time.perf_counter() - start
+    return report
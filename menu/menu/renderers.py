@@ -0,0 +1,79 @@
+"""
+Response renderers registered in ``REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']``.
+
+Clients pick one with the ``Accept`` header: ``application/json`` (the default)
+or ``application/msgpack``. Both are optional accelerations: without orjson the
+JSON renderer falls back to DRF's encoder, and the MessagePack renderer is only
+registered when msgpack is installed.
+"""
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Converts what the fast encoders cannot (Decimal, QuerySet, lazy strings, ...) the way DRF does.
+_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson.
+
+    Indented output (``Accept: application/json; indent=4`` and the browsable API)
+    still goes through DRF's encoder.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=_encoder.default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders responses as MessagePack. Values it has no type for (dates, decimals)
+    are converted as in JSON.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
+
+
+def negotiate(request):
+    """
+    Pick a renderer of ``DEFAULT_RENDERER_CLASSES`` for a plain Django request, as a DRF view would.
+
+    HTML renderers are left out: the browsable API renders DRF views only.
+
+    Returns:
+        tuple: The renderer and the accepted media type.
+
+    Raises:
+        NotAcceptable: No renderer matches the ``Accept`` header.
+    """
+    renderers = [renderer() for renderer in api_settings.DEFAULT_RENDERER_CLASSES
+                 if renderer.media_type != 'text/html']
+    return DefaultContentNegotiation().select_renderer(Request(request), renderers)
+
+
+def content_type(renderer, media_type):
+    """
+    ``Content-Type`` header of a body rendered by ``renderer``, as DRF's Response sets it.
+    """
+    return media_type if renderer.charset is None else f'{media_type}; charset={renderer.charset}'
@@ -0,0 +1,205 @@
+"""
+Read replicas for the GET endpoints.
+
+Views marked with ``replica_reads`` run their queries on one of the aliases in
+``settings.DATABASE_REPLICAS``; everything else, and every write, stays on
+``default``. ReplicaMiddleware marks the request and, after a successful write,
+keeps the client on the primary for ``settings.REPLICA_STICKY_SECONDS`` so it
+reads its own writes despite replication lag: with a cookie for browsers, and by
+user id in the cache for authenticated clients, whose bearer token identifies
+them without a query. Code that fills a shared cache reads inside
+``primary_reads`` instead, so a lagging replica cannot cache stale rows for
+everyone. A replica that fails its health check is skipped for
+``settings.REPLICA_HEALTH_CHECK_SECONDS``; with no healthy replica reads fall back
+to the primary.
+
+Queries made while a streamed response is consumed (``stream=1``) run after the
+view returned and go to the primary.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+STICKY_COOKIE = 'primary_db'
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_reads(view):
+    """
+    Mark a read-only view whose queries may run on a replica.
+    """
+    view.replica_reads = True
+    return view
+
+
+@contextmanager
+def primary_reads():
+    """
+    Run the queries of the block on the primary, also inside a ``replica_reads`` view.
+    """
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def _sticky_key(user_id):
+    return f'replica_sticky:{user_id}'
+
+
+def _token_user_id(request):
+    """
+    Return the user id of the request's bearer token, checked without a query, or None.
+    """
+    authentication = JWTStatelessUserAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    try:
+        raw_token = authentication.get_raw_token(header)
+        if raw_token is None:
+            return None
+        return authentication.get_validated_token(raw_token).get(jwt_settings.USER_ID_CLAIM)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+
+
+def is_sticky(request):
+    """
+    Whether the client wrote within ``settings.REPLICA_STICKY_SECONDS`` and must read from the primary.
+    """
+    if STICKY_COOKIE in request.COOKIES:
+        return True
+    user_id = _token_user_id(request)
+    return user_id is not None and cache.get(_sticky_key(user_id)) is not None
+
+
+class ReplicaHealth:
+    """
+    Remembers for each replica whether it answered a ``SELECT 1``, for a while.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = {}
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        with self._lock:
+            healthy, checked_at = self._checked.get(alias, (True, None))
+        if checked_at is not None and now - checked_at < settings.REPLICA_HEALTH_CHECK_SECONDS:
+            return healthy
+        healthy = self._ping(alias)
+        with self._lock:
+            self._checked[alias] = (healthy, now)
+        return healthy
+
+    def reset(self):
+        with self._lock:
+            self._checked.clear()
+
+    @staticmethod
+    def _ping(alias):
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except DatabaseError:
+            connections[alias].close()
+            return False
+        return True
+
+
+health = ReplicaHealth()
+
+
+def replica_alias():
+    """
+    Pick a healthy replica, or None when there is none.
+    """
+    replicas = [alias for alias in settings.DATABASE_REPLICAS if health.is_healthy(alias)]
+    return random.choice(replicas) if replicas else None
+
+
+class ReplicaRouter:
+    """
+    Send the reads of replica views to a replica and all other queries to the primary.
+    """
+    def db_for_read(self, model, **hints):
+        if _use_replica.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+
+class ReplicaMiddleware:
+    """
+    Route the queries of ``replica_reads`` views to replicas unless the client just wrote.
+
+    Works in sync and async chains. Under ASGI Django runs ``process_view`` in a
+    thread and copies the context variable it sets back to the request's task.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_replica.set(False)
+        if self._wrote(request, response):
+            self._stick(request, response)
+        return response
+
+    async def __acall__(self, request):
+        try:
+            response = await self.get_response(request)
+        finally:
+            _use_replica.set(False)
+        if self._wrote(request, response):
+            await sync_to_async(self._stick)(request, response)
+        return response
+
+    @staticmethod
+    def _wrote(request, response):
+        return (bool(settings.DATABASE_REPLICAS) and request.method not in ('GET', 'HEAD', 'OPTIONS')
+                and response.status_code < 400)
+
+    @staticmethod
+    def _stick(request, response):
+        response.set_cookie(STICKY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                            httponly=True, samesite='Lax')
+        # DRF views leave the user they authenticated on the request.
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            cache.set(_sticky_key(user.id), True, settings.REPLICA_STICKY_SECONDS)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (settings.DATABASE_REPLICAS and getattr(view_func, 'replica_reads', False)
+                and not is_sticky(request)):
+            _use_replica.set(True)
@@ -0,0 +1,140 @@
+"""
+Incremental restaurant statistics for the analytics endpoints.
+
+``rollup_pending_days`` finds closed menu dates (before today) that have no
+RolledUpDay marker yet, writes their daily RestaurantRollup rows, recomputes the
+weeks and months those days belong to from their daily rows, and marks the days
+as done. Each run only reads the votes of the new days; weeks and months need no
+raw votes, so compacting the votes of a day does not change them.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import EmployeeProfile, Menu, RestaurantRollup, RolledUpDay, Vote, VoteTally
+
+# Days rolled up per transaction.
+CHUNK_DAYS = 31
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def period_bounds(period, start):
+    """
+    Return the first and last day of a 'week' or 'month' period.
+    """
+    if period == 'week':
+        return start, start + timedelta(days=6)
+    next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start, next_month - timedelta(days=1)
+
+
+def pending_days(today=None):
+    """
+    Return the closed menu dates that were not rolled up yet, oldest first.
+    """
+    today = today or date.today()
+    return list(
+        Menu.objects
+        .filter(menu_date__lt=today)
+        .exclude(menu_date__in=RolledUpDay.objects.values('day'))
+        .values_list('menu_date', flat=True)
+        .distinct()
+        .order_by('menu_date')
+    )
+
+
+def _daily_rows(days, employees):
+    rows = {}
+
+    def row(day, restaurant):
+        key = (day, restaurant)
+        if key not in rows:
+            rows[key] = RestaurantRollup(restaurant_id=restaurant, period='day', period_start=day,
+                                         employees=employees)
+        return rows[key]
+
+    menus = Menu.objects.filter(menu_date__in=days)
+    for item in menus.values('menu_date', 'restaurant').annotate(total=Count('id')).order_by():
+        row(item['menu_date'], item['restaurant']).menus = item['total']
+
+    tallies = VoteTally.objects.filter(menu__menu_date__in=days)
+    leaders = {}
+    for item in (tallies.values('menu__menu_date', 'menu__restaurant', 'menu')
+                 .annotate(vote_count=Sum('count')).order_by('menu__menu_date', *VoteTally.RANKING)):
+        day, restaurant = item['menu__menu_date'], item['menu__restaurant']
+        row(day, restaurant).votes += item['vote_count']
+        if day not in leaders and item['vote_count']:
+            leaders[day] = restaurant
+    for day, restaurant in leaders.items():
+        row(day, restaurant).wins = 1
+
+    votes = Vote.objects.filter(menu__menu_date__in=days)
+    for day, restaurant, user in (votes.values_list('menu__menu_date', 'menu__restaurant', 'user')
+                                  .distinct().order_by('user')):
+        row(day, restaurant).voter_ids.append(user)
+    for item in rows.values():
+        item.voters = len(item.voter_ids)
+    return list(rows.values())
+
+
+def _period_rows(period, start, employees):
+    first_day, last_day = period_bounds(period, start)
+    rows, voters = {}, defaultdict(set)
+    daily = RestaurantRollup.objects.filter(period='day', period_start__range=(first_day, last_day))
+    for restaurant, menus, votes, wins, voter_ids in daily.values_list(
+            'restaurant', 'menus', 'votes', 'wins', 'voter_ids'):
+        row = rows.get(restaurant)
+        if row is None:
+            row = rows[restaurant] = RestaurantRollup(restaurant_id=restaurant, period=period, period_start=start,
+                                                      employees=employees)
+        row.menus += menus
+        row.votes += votes
+        row.wins += wins
+        voters[restaurant].update(voter_ids)
+    for restaurant, row in rows.items():
+        row.voters = len(voters[restaurant])
+    return list(rows.values())
+
+
+def rollup_days(days):
+    """
+    Write the daily, weekly and monthly rows for the given days and mark them done.
+
+    Args:
+        days (list): Dates to roll up.
+    """
+    employees = EmployeeProfile.objects.count()
+    periods = defaultdict(set)
+    for day in days:
+        periods['week'].add(week_start(day))
+        periods['month'].add(month_start(day))
+    with transaction.atomic():
+        RestaurantRollup.objects.filter(period='day', period_start__in=days).delete()
+        RestaurantRollup.objects.bulk_create(_daily_rows(days, employees))
+        RolledUpDay.objects.bulk_create([RolledUpDay(day=day) for day in days], ignore_conflicts=True)
+        for period, starts in periods.items():
+            for start in starts:
+                RestaurantRollup.objects.filter(period=period, period_start=start).delete()
+                RestaurantRollup.objects.bulk_create(_period_rows(period, start, employees))
+
+
+def rollup_pending_days(today=None):
+    """
+    Roll up every closed day that was not rolled up yet.
+
+    Returns:
+        list: The days that were rolled up.
+    """
+    days = pending_days(today)
+    for i in range(0, len(days), CHUNK_DAYS):
+        rollup_days(days[i:i + CHUNK_DAYS])
+    return days
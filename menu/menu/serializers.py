@@ -1,11 +1,155 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import models
 from datetime import date
 
-from .models import Restaurant, Menu, Vote, EmployeeProfile
+from .metrics import timed
+from .models import Restaurant, Menu, MenuDish, Vote, EmployeeProfile, RestaurantRollup
 
 
-class UserSerializer(serializers.ModelSerializer):
+class TimedData:
+    """
+    Serializer mixin counting ``.data`` as serialization time in the request metrics.
+    """
+    @property
+    def data(self):
+        with timed('serialize_time'):
+            return super().data
+
+
+class TimedListSerializer(TimedData, serializers.ListSerializer):
+    """
+    ListSerializer counting ``.data`` as serialization time in the request metrics.
+    """
+
+
+class BulkCreateListSerializer(TimedListSerializer):
+    """
+    List serializer that saves all items with ``bulk_create``.
+
+    Items are inserted in batches of ``settings.BULK_CREATE_BATCH_SIZE`` inside one
+    transaction, so either every item is saved or none is.
+    """
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        return model.objects.bulk_create(
+            [model(**attrs) for attrs in validated_data],
+            batch_size=settings.BULK_CREATE_BATCH_SIZE,
+        )
+
+
+def _value_columns(serializer_class, names, prefix=''):
+    """
+    ``(name, column, converter)`` of serializer fields that are plain model fields.
+    """
+    opts = serializer_class.Meta.model._meta
+    for name in names:
+        field = opts.get_field(name)
+        convert = None
+        if isinstance(field, models.DateTimeField):
+            convert = serializers.DateTimeField().to_representation
+        elif isinstance(field, models.DateField):
+            convert = date.isoformat
+        elif isinstance(field, models.DecimalField):
+            convert = serializers.DecimalField(field.max_digits, field.decimal_places).to_representation
+        yield name, prefix + field.attname, convert
+
+
+def _values_plan(serializer_class, fields=None, expand=()):
+    """
+    Columns to select and a function turning one ``values_list`` tuple into an output row.
+    """
+    names = [name for name in serializer_class().fields if fields is None or name in fields]
+    columns, converters = [], {}
+    for name, column, convert in _value_columns(serializer_class, names):
+        columns.append(column)
+        if convert is not None:
+            converters[name] = convert
+    # Expanded relations are read through the join and replace the foreign key value.
+    nested = {}
+    for name in expand:
+        if name not in names:
+            continue
+        related = serializer_class.expandable_fields[name]
+        nested[name] = []
+        for nested_name, column, convert in _value_columns(related, list(related().fields), f'{name}__'):
+            nested[name].append((nested_name, len(columns), convert))
+            columns.append(column)
+
+    def make_row(values):
+        row = dict(zip(names, values))
+        for name, convert in converters.items():
+            if row[name] is not None:
+                row[name] = convert(row[name])
+        for name, items in nested.items():
+            row[name] = {
+                nested_name: values[index] if convert is None or values[index] is None else convert(values[index])
+                for nested_name, index, convert in items
+            }
+        return row
+
+    return columns, make_row
+
+
+def values_rows(queryset, serializer_class, fields=None, expand=()):
+    """
+    Build the output of a ModelSerializer for a read-only list straight from ``values_list``.
+
+    Skips instantiating models and running each serializer field, for serializers
+    whose fields are plain model fields (foreign keys as primary keys). Gives the
+    same rows as ``serializer_class(queryset, many=True, fields=fields, expand=expand).data``.
+
+    Args:
+        queryset (QuerySet): Rows to serialize.
+        serializer_class (type): ModelSerializer defining the fields and their order.
+        fields (list): Names of the fields to include, all when None. Only their columns are selected.
+        expand (list): Foreign keys from ``serializer_class.expandable_fields`` to inline, through a join.
+
+    Returns:
+        list: One dict per row.
+    """
+    columns, make_row = _values_plan(serializer_class, fields, expand)
+    with timed('serialize_time'):
+        return [make_row(values) for values in queryset.values_list(*columns)]
+
+
+async def avalues_rows(queryset, serializer_class, fields=None, expand=()):
+    """
+    Async variant of ``values_rows``.
+    """
+    columns, make_row = _values_plan(serializer_class, fields, expand)
+    with timed('serialize_time'):
+        return [make_row(values) async for values in queryset.values_list(*columns)]
+
+
+def sparse_queryset(queryset, serializer_class, fields=None, expand=()):
+    """
+    Narrow a queryset to the columns a sparse serializer reads.
+
+    Args:
+        queryset (QuerySet): Rows to serialize.
+        serializer_class (type): ModelSerializer the rows are serialized with.
+        fields (list): Names of the included fields, all when None.
+        expand (list): Expanded foreign keys, loaded with ``select_related``.
+
+    Returns:
+        QuerySet: The narrowed queryset.
+    """
+    expand = [name for name in expand if fields is None or name in fields]
+    if expand:
+        queryset = queryset.select_related(*expand)
+    if fields is None:
+        return queryset
+    columns = list(fields)
+    for name in expand:
+        related = serializer_class.expandable_fields[name]
+        columns += [f'{name}__{related_name}' for related_name in related().fields]
+    return queryset.only(*columns)
+
+
+class UserSerializer(TimedData, serializers.ModelSerializer):
     """
     Serializer for the User model.
 
@@ -15,9 +159,10 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = '__all__'
+        list_serializer_class = TimedListSerializer
 
 
-class EmployeeProfileSerializer(serializers.ModelSerializer):
+class EmployeeProfileSerializer(TimedData, serializers.ModelSerializer):
     """
     Serializer for the EmployeeProfile model.
 
@@ -27,9 +172,10 @@ class EmployeeProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = EmployeeProfile
         fields = '__all__'
+        list_serializer_class = TimedListSerializer
 
 
-class RestaurantSerializer(serializers.ModelSerializer):
+class RestaurantSerializer(TimedData, serializers.ModelSerializer):
     """
     Serializer for the Restaurant model.
 
@@ -40,10 +186,48 @@ class RestaurantSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = Restaurant
-        fields = '__all__'
+        exclude = ['change_seq']
+        list_serializer_class = BulkCreateListSerializer
+
+
+class RestaurantRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Restaurant primary key field that can resolve from preloaded restaurants.
+
+    When ``context['restaurants']`` holds a ``{pk: Restaurant}`` map, lookups are
+    served from it instead of querying once per value.
+    """
+    def to_internal_value(self, data):
+        restaurants = self.context.get('restaurants')
+        if restaurants is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return restaurants[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
 
 
-class MenuSerializer(serializers.ModelSerializer):
+class MenuListSerializer(BulkCreateListSerializer):
+    """
+    List serializer for menus that loads all referenced restaurants in one query.
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, list) and 'restaurants' not in self.context:
+            pks = set()
+            for item in data:
+                try:
+                    pks.add(int(item['restaurant']))
+                except (KeyError, TypeError, ValueError):
+                    pass
+            self.context['restaurants'] = Restaurant.objects.in_bulk(pks)
+        return super().to_internal_value(data)
+
+
+class MenuSerializer(TimedData, serializers.ModelSerializer):
     """
     Serializer for the Menu model.
 
@@ -52,14 +236,31 @@ class MenuSerializer(serializers.ModelSerializer):
     Attributes:
         Meta (class): Configuration class for the serializer.
 
+    Args:
+        fields (list): Names of the fields to serialize, all when None.
+        expand (list): Foreign keys from ``expandable_fields`` to serialize as nested objects.
+
     Methods:
         validate_menu_date(value): Validates that the menu date is not in the past.
     """
-    restaurant = serializers.PrimaryKeyRelatedField(queryset=Restaurant.objects.all())
+    restaurant = RestaurantRelatedField(queryset=Restaurant.objects.all())
+
+    # Foreign keys that ``expand`` can inline, with the serializer for the related row.
+    expandable_fields = {'restaurant': RestaurantSerializer}
 
     class Meta:
         model = Menu
-        fields = '__all__'
+        exclude = ['change_seq']
+        list_serializer_class = MenuListSerializer
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in expand:
+            if name in self.fields:
+                self.fields[name] = self.expandable_fields[name](read_only=True)
 
     def validate_menu_date(self, value):
         if value < date.today():
@@ -67,7 +268,7 @@ class MenuSerializer(serializers.ModelSerializer):
         return value
 
 
-class VoteSerializer(serializers.ModelSerializer):
+class VoteSerializer(TimedData, serializers.ModelSerializer):
     """
     Serializer for the Vote model.
 
@@ -82,3 +283,205 @@ class VoteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Vote
         fields = '__all__'
+        list_serializer_class = TimedListSerializer
+
+
+class VoteCreateSerializer(serializers.Serializer):
+    """
+    Input of the vote endpoint.
+
+    Only checks the shape of the payload. The voting user comes from the request,
+    and the menu's existence and the one-vote-per-day rule are left to the
+    database constraints, so validation runs no queries.
+
+    Fields:
+        menu (int): Primary key of the voted menu.
+        vote_date (date): The date of the vote. Defaults to the current date.
+    """
+    menu = serializers.IntegerField(min_value=1)
+    vote_date = serializers.DateField(required=False)
+
+
+class MenuDishSerializer(TimedData, serializers.ModelSerializer):
+    """
+    Serializer for dish search results.
+
+    Attributes:
+        Meta (class): Configuration class for the serializer.
+    """
+    class Meta:
+        model = MenuDish
+        fields = ['id', 'menu', 'menu_date', 'dish', 'price']
+        list_serializer_class = TimedListSerializer
+
+
+class DishSearchSerializer(serializers.Serializer):
+    """
+    Query parameters of the dish search endpoint.
+
+    Fields:
+        dish (str): Case-insensitive prefix of the dish name.
+        max_price (Decimal): Highest price to include.
+        date_from (date): First menu date to include.
+        date_to (date): Last menu date to include.
+    """
+    dish = serializers.CharField(required=False, max_length=200)
+    max_price = serializers.DecimalField(required=False, max_digits=10, decimal_places=2)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+
+class DateRangeSerializer(serializers.Serializer):
+    """
+    ``from``/``to`` query parameters of the range endpoints.
+
+    Fields:
+        from (date): First day of the range.
+        to (date): Last day of the range, at most ``settings.DATE_RANGE_MAX_DAYS`` after ``from``.
+    """
+    def get_fields(self):
+        # "from" is a keyword, so the fields cannot be declared as attributes.
+        return {'from': serializers.DateField(), 'to': serializers.DateField()}
+
+    def validate(self, attrs):
+        if attrs['to'] < attrs['from']:
+            raise serializers.ValidationError("'to' cannot be before 'from'.")
+        if (attrs['to'] - attrs['from']).days >= settings.DATE_RANGE_MAX_DAYS:
+            raise serializers.ValidationError(f"The range cannot be longer than {settings.DATE_RANGE_MAX_DAYS} days.")
+        return attrs
+
+
+class MenuFieldsQuerySerializer(serializers.Serializer):
+    """
+    ``fields``/``expand`` query parameters of the menu list endpoints.
+
+    Fields:
+        fields (list): Comma-separated MenuSerializer fields to return. All when omitted.
+        expand (list): Comma-separated relations to inline; only ``restaurant``.
+    """
+    def get_fields(self):
+        # "fields" is a Serializer attribute, so the fields cannot be declared as attributes.
+        return {'fields': serializers.CharField(required=False), 'expand': serializers.CharField(required=False)}
+
+    @staticmethod
+    def _names(value, allowed):
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = sorted(set(names) - set(allowed))
+        if unknown:
+            raise serializers.ValidationError(f"Unknown fields: {', '.join(unknown)}.")
+        return names
+
+    def validate(self, attrs):
+        errors = {}
+        for name, allowed in (('fields', MenuSerializer().fields), ('expand', MenuSerializer.expandable_fields)):
+            if name in attrs:
+                try:
+                    attrs[name] = self._names(attrs[name], allowed)
+                except serializers.ValidationError as exc:
+                    errors[name] = exc.detail
+        if errors:
+            raise serializers.ValidationError(errors)
+        attrs.setdefault('fields', None)
+        attrs.setdefault('expand', [])
+        return attrs
+
+    def cache_variant(self):
+        """
+        Key part telling apart payloads with different fieldsets.
+        """
+        fields, expand = self.validated_data['fields'], self.validated_data['expand']
+        if fields is None and not expand:
+            return ''
+        return f"fields={','.join(sorted(fields or ['*']))};expand={','.join(sorted(expand))}"
+
+
+class DayQuerySerializer(serializers.Serializer):
+    """
+    ``day`` query parameter of the endpoints about one date.
+
+    Fields:
+        day (date): The date. Defaults to the current date.
+    """
+    day = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault('day', date.today())
+        return attrs
+
+
+class MenusForDateQuerySerializer(MenuFieldsQuerySerializer):
+    """
+    Query parameters of get_menus_for_date.
+
+    Fields:
+        day (date): Date of the menus. Defaults to the current date.
+        fields (list), expand (list): See MenuFieldsQuerySerializer.
+    """
+    def get_fields(self):
+        return {**super().get_fields(), 'day': serializers.DateField(required=False)}
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        attrs.setdefault('day', date.today())
+        return attrs
+
+
+class ChangesQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the change feed.
+
+    Fields:
+        since (int): Cursor returned by the previous call, 0 for a full sync.
+        limit (int): Most rows returned, at most 1000. Defaults to ``settings.CHANGES_PAGE_SIZE``.
+    """
+    since = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=settings.CHANGES_PAGE_SIZE)
+
+
+class ProvisionUserSerializer(serializers.Serializer):
+    """
+    One account of a bulk provisioning request.
+
+    Fields:
+        username (str): Login name, with the characters User accepts.
+        password (str): Plain password, hashed before it is saved.
+        user_type (str): 'employee' (default, can vote) or 'basic'.
+    """
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    password = serializers.CharField(trim_whitespace=False)
+    user_type = serializers.ChoiceField(choices=['employee', 'basic'], default='employee')
+
+    def validate_username(self, value):
+        return User.normalize_username(value)
+
+
+class RestaurantStatsQuerySerializer(DateRangeSerializer):
+    """
+    Query parameters of the restaurant analytics endpoint.
+
+    Fields:
+        period (str): 'day', 'week' or 'month'. Defaults to 'month'.
+        from (date), to (date): Range of period start dates, see DateRangeSerializer.
+    """
+    def get_fields(self):
+        fields = super().get_fields()
+        fields['period'] = serializers.ChoiceField(choices=RestaurantRollup.PERIODS, default='month')
+        return fields
+
+
+class RestaurantRollupSerializer(TimedData, serializers.ModelSerializer):
+    """
+    Serializer for RestaurantRollup rows, with the derived rates.
+
+    Attributes:
+        Meta (class): Configuration class for the serializer.
+    """
+    restaurant_name = serializers.CharField(source='restaurant.name', read_only=True)
+    average_votes = serializers.FloatField(read_only=True)
+    participation_rate = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = RestaurantRollup
+        fields = ['restaurant', 'restaurant_name', 'period', 'period_start', 'menus', 'votes', 'wins',
+                  'voters', 'employees', 'average_votes', 'participation_rate']
+        list_serializer_class = TimedListSerializer
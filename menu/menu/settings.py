@@ -1,3 +1,5 @@
+import os
+from importlib.util import find_spec
 from pathlib import Path
 from dotenv import load_dotenv
 from datetime import timedelta
@@ -25,6 +27,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'menu.metrics.MetricsMiddleware',
+    'menu.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,6 +58,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'menu.wsgi.application'
 
+# Serve the read endpoints with the async views in menu.async_views. Meant for
+# ASGI deployments (see gunicorn.conf.py); under WSGI each call gets its own event loop.
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS') == '1'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql_psycopg2',
@@ -65,6 +73,104 @@ DATABASES = {
     }
 }
 
+# Read replicas for the GET endpoints, see menu.replicas. Each alias listed in
+# DATABASE_REPLICAS must be in DATABASES; REPLICA_DB_HOST adds a 'replica' alias.
+if os.environ.get('REPLICA_DB_HOST'):
+    DATABASES['replica'] = {**DATABASES['default'], 'HOST': os.environ['REPLICA_DB_HOST']}
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['menu.replicas.ReplicaRouter']
+# Seconds a client reads from the primary after a write, to cover replication lag.
+REPLICA_STICKY_SECONDS = 5
+# Seconds a replica's health check result is reused.
+REPLICA_HEALTH_CHECK_SECONDS = 10
+
+# Set CACHE_URL (e.g. redis://cache:6379/0) to share cached responses between workers.
+if os.environ.get('CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Share of requests MetricsMiddleware records, from 0 (off) to 1 (every request).
+METRICS_SAMPLE_RATE = 1.0
+# Addresses that may scrape /metrics without credentials, e.g. METRICS_ALLOWED_IPS=10.0.0.5,10.0.0.6.
+# Staff users can always read it.
+METRICS_ALLOWED_IPS = [ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip]
+
+# Live results (menu/result_stream). Use 'menu.events.CacheResultsBroadcaster' with a
+# shared CACHE_URL when running more than one worker process (gunicorn.conf.py
+# refuses to start several workers with the local one).
+RESULTS_BROADCASTER = os.environ.get('RESULTS_BROADCASTER', 'menu.events.LocalResultsBroadcaster')
+# Seconds between checks for new votes; bursts of votes coalesce into one event per check.
+RESULTS_PUSH_INTERVAL = 1.0
+# Seconds before a stream is closed and the client reconnects.
+RESULTS_STREAM_MAX_SECONDS = 300
+
+# Write-behind vote buffer, see menu.vote_buffer. Acknowledged votes not yet flushed
+# are lost if a worker dies: at most VOTE_BUFFER_FLUSH_INTERVAL seconds of them, and
+# never more than VOTE_BUFFER_MAX_PENDING per process. Use
+# 'menu.vote_buffer.CacheVoteStore' with a shared CACHE_URL when running more than
+# one worker process.
+VOTE_BUFFER_ENABLED = os.environ.get('VOTE_BUFFER') == '1'
+VOTE_BUFFER_STORE = os.environ.get('VOTE_BUFFER_STORE', 'menu.vote_buffer.LocalVoteStore')
+VOTE_BUFFER_FLUSH_INTERVAL = 0.5
+VOTE_BUFFER_BATCH_SIZE = 500
+VOTE_BUFFER_MAX_PENDING = 5000
+
+# Rows per changes response unless the client passes a smaller or larger limit.
+CHANGES_PAGE_SIZE = 500
+
+# Days of raw votes kept by `manage.py compact_votes`; older days keep only their tallies.
+VOTE_RETENTION_DAYS = 90
+
+# Longest from/to range the range endpoints accept, in days.
+DATE_RANGE_MAX_DAYS = 366
+
+# Largest list accepted by add_menu/add_restaurant, and rows per INSERT when saving it.
+BULK_CREATE_MAX_ITEMS = 1000
+BULK_CREATE_BATCH_SIZE = 200
+
+# Largest list accepted by register/bulk. Its passwords are hashed on the login pool
+# (LOGIN_HASH_WORKERS) and must finish within the gunicorn timeout; provision
+# larger lists with manage.py provision_users.
+PROVISION_MAX_USERS = 100
+# Threads hashing passwords in manage.py provision_users. PBKDF2 releases the
+# GIL, so hashing scales with cores.
+PROVISION_HASH_WORKERS = os.cpu_count() or 1
+
+# Seconds a get_menus_for_date response stays cached.
+MENU_CACHE_TIMEOUT = 300
+
+# Concurrent identical get_result_for_date/get_menus_for_date requests of a worker
+# share one computation (menu/coalescing.py). A TTL above zero also reuses a
+# finished result that many seconds, so results may lag votes by as much.
+READ_COALESCING = True
+READ_COALESCING_TTL = float(os.environ.get('READ_COALESCING_TTL', 0))
+
+# PBKDF2 rounds of new password hashes (Django's default for 4.2). Login
+# throughput is about inversely proportional, see benchmarks/login_storm.py.
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 600_000))
+
+PASSWORD_HASHERS = [
+    'menu.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Threads verifying login passwords. Logins beyond it queue, so a login storm
+# cannot take every core from the other requests.
+LOGIN_HASH_WORKERS = os.cpu_count() or 1
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -97,16 +203,24 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication',
         'rest_framework.authentication.BasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
+    # Picked by the Accept header, see menu.renderers.
+    'DEFAULT_RENDERER_CLASSES': [
+        'menu.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ] + (['menu.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
     'FORM_METHOD_OVERRIDE': None,
     'FORM_CONTENT_OVERRIDE': None,
     'FORM_CONTENTTYPE_OVERRIDE': None
 }
 
 
+# API requests authenticate from the token claims alone (see menu.tokens), so a
+# disabled user or a lost employee profile only takes effect when the access token
+# expires. Keep ACCESS_TOKEN_LIFETIME short; rotating SECRET_KEY revokes all tokens.
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -146,3 +260,6 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainSlidingSerializer",
     "SLIDING_TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSlidingSerializer",
 }
+
+# Number of rows each menu's daily vote count is spread over, see VoteTally.
+VOTE_TALLY_SHARDS = 8
@@ -0,0 +1,35 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import EmployeeProfile
+
+
+class EmployeeRefreshToken(RefreshToken):
+    """
+    Refresh token that carries the claims the API authorizes with.
+
+    Access tokens made from it copy the claims, so requests authenticated with
+    ``JWTStatelessUserAuthentication`` get a ``TokenUser`` without loading the
+    User or EmployeeProfile rows.
+
+    Claims:
+        username (str): The user's username.
+        is_staff (bool): Whether the user is staff.
+        employee (bool): Whether the user has an EmployeeProfile and may vote.
+
+    Claims are fixed when the token is issued, so changes to a user reach the API
+    once the access token expires (``SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']``).
+    """
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['username'] = user.get_username()
+        token['is_staff'] = user.is_staff
+        token['employee'] = _is_employee(user)
+        return token
+
+
+def _is_employee(user):
+    # Login loads the profile with select_related('employeeprofile'), see menu.login.
+    if type(user).employeeprofile.is_cached(user):
+        return hasattr(user, 'employeeprofile')
+    return EmployeeProfile.objects.filter(user_id=user.pk).exists()
@@ -1,25 +1,41 @@
-from django.contrib import admin
+from django.apps import apps
+from django.conf import settings
 from django.urls import path
 from .views import CombinedTokenObtainPairView
 
-from menu import views
+from menu import async_views, metrics, views
 
+read_views = async_views if settings.ASYNC_READ_VIEWS else views
 
-urlpatterns = [
-    path('admin/', admin.site.urls),
 
+urlpatterns = [
     path('register/', views.register_user, name='user_registration'),
+    path('register/bulk', views.register_users_bulk, name='user_bulk_registration'),
 
     path('api/token/', CombinedTokenObtainPairView.as_view(), name='token_obtain_pair'),
 
     path('restaurants/get_all_restaurants', views.get_restaurant_list),
     path('restaurants/add_restaurants', views.add_restaurant),
 
-    path('menu/get_all_menus', views.get_all_menus),
-    path('menu/get_menus_for_date', views.get_menus_for_date),
-    path('menu/get_result_for_date', views.get_result_for_date),
+    path('menu/get_all_menus', read_views.get_all_menus),
+    path('menu/get_menus_for_date', read_views.get_menus_for_date),
+    path('menu/get_result_for_date', read_views.get_result_for_date),
+    path('menu/result_stream', read_views.result_stream),
+    path('menu/get_results_for_range', views.get_results_for_range),
     path('menu/add_restaurants', views.add_restaurant),
     path('menu/add_menu', views.add_menu),
+    path('menu/search_dishes', views.search_dishes),
+
+    path('vote', views.vote),
 
-    path('vote', views.vote)
+    path('analytics/restaurants', views.get_restaurant_stats),
+
+    path('changes', views.get_changes),
+
+    path('metrics', metrics.metrics),
 ]
+
+# The API-only profile (menu.settings_api) leaves the admin out.
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+    urlpatterns.append(path('admin/', admin.site.urls))
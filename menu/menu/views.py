@@ -1,25 +1,40 @@
 from datetime import date
+from functools import partial
 
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, F
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from django.db import IntegrityError, transaction
 from django.contrib.auth.models import User
 
-from menu.models import Restaurant, Menu
-from menu.serializers import RestaurantSerializer, MenuSerializer, UserSerializer, EmployeeProfileSerializer, VoteSerializer
+from menu.models import Restaurant, Menu, MenuDish, Vote, VoteTally, RestaurantRollup
+from menu.serializers import RestaurantSerializer, MenuSerializer, UserSerializer, EmployeeProfileSerializer, VoteSerializer, VoteCreateSerializer, MenuDishSerializer, DishSearchSerializer, DateRangeSerializer, RestaurantStatsQuerySerializer, RestaurantRollupSerializer, MenuFieldsQuerySerializer, MenusForDateQuerySerializer, DayQuerySerializer, ChangesQuerySerializer, values_rows, sparse_queryset
 from .models import EmployeeProfile
+from .caching import cached_menus_for_date, conditional_response, invalidate_menus_for_date
+from .coalescing import coalesced_response
+from .events import publish_menu_results, publish_result, result_events
+from .login import authenticate, get_login_executor
+from .pagination import is_paginated, is_streamed, paginated_response, streamed_response
 from .permissions import CanVotePermission, APIVersionPermission
+from .provisioning import provision_users
+from .replicas import replica_reads
+from .tokens import EmployeeRefreshToken
+from .vote_buffer import VoteBufferFull, get_vote_buffer
 
 
+@replica_reads
 @api_view(['GET'])
 def get_restaurant_list(request):
     """
     Get a list of all restaurants.
 
+    Pass ``page_size``/``cursor`` for keyset pages or ``stream=1`` for a streamed list.
+
     Args:
         request: HTTP request object.
 
@@ -27,66 +42,104 @@ def get_restaurant_list(request):
         Response: JSON response with a list of all restaurants.
     """
     restaurants = Restaurant.objects.all()
-    serializer = RestaurantSerializer(restaurants, many=True)
-    return Response(serializer.data)
+    if is_streamed(request):
+        return streamed_response(restaurants, RestaurantSerializer)
+    if is_paginated(request):
+        return paginated_response(request, restaurants, RestaurantSerializer)
+    return Response(values_rows(restaurants, RestaurantSerializer))
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, APIVersionPermission])
 def add_restaurant(request):
     """
-    Add a new restaurant.
+    Add a new restaurant, or a list of restaurants in one request.
 
     Args:
         request: HTTP request object.
 
     Returns:
-        Response: Empty response.
+        Response: JSON response with the created data, or the validation errors
+        (one entry per item for lists).
     """
-    serializer = RestaurantSerializer(data=request.data)
-    if serializer.is_valid():
-        serializer.save()
-    return Response()
+    many = isinstance(request.data, list)
+    if many:
+        serializer = RestaurantSerializer(data=request.data, many=True, max_length=settings.BULK_CREATE_MAX_ITEMS)
+    else:
+        serializer = RestaurantSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    serializer.save()
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+@replica_reads
 @api_view(['GET'])
 def get_all_menus(request):
     """
     Get a list of all menus.
 
+    Pass ``page_size``/``cursor`` for keyset pages or ``stream=1`` for a streamed list,
+    ``fields=id,name,restaurant`` to return (and select) only some fields and
+    ``expand=restaurant`` to inline the restaurants.
+
     Args:
         request: HTTP request object.
 
     Returns:
         Response: JSON response with a list of all menus.
     """
+    query = MenuFieldsQuerySerializer(data=request.query_params)
+    if not query.is_valid():
+        return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+    fields, expand = query.validated_data['fields'], query.validated_data['expand']
     menus = Menu.objects.all()
-    serializer = MenuSerializer(menus, many=True)
-    return Response(serializer.data)
+    if is_streamed(request) or is_paginated(request):
+        menus = sparse_queryset(menus, MenuSerializer, fields, expand)
+        serializer_class = partial(MenuSerializer, fields=fields, expand=expand)
+        if is_streamed(request):
+            return streamed_response(menus, serializer_class)
+        return paginated_response(request, menus, serializer_class)
+    return Response(values_rows(menus, MenuSerializer, fields, expand))
 
 
+@replica_reads
 @api_view(['GET'])
 def get_menus_for_date(request):
     """
     Get a list of menus for a specific date.
 
+    The list is cached per date and fieldset (``fields``/``expand``, see
+    get_all_menus) until add_menu saves a menu for that date, and carries
+    ETag/Last-Modified headers for conditional requests.
+
     Args:
         request: HTTP request object.
 
     Returns:
         Response: JSON response containing a list of menus for the specified date.
     """
-    day = request.query_params.get('day', date.today())
-    menus = Menu.objects.filter(menu_date=day)
-    serializer = MenuSerializer(menus, many=True)
-    return Response(serializer.data)
+    query = MenusForDateQuerySerializer(data=request.query_params)
+    if not query.is_valid():
+        return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+    day, fields, expand = (query.validated_data[name] for name in ('day', 'fields', 'expand'))
+    entry = cached_menus_for_date(
+        day,
+        lambda: values_rows(Menu.objects.filter(menu_date=day), MenuSerializer, fields, expand),
+        query.cache_variant(),
+    )
+    return conditional_response(request, entry)
 
 
+@replica_reads
 @api_view(['GET'])
 def get_result_for_date(request):
     """
     Get the most voted menu for a specific date.
 
+    Votes are read from the VoteTally rows instead of being counted from Vote.
+    Concurrent requests for the same day share one lookup and response body.
+
     Args:
         request: HTTP request object.
 
@@ -94,36 +147,189 @@ def get_result_for_date(request):
         Response: JSON response with the most voted menu for the specified date.
     """
     day = request.query_params.get('day', date.today())
-    most_voted_menu = (
-        Menu.objects
-        .filter(menu_date=day)
-        .annotate(vote_count=Count('vote'))
-        .order_by(F('vote_count').desc(nulls_last=True))
-        .first()
+
+    def build():
+        leader = VoteTally.totals_for_menu_date(day).first()
+        if leader:
+            most_voted_menu = Menu.objects.filter(pk=leader['menu']).first()
+        else:
+            most_voted_menu = Menu.objects.filter(menu_date=day).first()
+        if most_voted_menu:
+            serializer = MenuSerializer(most_voted_menu)
+            return serializer.data, status.HTTP_200_OK
+        else:
+            return {'message': f'No menus found for the specified day({day}).'}, status.HTTP_404_NOT_FOUND
+
+    return coalesced_response(request, ('result_for_date', str(day)), build)
+
+
+@api_view(['GET'])
+def search_dishes(request):
+    """
+    Find dishes by name prefix, price and menu date.
+
+    Served from the MenuDish index, in keyset pages (``page_size``/``cursor``).
+
+    Args:
+        request: HTTP request object.
+
+    Returns:
+        Response: JSON response with a page of matching dishes.
+    """
+    params = DishSearchSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+    filters = params.validated_data
+    dishes = MenuDish.objects.all()
+    if 'dish' in filters:
+        # A range instead of LIKE, so the (dish_key, menu_date) index is used on every backend.
+        prefix = filters['dish'].lower()
+        dishes = dishes.filter(dish_key__gte=prefix, dish_key__lt=prefix + '\U0010ffff')
+    if 'max_price' in filters:
+        dishes = dishes.filter(price__lte=filters['max_price'])
+    if 'date_from' in filters:
+        dishes = dishes.filter(menu_date__gte=filters['date_from'])
+    if 'date_to' in filters:
+        dishes = dishes.filter(menu_date__lte=filters['date_to'])
+    return paginated_response(request, dishes, MenuDishSerializer)
+
+
+@require_GET
+def result_stream(request):
+    """
+    Stream the vote totals of a date as server-sent events.
+
+    A ``result`` event carries ``{"day": ..., "results": [{"menu": id, "vote_count": n}, ...]}``
+    (highest first) when the stream opens and whenever votes were committed since the
+    last event, at most once per ``settings.RESULTS_PUSH_INTERVAL``. This is a plain
+    Django view because DRF content negotiation rejects ``Accept: text/event-stream``.
+
+    Args:
+        request: HTTP request object.
+
+    Returns:
+        StreamingHttpResponse: ``text/event-stream`` response, or 400 for a malformed ``day``.
+    """
+    query = DayQuerySerializer(data=request.GET)
+    if not query.is_valid():
+        return JsonResponse(query.errors, status=status.HTTP_400_BAD_REQUEST)
+    # New menus are published under ISO dates; the stream must wait on the same key.
+    response = StreamingHttpResponse(result_events(query.validated_data['day'].isoformat()),
+                                     content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@api_view(['GET'])
+def get_results_for_range(request):
+    """
+    Get the winning menu and the runner-up of every day in a date range.
+
+    Computed with one aggregate query over the VoteTally rows; days without
+    votes are left out.
+
+    Args:
+        request: HTTP request object.
+
+    Returns:
+        Response: JSON response with one ``{day, winner, runner_up}`` entry per day.
+    """
+    params = DateRangeSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+    return Response(VoteTally.winners_between(params.validated_data['from'], params.validated_data['to']))
+
+
+@api_view(['GET'])
+def get_changes(request):
+    """
+    Get the restaurants and menus saved since a cursor, for incremental sync.
+
+    Start with ``since=0`` and pass the returned ``next`` on the following call.
+    Rows come in save order, restaurants and menus each in their own list;
+    ``more`` tells whether another call would return more rows right away.
+
+    Args:
+        request: HTTP request object.
+
+    Returns:
+        Response: ``{"next": int, "more": bool, "restaurants": [...], "menus": [...]}``.
+    """
+    params = ChangesQuerySerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+    since, limit = params.validated_data['since'], params.validated_data['limit']
+    # The first ``limit`` numbers after the cursor, from the change_seq indexes alone.
+    seqs = sorted(
+        seq
+        for model in (Restaurant, Menu)
+        for seq in model.objects.filter(change_seq__gt=since).order_by('change_seq')
+                                .values_list('change_seq', flat=True)[:limit + 1]
     )
-    if most_voted_menu:
-        serializer = MenuSerializer(most_voted_menu)
-        return Response(serializer.data)
-    else:
-        return Response({'message': f'No menus found for the specified day({day}).'}, status=404)
+    upto = seqs[min(limit, len(seqs)) - 1] if seqs else since
+    window = {'change_seq__gt': since, 'change_seq__lte': upto}
+    return Response({
+        'next': upto,
+        'more': len(seqs) > limit,
+        'restaurants': values_rows(Restaurant.objects.filter(**window).order_by('change_seq'), RestaurantSerializer),
+        'menus': values_rows(Menu.objects.filter(**window).order_by('change_seq'), MenuSerializer),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, APIVersionPermission])
+def get_restaurant_stats(request):
+    """
+    Get precomputed restaurant statistics per day, week or month.
+
+    Served from RestaurantRollup, which ``manage.py rollup_restaurant_stats`` fills
+    for closed days; the current day is not included until it is rolled up.
+
+    Args:
+        request: HTTP request object.
+
+    Returns:
+        Response: JSON response with one entry per restaurant and period in the range.
+    """
+    params = RestaurantStatsQuerySerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+    rollups = (
+        RestaurantRollup.objects
+        .filter(period=params.validated_data['period'],
+                period_start__range=(params.validated_data['from'], params.validated_data['to']))
+        .select_related('restaurant')
+        .order_by('period_start', 'restaurant')
+    )
+    return Response(RestaurantRollupSerializer(rollups, many=True).data)
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, APIVersionPermission])
 def add_menu(request):
     """
-    Add a new menu.
+    Add a new menu, or a list of menus in one request.
 
     Args:
         request: HTTP request object.
 
     Returns:
-        Response: Empty response.
+        Response: JSON response with the created data, or the validation errors
+        (one entry per item for lists).
     """
-    serializer = MenuSerializer(data=request.data)
-    if serializer.is_valid():
-        serializer.save()
-    return Response()
+    many = isinstance(request.data, list)
+    if many:
+        serializer = MenuSerializer(data=request.data, many=True, max_length=settings.BULK_CREATE_MAX_ITEMS)
+    else:
+        serializer = MenuSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    saved = serializer.save()
+    for day in {str(menu.menu_date) for menu in (saved if many else [saved])}:
+        invalidate_menus_for_date(day)
+        publish_result(day)
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
 @api_view(['POST'])
@@ -132,19 +338,67 @@ def vote(request):
     """
     Send a vote for a menu.
 
+    The vote is written with a single INSERT; a repeated vote is rejected by the
+    unique constraint instead of being looked up first.
+
     Args:
         request: HTTP request object.
 
     Returns:
-        Response: JSON response with the vote data.
+        Response: JSON response with the vote data, 409 if the user already voted
+        for the menu on that date. With the vote buffer enabled, 202 once the vote
+        is queued.
+    """
+    serializer = VoteCreateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    menu_id = serializer.validated_data['menu']
+    vote_date = serializer.validated_data.get('vote_date', date.today())
+    if settings.VOTE_BUFFER_ENABLED:
+        response = _buffered_vote(request.user.id, menu_id, vote_date)
+        if response is not None:
+            return response
+    try:
+        with transaction.atomic():
+            vote = Vote.objects.create(user_id=request.user.id, menu_id=menu_id, vote_date=vote_date)
+            VoteTally.increment(menu_id, vote_date)
+            transaction.on_commit(lambda: publish_menu_results([menu_id]))
+    except IntegrityError:
+        if not Menu.objects.filter(pk=menu_id).exists():
+            return _invalid_menu(menu_id)
+        return _already_voted()
+    return Response(VoteSerializer(vote).data, status=status.HTTP_201_CREATED)
+
+
+def _invalid_menu(menu_id):
+    return Response({'menu': [f'Invalid pk "{menu_id}" - object does not exist.']},
+                    status=status.HTTP_400_BAD_REQUEST)
+
+
+def _already_voted():
+    return Response({'detail': 'You have already voted for this menu on this date.'},
+                    status=status.HTTP_409_CONFLICT)
+
+
+def _buffered_vote(user_id, menu_id, vote_date):
+    """
+    Queue a vote in the write-behind buffer (see menu.vote_buffer).
+
+    Returns:
+        Response: 202 once queued, or None when the buffer is full and the vote
+        should be written synchronously.
     """
-    user = request.user
-    serializer = VoteSerializer(data=request.data)
-    if serializer.is_valid():
-        serializer.validated_data['user'] = user
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    buffer = get_vote_buffer()
+    if not buffer.menu_exists(menu_id):
+        return _invalid_menu(menu_id)
+    try:
+        queued = buffer.submit(user_id, menu_id, vote_date)
+    except VoteBufferFull:
+        return None
+    if not queued:
+        return _already_voted()
+    vote = Vote(user_id=user_id, menu_id=menu_id, vote_date=vote_date)
+    return Response(VoteSerializer(vote).data, status=status.HTTP_202_ACCEPTED)
 
 
 @api_view(['POST'])
@@ -164,11 +418,11 @@ def register_user(request):
     user_type = request.data.get('user_type')
 
     if user_type == 'basic':
-        user = User.objects.create(username=username, password=password)
+        user = User.objects.create_user(username=username, password=password)
         serializer = UserSerializer(user)
         return Response(serializer.data)
     elif user_type == 'employee':
-        user = User.objects.create(username=username, password=password)
+        user = User.objects.create_user(username=username, password=password)
         profile = EmployeeProfile.objects.create(user=user)
         EmployeeProfileSerializer(profile)
         return Response(UserSerializer(user).data)
@@ -176,28 +430,59 @@ def register_user(request):
         return Response({'error': 'Invalid user type'}, status=400)
 
 
+@api_view(['POST'])
+@permission_classes([IsAdminUser, APIVersionPermission])
+def register_users_bulk(request):
+    """
+    Register a list of users at once, for onboarding a whole office.
+
+    Takes ``{"users": [{"username", "password", "user_type"}, ...]}`` or the bare
+    list, at most ``settings.PROVISION_MAX_USERS`` users; larger lists go through
+    ``manage.py provision_users``. ``user_type`` defaults to 'employee'. Usernames
+    already registered are skipped; see menu.provisioning. Passwords are hashed on
+    the login pool, so concurrent requests cannot start more hashing threads.
+
+    Args:
+        request: HTTP request object.
+
+    Returns:
+        Response: Counts per outcome, step timings and the outcome of every row,
+        201 if any user was created. 409 if a username was registered meanwhile.
+    """
+    users = request.data.get('users') if isinstance(request.data, dict) else request.data
+    if not isinstance(users, list) or not users:
+        return Response({'error': 'Expected a non-empty list of users.'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(users) > settings.PROVISION_MAX_USERS:
+        return Response({'error': f'Ensure this list has no more than {settings.PROVISION_MAX_USERS} users; '
+                                  'provision larger lists with manage.py provision_users.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    try:
+        report = provision_users(enumerate(users), executor=get_login_executor())
+    except IntegrityError:
+        return Response({'error': 'A username was registered concurrently, nothing was saved. Retry the request.'},
+                        status=status.HTTP_409_CONFLICT)
+    return Response(report.as_dict(), status=status.HTTP_201_CREATED if report.count('created') else status.HTTP_200_OK)
+
+
 class CombinedTokenObtainPairView(TokenObtainPairView):
     """
     Custom token obtain view for obtaining access tokens.
 
-    This view combines user and employee profiles for authentication, due to bugs with JWT
+    Checks the credentials with menu.login.authenticate: one query loads the user
+    with their employee profile, and the password is verified on the bounded
+    login pool. The token carries the claims of EmployeeRefreshToken.
 
     Args:
         TokenObtainPairView: The base token obtain view.
 
     Methods:
-        post: Handle the token request and combine user and employee profiles for authentication.
+        post: Check the credentials and return an access token.
     """
     def post(self, request, *args, **kwargs):
-        username = request.data.get('username')
-        password = request.data.get('password')
-        user = User.objects.filter(username=username).first()
-
-        if user is None:
-            user = EmployeeProfile.objects.filter(username=username).first().user
+        user = authenticate(request.data.get('username'), request.data.get('password'))
 
-        if user and user.password == password:
-            refresh = RefreshToken.for_user(user)
+        if user is not None:
+            refresh = EmployeeRefreshToken.for_user(user)
             access_token = str(refresh.access_token)
             return Response({'access_token': access_token}, status=status.HTTP_200_OK)
 
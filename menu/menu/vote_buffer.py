@@ -0,0 +1,253 @@
+"""
+Write-behind buffer for the vote endpoint.
+
+With ``settings.VOTE_BUFFER_ENABLED`` the vote view checks the menu, records the
+vote in the dedupe store (``settings.VOTE_BUFFER_STORE``) and answers 202 at once.
+A background thread in each process writes the pending votes every
+``settings.VOTE_BUFFER_FLUSH_INTERVAL`` seconds, or as soon as
+``settings.VOTE_BUFFER_BATCH_SIZE`` are waiting, in one transaction: a bulk INSERT
+and one tally update per menu and day. When the batch breaks a constraint (a vote
+another worker stored meanwhile, or a user or menu deleted since the vote was
+queued), its votes are written one transaction each and the ones that still fail
+are logged, dropped and removed from the dedupe store, so the user can vote again.
+
+Durability: an acknowledged vote lives only in process memory until the next
+flush. A worker that dies without shutting down (SIGKILL, OOM kill, power loss)
+loses the votes of at most one flush interval, and never more than
+``settings.VOTE_BUFFER_MAX_PENDING``; while that many are waiting, votes take the
+synchronous path instead. A graceful shutdown (gunicorn's ``worker_exit`` hook or
+interpreter exit) flushes what is left. The dedupe entry of a lost vote stays: with
+CacheVoteStore the user cannot cast it again until the key expires
+(``CacheVoteStore.TIMEOUT``, two days), with LocalVoteStore until the worker restarts.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.utils.module_loading import import_string
+
+from .events import publish_menu_results
+from .models import Menu, Vote, VoteTally
+
+logger = logging.getLogger(__name__)
+
+
+class VoteBufferFull(Exception):
+    """
+    Raised when ``settings.VOTE_BUFFER_MAX_PENDING`` votes are waiting for a flush.
+    """
+
+
+class LocalVoteStore:
+    """
+    Remembers buffered votes in process memory.
+
+    Only repeats sent to the same process are answered with 409; with several
+    workers use CacheVoteStore. Repeats it misses are dropped by the flush.
+    """
+    # Vote dates remembered; the oldest is forgotten first.
+    MAX_DAYS = 7
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._days = {}
+
+    def add(self, user_id, menu_id, vote_date):
+        """
+        Record a vote.
+
+        Returns:
+            bool: False if the vote was recorded before.
+        """
+        with self._lock:
+            seen = self._days.get(vote_date)
+            if seen is None:
+                seen = self._days[vote_date] = set()
+                while len(self._days) > self.MAX_DAYS:
+                    del self._days[next(iter(self._days))]
+            if (user_id, menu_id) in seen:
+                return False
+            seen.add((user_id, menu_id))
+            return True
+
+    def discard(self, user_id, menu_id, vote_date):
+        """
+        Forget a vote that was not stored.
+        """
+        with self._lock:
+            self._days.get(vote_date, set()).discard((user_id, menu_id))
+
+
+class CacheVoteStore:
+    """
+    Remembers buffered votes in the default cache, shared by all processes that use it.
+
+    Relies on ``cache.add`` being atomic, as it is with Redis.
+    """
+    TIMEOUT = 2 * 24 * 60 * 60
+
+    def _key(self, user_id, menu_id, vote_date):
+        return f'menu:vote:{vote_date}:{user_id}:{menu_id}'
+
+    def add(self, user_id, menu_id, vote_date):
+        return cache.add(self._key(user_id, menu_id, vote_date), 1, self.TIMEOUT)
+
+    def discard(self, user_id, menu_id, vote_date):
+        cache.delete(self._key(user_id, menu_id, vote_date))
+
+
+class VoteBuffer:
+    """
+    Pending votes of this process and the thread that writes them.
+    """
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._pending = []
+        self._menus = set()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stopping = False
+
+    def menu_exists(self, menu_id):
+        """
+        Check a menu id once per process; menus are never deleted through the API.
+        """
+        if menu_id in self._menus:
+            return True
+        if not Menu.objects.filter(pk=menu_id).exists():
+            return False
+        self._menus.add(menu_id)
+        return True
+
+    def submit(self, user_id, menu_id, vote_date):
+        """
+        Queue a vote.
+
+        Returns:
+            bool: False if the user already voted for the menu on that date.
+
+        Raises:
+            VoteBufferFull: Too many votes are waiting; write this one synchronously.
+        """
+        if len(self._pending) >= settings.VOTE_BUFFER_MAX_PENDING:
+            raise VoteBufferFull()
+        if not self.store.add(user_id, menu_id, vote_date):
+            return False
+        with self._lock:
+            self._pending.append(Vote(user_id=user_id, menu_id=menu_id, vote_date=vote_date))
+            waiting = len(self._pending)
+            if self._thread is None:
+                self.start()
+        if waiting >= settings.VOTE_BUFFER_BATCH_SIZE:
+            self._wakeup.set()
+        return True
+
+    def flush(self):
+        """
+        Write all pending votes.
+
+        Returns:
+            int: Number of votes inserted; repeats of stored votes are skipped.
+        """
+        with self._lock:
+            votes, self._pending = self._pending, []
+        if not votes:
+            return 0
+        try:
+            try:
+                written = self._write(votes)
+            except IntegrityError:
+                written = self._write_each(votes)
+        except DatabaseError:
+            logger.exception('Writing %d buffered votes failed, will retry', len(votes))
+            connection.close()
+            with self._lock:
+                self._pending[:0] = votes
+            return 0
+        if written:
+            publish_menu_results({vote.menu_id for vote in votes})
+        return written
+
+    @staticmethod
+    def _write(votes):
+        with transaction.atomic():
+            stored = set(
+                Vote.objects
+                .filter(vote_date__in={vote.vote_date for vote in votes},
+                        user_id__in={vote.user_id for vote in votes})
+                .values_list('user_id', 'menu_id', 'vote_date')
+            )
+            new = []
+            for vote in votes:
+                key = (vote.user_id, vote.menu_id, vote.vote_date)
+                if key not in stored:
+                    stored.add(key)
+                    new.append(vote)
+            # No ignore_conflicts: the tallies below count every row, so a conflict
+            # must fail the batch rather than skip a row silently.
+            Vote.objects.bulk_create(new, batch_size=settings.BULK_CREATE_BATCH_SIZE)
+            for (menu_id, vote_date), count in Counter((vote.menu_id, vote.vote_date) for vote in new).items():
+                VoteTally.increment(menu_id, vote_date, count)
+        return len(new)
+
+    def _write_each(self, votes):
+        written = 0
+        for vote in votes:
+            try:
+                written += self._write([vote])
+            except IntegrityError as exc:
+                self._menus.discard(vote.menu_id)
+                self.store.discard(vote.user_id, vote.menu_id, vote.vote_date)
+                logger.warning('Dropped buffered vote of user %s for menu %s on %s: %s',
+                               vote.user_id, vote.menu_id, vote.vote_date, exc)
+        return written
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='vote-buffer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """
+        Stop the flush thread and write the remaining votes.
+        """
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(settings.VOTE_BUFFER_FLUSH_INTERVAL + 10)
+        self.flush()
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(settings.VOTE_BUFFER_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            self.flush()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_vote_buffer():
+    """
+    Return the process-wide buffer using the store configured by ``settings.VOTE_BUFFER_STORE``.
+    """
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = VoteBuffer(import_string(settings.VOTE_BUFFER_STORE)())
+    return _buffer
+
+
+def shutdown():
+    """
+    Flush the buffered votes of this process, e.g. from gunicorn's ``worker_exit`` hook.
+    """
+    if _buffer is not None:
+        _buffer.stop()
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from menu import async_views
+from menu.models import Restaurant, Menu, Vote, VoteTally
+
+
+@pytest.fixture(autouse=True)
+def dataset():
+    cache.clear()
+    restaurant = Restaurant.objects.create(name='Test Restaurant')
+    menus = [
+        Menu.objects.create(name=f'Menu {i}', restaurant=restaurant,
+                            menu_data={'test_product_1': 10}, menu_date='2023-09-23')
+        for i in range(3)
+    ]
+    user = User.objects.create_user(username='testuser', password='password123')
+    Vote.objects.create(user=user, menu=menus[1], vote_date='2023-09-23')
+    VoteTally.increment(menus[1].pk, '2023-09-23')
+
+
+def call_async(view, path, params=None):
+    response = async_to_sync(view)(RequestFactory().get(path, params or {}))
+    if response.streaming:
+        async def read():
+            return b''.join([chunk async for chunk in response.streaming_content])
+        return response.status_code, json.loads(async_to_sync(read)())
+    if hasattr(response, 'render'):
+        response.render()
+    return response.status_code, json.loads(response.content)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('view, path, params', [
+    (async_views.get_all_menus, '/menu/get_all_menus', {}),
+    (async_views.get_all_menus, '/menu/get_all_menus', {'stream': '1'}),
+    (async_views.get_all_menus, '/menu/get_all_menus', {'page_size': '2'}),
+    (async_views.get_menus_for_date, '/menu/get_menus_for_date', {'day': '2023-09-23'}),
+    (async_views.get_result_for_date, '/menu/get_result_for_date', {'day': '2023-09-23'}),
+    (async_views.get_result_for_date, '/menu/get_result_for_date', {'day': '2023-09-24'}),
+])
+def test_async_views_match_sync_views(view, path, params):
+    sync_response = APIClient().get(path, params)
+    sync_body = b''.join(sync_response.streaming_content) if sync_response.streaming else sync_response.content
+    cache.clear()
+    assert call_async(view, path, params) == (sync_response.status_code, json.loads(sync_body))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('view, path', [
+    (async_views.get_all_menus, '/menu/get_all_menus'),
+    (async_views.get_menus_for_date, '/menu/get_menus_for_date'),
+    (async_views.get_result_for_date, '/menu/get_result_for_date'),
+])
+def test_async_views_negotiate_the_renderer(view, path):
+    msgpack = pytest.importorskip('msgpack')
+    params = {'day': '2023-09-23'}
+    sync_response = APIClient().get(path, params, HTTP_ACCEPT='application/msgpack')
+    cache.clear()
+    response = async_to_sync(view)(RequestFactory().get(path, params, HTTP_ACCEPT='application/msgpack'))
+    assert response['Content-Type'] == 'application/msgpack'
+    assert msgpack.unpackb(response.content) == msgpack.unpackb(sync_response.content)
+
+    response = async_to_sync(view)(RequestFactory().get(path, params, HTTP_ACCEPT='text/html'))
+    assert response.status_code == 406
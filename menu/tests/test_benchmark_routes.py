@@ -0,0 +1,8 @@
+from datetime import date
+
+from benchmarks.routes import api_routes, build_cases
+
+
+def test_every_route_has_a_benchmark_case():
+    cases = build_cases({'today': date.today(), 'today_menus': [1], 'employees': []})
+    assert set(api_routes()) <= set(cases)
@@ -0,0 +1,61 @@
+from datetime import date
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from menu.models import Restaurant, Menu
+
+
+@pytest.fixture
+def client():
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username='testuser', password='password123'))
+    return client
+
+
+def menu_item(restaurant_pk, name='Test Menu'):
+    return {
+        'name': name,
+        'restaurant': restaurant_pk,
+        'menu_data': {'test_product_1': 10},
+        'menu_date': date.today().isoformat(),
+    }
+
+
+@pytest.mark.django_db
+def test_bulk_menus_resolve_restaurants_in_one_query(client):
+    restaurants = [Restaurant.objects.create(name=f'Restaurant {i}') for i in range(3)]
+    payload = [menu_item(restaurants[i % 3].pk, f'Menu {i}') for i in range(20)]
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post('/menu/add_menu', payload, format='json')
+    assert response.status_code == 201
+    assert Menu.objects.count() == 20
+    restaurant_selects = [q for q in queries if q['sql'].startswith('SELECT') and 'menu_restaurant' in q['sql']]
+    assert len(restaurant_selects) == 1
+
+
+@pytest.mark.django_db
+def test_bulk_menus_report_errors_per_item(client):
+    restaurant = Restaurant.objects.create(name='Test Restaurant')
+    payload = [menu_item(restaurant.pk), menu_item(restaurant.pk + 100), menu_item(restaurant.pk)]
+    response = client.post('/menu/add_menu', payload, format='json')
+    assert response.status_code == 400
+    assert response.data[0] == {}
+    assert 'restaurant' in response.data[1]
+    assert Menu.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_bulk_restaurants(client):
+    response = client.post('/restaurants/add_restaurants', [{'name': 'A'}, {'name': 'B'}], format='json')
+    assert response.status_code == 201
+    assert sorted(Restaurant.objects.values_list('name', flat=True)) == ['A', 'B']
+
+
+@pytest.mark.django_db
+def test_single_invalid_menu_is_rejected(client):
+    response = client.post('/menu/add_menu', menu_item(12345), format='json')
+    assert response.status_code == 400
@@ -0,0 +1,88 @@
+import time
+from datetime import date
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from menu.models import Restaurant
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def restaurant():
+    return Restaurant.objects.create(name='Test Restaurant')
+
+
+@pytest.fixture
+def client():
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username='testuser', password='password123'))
+    return client
+
+
+def add_menu(client, restaurant, name):
+    return client.post('/menu/add_menu', {
+        'name': name,
+        'restaurant': restaurant.pk,
+        'menu_data': {'test_product_1': 10},
+        'menu_date': date.today().isoformat(),
+    }, format='json')
+
+
+@pytest.mark.django_db
+def test_second_read_is_served_from_cache(client, restaurant, django_assert_num_queries):
+    add_menu(client, restaurant, 'Test Menu')
+    first = client.get('/menu/get_menus_for_date')
+    with django_assert_num_queries(0):
+        second = client.get('/menu/get_menus_for_date')
+    assert second.data == first.data
+    assert second['ETag'] == first['ETag']
+
+
+@pytest.mark.django_db
+def test_add_menu_invalidates_its_date(client, restaurant):
+    add_menu(client, restaurant, 'Test Menu')
+    assert len(client.get('/menu/get_menus_for_date').data) == 1
+    add_menu(client, restaurant, 'Second Menu')
+    assert len(client.get('/menu/get_menus_for_date').data) == 2
+
+
+@pytest.mark.django_db
+def test_matching_etag_returns_not_modified(client, restaurant):
+    add_menu(client, restaurant, 'Test Menu')
+    etag = client.get('/menu/get_menus_for_date')['ETag']
+    response = client.get('/menu/get_menus_for_date', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert not response.content
+
+
+@pytest.mark.django_db
+def test_unpadded_day_is_invalidated(client, restaurant):
+    response = client.post('/menu/add_menu', {
+        'name': 'Future Menu', 'restaurant': restaurant.pk, 'menu_data': {}, 'menu_date': '2099-01-01'}, format='json')
+    assert response.status_code == 201
+    assert len(client.get('/menu/get_menus_for_date', {'day': '2099-1-1'}).data) == 1
+    client.post('/menu/add_menu', {
+        'name': 'Second Menu', 'restaurant': restaurant.pk, 'menu_data': {}, 'menu_date': '2099-01-01'}, format='json')
+    assert len(client.get('/menu/get_menus_for_date', {'day': '2099-1-1'}).data) == 2
+    assert client.get('/menu/get_menus_for_date', {'day': 'tomorrow'}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_last_modified_is_the_time_of_the_last_write(client, restaurant, monkeypatch):
+    first = client.get('/menu/get_menus_for_date')
+    assert 'Last-Modified' not in first
+    response = client.get('/menu/get_menus_for_date', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+    assert response.status_code == 200
+
+    monkeypatch.setattr(time, 'time', lambda: 1_700_000_000.0)
+    add_menu(client, restaurant, 'Test Menu')
+    # Read after the stamp of the write expired: the new stamp is not a change.
+    monkeypatch.setattr(time, 'time', lambda: 1_700_000_600.0)
+    assert client.get('/menu/get_menus_for_date')['Last-Modified'] == 'Tue, 14 Nov 2023 22:13:20 GMT'
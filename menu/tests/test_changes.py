@@ -0,0 +1,65 @@
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from menu.models import Restaurant, Menu, ChangeSequence
+
+DAY = '2099-01-01'
+
+
+@pytest.fixture
+def client():
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username='admin'))
+    return client
+
+
+def changes(client, since, limit=None):
+    params = {'since': since} if limit is None else {'since': since, 'limit': limit}
+    response = client.get('/changes', params)
+    assert response.status_code == 200
+    return response.data
+
+
+@pytest.mark.django_db
+def test_sync_returns_only_new_rows(client):
+    restaurant = client.post('/restaurants/add_restaurants', {'name': 'First'}, format='json').data
+    client.post('/menu/add_menu', [
+        {'name': f'Menu {i}', 'restaurant': restaurant['id'], 'menu_data': {'soup': 5}, 'menu_date': DAY}
+        for i in range(3)], format='json')
+    first = changes(client, 0)
+    assert [row['name'] for row in first['restaurants']] == ['First']
+    assert [row['name'] for row in first['menus']] == ['Menu 0', 'Menu 1', 'Menu 2']
+    assert first['more'] is False
+    assert 'change_seq' not in first['menus'][0]
+
+    assert changes(client, first['next']) == {'next': first['next'], 'more': False, 'restaurants': [], 'menus': []}
+
+    menu = Menu.objects.get(name='Menu 1')
+    menu.name = 'Renamed'
+    menu.save()
+    second = changes(client, first['next'])
+    assert [row['name'] for row in second['menus']] == ['Renamed']
+    assert second['next'] > first['next']
+
+
+@pytest.mark.django_db
+def test_limit_pages_through_both_tables(client):
+    restaurants = Restaurant.objects.bulk_create(Restaurant(name=f'R{i}') for i in range(3))
+    Menu.objects.bulk_create(Menu(name=f'M{i}', restaurant=restaurants[0], menu_data={}, menu_date=DAY)
+                             for i in range(3))
+    Restaurant.objects.create(name='R3')
+    seen, since = [], 0
+    while True:
+        page = changes(client, since, limit=2)
+        seen += [row['name'] for row in page['restaurants'] + page['menus']]
+        since = page['next']
+        if not page['more']:
+            break
+    assert sorted(seen) == ['M0', 'M1', 'M2', 'R0', 'R1', 'R2', 'R3']
+    assert since == ChangeSequence.objects.get().value
+
+
+@pytest.mark.django_db
+def test_invalid_cursor():
+    assert APIClient().get('/changes', {'since': -1}).status_code == 400
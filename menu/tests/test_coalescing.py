@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from rest_framework.test import APIClient
+
+from menu.coalescing import SingleFlight, flight
+from menu.models import Restaurant, Menu, VoteTally
+
+
+def run_threads(flight, func, count):
+    """
+    Call ``flight.do('key', func)`` from ``count`` threads, the first one entering alone.
+    """
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do('key', func))
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    threads[0].start()
+    while 'key' not in flight._calls:
+        time.sleep(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_calls_share_one_computation():
+    single_flight, release, calls = SingleFlight(), threading.Event(), []
+
+    def compute():
+        calls.append(1)
+        release.wait()
+        return b'body'
+
+    threads, results, _ = run_threads(single_flight, compute, 8)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [b'body'] * 8
+    assert not single_flight._calls
+    # Finished calls are not reused without a TTL.
+    assert single_flight.do('key', lambda: b'new') == b'new'
+
+
+def test_errors_reach_every_waiter():
+    single_flight, release = SingleFlight(), threading.Event()
+
+    def compute():
+        release.wait()
+        raise ValueError('database down')
+
+    threads, results, errors = run_threads(single_flight, compute, 4)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == []
+    assert [str(exc) for exc in errors] == ['database down'] * 4
+    assert single_flight.do('key', lambda: 1) == 1
+
+
+def test_ttl_reuses_finished_results():
+    single_flight, calls = SingleFlight(), []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert single_flight.do('key', compute, ttl=60) == 1
+    assert single_flight.do('key', compute, ttl=60) == 1
+    assert single_flight.do('other', compute, ttl=60) == 2
+    single_flight.reset()
+    assert single_flight.do('key', compute, ttl=60) == 3
+
+
+def test_coroutines_share_one_task():
+    single_flight, calls = SingleFlight(), []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return b'body'
+
+    async def main():
+        waiters = [asyncio.ensure_future(single_flight.ado('key', compute)) for _ in range(10)]
+        await asyncio.sleep(0)
+        # A client going away does not cancel the computation of the others.
+        waiters[0].cancel()
+        return await asyncio.gather(*waiters[1:])
+
+    assert asyncio.run(main()) == [b'body'] * 9
+    assert len(calls) == 1
+    assert not single_flight._tasks
+
+
+@pytest.mark.django_db
+def test_result_for_date_reuses_the_rendered_body(settings, django_assert_num_queries):
+    settings.READ_COALESCING_TTL = 60
+    restaurant = Restaurant.objects.create(name='Test Restaurant')
+    menus = [Menu.objects.create(name=name, restaurant=restaurant, menu_data={}, menu_date='2023-09-23')
+             for name in ('A', 'B')]
+    VoteTally.increment(menus[1].pk, '2023-09-23')
+    client = APIClient()
+    try:
+        first = client.get('/menu/get_result_for_date', {'day': '2023-09-23'})
+        with django_assert_num_queries(0):
+            second = client.get('/menu/get_result_for_date', {'day': '2023-09-23'})
+        assert first.data['id'] == second.data['id'] == menus[1].pk
+        assert second.content == first.content
+        assert second['Content-Type'] == 'application/json'
+        missing = client.get('/menu/get_result_for_date', {'day': '2023-09-24'})
+        assert missing.status_code == 404
+    finally:
+        flight.reset()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', ['/menu/get_result_for_date', '/menu/get_menus_for_date'])
+def test_browsable_api_pages_share_only_the_data(settings, url):
+    settings.READ_COALESCING_TTL = 60
+    restaurant = Restaurant.objects.create(name='Test Restaurant')
+    menu = Menu.objects.create(name='Pasta', restaurant=restaurant, menu_data={}, menu_date='2023-09-23')
+    VoteTally.increment(menu.pk, '2023-09-23')
+    client = APIClient()
+    try:
+        html = client.get(url, {'day': '2023-09-23'}, HTTP_ACCEPT='text/html')
+        assert html.status_code == 200
+        assert html['Content-Type'].startswith('text/html')
+        assert b'Pasta' in html.content
+        json = client.get(url, {'day': '2023-09-23'})
+        assert json['Content-Type'] == 'application/json'
+    finally:
+        flight.reset()
+
+
+@pytest.mark.django_db
+def test_coalescing_can_be_turned_off(settings, django_assert_num_queries):
+    settings.READ_COALESCING = False
+    settings.READ_COALESCING_TTL = 60
+    client = APIClient()
+    client.get('/menu/get_result_for_date', {'day': '2023-09-23'})
+    with django_assert_num_queries(2):
+        response = client.get('/menu/get_result_for_date', {'day': '2023-09-23'})
+    assert response.status_code == 404
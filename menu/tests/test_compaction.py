@@ -0,0 +1,67 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from menu.models import Restaurant, Menu, Vote, VoteTally, EmployeeProfile, ArchivedVoteDay, RestaurantRollup
+
+FIRST_DAY = date(2023, 9, 1)
+LAST_DAY = FIRST_DAY + timedelta(days=2)
+
+
+@pytest.fixture
+def votes():
+    restaurant = Restaurant.objects.create(name='Test Restaurant')
+    users = [User.objects.create_user(username=f'user {i}') for i in range(3)]
+    for user in users:
+        EmployeeProfile.objects.create(user=user)
+    plan = {0: {'A': 1, 'B': 2}, 1: {'A': 3}, 2: {'A': 0, 'B': 1}}
+    for offset, counts in plan.items():
+        day = FIRST_DAY + timedelta(days=offset)
+        for name, count in counts.items():
+            menu = Menu.objects.create(name=name, restaurant=restaurant, menu_data={}, menu_date=day)
+            for user in users[:count]:
+                Vote.objects.create(user=user, menu=menu, vote_date=day)
+    VoteTally.rebuild()
+    return users
+
+
+def results(client):
+    daily = [client.get('/menu/get_result_for_date', {'day': (FIRST_DAY + timedelta(days=offset)).isoformat()}).data
+             for offset in range(3)]
+    ranged = client.get('/menu/get_results_for_range', {'from': FIRST_DAY.isoformat(), 'to': LAST_DAY.isoformat()})
+    return daily, ranged.data
+
+
+@pytest.mark.django_db
+def test_results_identical_after_compaction(votes, tmp_path):
+    client = APIClient()
+    before = results(client)
+    archive = tmp_path / 'votes.jsonl'
+
+    call_command('compact_votes', retention_days=0, batch_size=2, archive_file=str(archive))
+
+    assert not Vote.objects.exists()
+    assert ArchivedVoteDay.objects.count() == 3
+    assert len(archive.read_text().splitlines()) == 7
+    assert json.loads(archive.read_text().splitlines()[0])['vote_date'] == FIRST_DAY.isoformat()
+    assert results(client) == before
+    assert RestaurantRollup.objects.filter(period='day').count() == 3
+    # Each day was compacted before the next one was rolled up; weeks and months still count every voter.
+    periods = RestaurantRollup.objects.exclude(period='day').values_list('period', 'menus', 'votes', 'wins', 'voters')
+    assert sorted(periods) == [('month', 5, 7, 3, 3), ('week', 5, 7, 3, 3)]
+
+    # Rebuilding tallies must not wipe the counts of compacted days.
+    call_command('rebuild_vote_tallies')
+    assert results(client) == before
+
+
+@pytest.mark.django_db
+def test_retention_window_keeps_recent_votes(votes):
+    call_command('compact_votes', retention_days=(date.today() - LAST_DAY).days)
+    assert list(Vote.objects.values_list('vote_date', flat=True).distinct()) == [LAST_DAY]
+    call_command('compact_votes', retention_days=(date.today() - LAST_DAY).days)
+    assert ArchivedVoteDay.objects.count() == 2
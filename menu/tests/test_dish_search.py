@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from rest_framework.test import APIClient
+
+from menu.models import Restaurant, Menu, MenuDish
+
+
+@pytest.fixture
+def menus():
+    restaurant = Restaurant.objects.create(name='Test Restaurant')
+    today = date.today()
+    Menu.objects.create(name='Monday', restaurant=restaurant, menu_date=today,
+                        menu_data={'Borscht': 10, 'Bread': 2, 'Pasta': 25})
+    Menu.objects.bulk_create([
+        Menu(name='Tuesday', restaurant=restaurant, menu_date=today + timedelta(days=1),
+             menu_data={'borscht with cream': 12.5, 'Salad': 'free'}),
+        Menu(name='Next month', restaurant=restaurant, menu_date=today + timedelta(days=30),
+             menu_data={'Borscht': 9}),
+    ])
+
+
+def search(**params):
+    response = APIClient().get('/menu/search_dishes', params)
+    assert response.status_code == 200
+    return sorted((row['dish'], Decimal(row['price'])) for row in response.data['results'])
+
+
+@pytest.mark.django_db
+def test_dishes_are_indexed_on_save_and_bulk_create(menus):
+    assert MenuDish.objects.count() == 5
+
+
+@pytest.mark.django_db
+def test_search_by_prefix_price_and_dates(menus):
+    week = {'date_from': date.today(), 'date_to': date.today() + timedelta(days=6)}
+    assert search(dish='bor', **week) == [('Borscht', Decimal('10')), ('borscht with cream', Decimal('12.5'))]
+    assert search(dish='bor', max_price=11, **week) == [('Borscht', Decimal('10'))]
+    assert search(max_price=5) == [('Bread', Decimal('2'))]
+
+
+@pytest.mark.django_db
+def test_saving_a_menu_replaces_its_dishes(menus):
+    menu = Menu.objects.get(name='Monday')
+    menu.menu_data = {'Soup': 7}
+    menu.save()
+    assert list(menu.dishes.values_list('dish', flat=True)) == ['Soup']
+
+
+@pytest.mark.django_db
+def test_invalid_parameters_are_rejected():
+    assert APIClient().get('/menu/search_dishes', {'max_price': 'cheap'}).status_code == 400
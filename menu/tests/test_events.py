@@ -0,0 +1,126 @@
+import json
+from datetime import date
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from menu import async_views, events
+from menu.models import EmployeeProfile, Restaurant, Menu, Vote, VoteTally
+
+
+@pytest.fixture(autouse=True)
+def fast_streams(settings):
+    settings.RESULTS_PUSH_INTERVAL = 0
+    settings.RESULTS_STREAM_MAX_SECONDS = 5
+    events._broadcaster = None
+    events._feed = events.ResultsFeed()
+
+
+@pytest.fixture
+def menu():
+    restaurant = Restaurant.objects.create(name='Test Restaurant')
+    return Menu.objects.create(name='Test Menu', restaurant=restaurant,
+                               menu_data={'test_product_1': 10}, menu_date='2023-09-23')
+
+
+def add_votes(menu, count):
+    for i in range(count):
+        user = User.objects.create_user(username=f'user {User.objects.count()}')
+        Vote.objects.create(user=user, menu=menu, vote_date='2023-09-23')
+        VoteTally.increment(menu.pk, '2023-09-23')
+    events.publish_menu_results([menu.pk])
+
+
+def parse(event):
+    assert event.startswith('event: result\n')
+    return json.loads(event.split('data: ', 1)[1])
+
+
+@pytest.mark.django_db
+def test_stream_pushes_new_totals(menu):
+    response = APIClient().get('/menu/result_stream', {'day': '2023-09-23'})
+    assert response['Content-Type'] == 'text/event-stream'
+    stream = (chunk.decode() for chunk in response.streaming_content)
+    assert parse(next(stream))['results'] == []
+    add_votes(menu, 3)
+    assert parse(next(stream))['results'] == [{'menu': menu.pk, 'vote_count': 3}]
+
+
+@pytest.mark.django_db
+def test_burst_of_votes_is_one_event(menu, settings):
+    settings.RESULTS_STREAM_MAX_SECONDS = 0.2
+    stream = events.result_events('2023-09-23')
+    assert parse(next(stream))['results'] == []
+    for _ in range(5):
+        add_votes(menu, 1)
+    assert [parse(event)['results'] for event in stream] == [[{'menu': menu.pk, 'vote_count': 5}]]
+
+
+@pytest.mark.django_db
+def test_vote_updates_the_menu_date_stream(menu, django_capture_on_commit_callbacks):
+    user = User.objects.create_user(username='voter')
+    EmployeeProfile.objects.create(user=user)
+    client = APIClient()
+    client.force_authenticate(user)
+    stream = events.result_events('2023-09-23')
+    assert parse(next(stream))['results'] == []
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post('/vote', {'menu': menu.pk, 'vote_date': '2023-09-22'}, format='json')
+    assert response.status_code == 201
+    assert parse(next(stream))['results'] == [{'menu': menu.pk, 'vote_count': 1}]
+
+
+@pytest.mark.django_db
+def test_added_menu_joins_the_stream(menu):
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username='admin'))
+    today = date.today().isoformat()
+    stream = events.result_events(today)
+    assert parse(next(stream))['results'] == []
+    payload = {'name': 'New Menu', 'restaurant': menu.restaurant_id,
+               'menu_data': {'test_product_2': 5}, 'menu_date': today}
+    response = client.post('/menu/add_menu', payload, format='json')
+    assert response.status_code == 201
+    new_menu = Menu.objects.get(pk=response.data['id'])
+    for username in ('first', 'second'):
+        Vote.objects.create(user=User.objects.create_user(username=username), menu=new_menu, vote_date=today)
+        VoteTally.increment(new_menu.pk, today)
+    events.publish_menu_results([new_menu.pk])
+    assert parse(next(stream))['results'] == [{'menu': new_menu.pk, 'vote_count': 2}]
+
+
+@pytest.mark.django_db
+def test_streams_share_one_snapshot(menu, django_assert_num_queries):
+    add_votes(menu, 1)
+    next(events.result_events('2023-09-23'))
+    with django_assert_num_queries(0):
+        next(events.result_events('2023-09-23'))
+
+
+@pytest.mark.django_db
+def test_async_stream(menu):
+    add_votes(menu, 2)
+    request = RequestFactory().get('/menu/result_stream', {'day': '2023-09-23'})
+    response = async_to_sync(async_views.result_stream)(request)
+
+    async def first_event():
+        async for chunk in response.streaming_content:
+            return chunk.decode()
+
+    assert parse(async_to_sync(first_event)())['results'] == [{'menu': menu.pk, 'vote_count': 2}]
+
+
+@pytest.mark.django_db
+def test_stream_day_is_parsed(menu):
+    response = APIClient().get('/menu/result_stream', {'day': '2023-9-23'})
+    stream = (chunk.decode() for chunk in response.streaming_content)
+    assert parse(next(stream))['day'] == '2023-09-23'
+    add_votes(menu, 1)
+    assert parse(next(stream))['results'] == [{'menu': menu.pk, 'vote_count': 1}]
+
+    assert APIClient().get('/menu/result_stream', {'day': 'bogus'}).status_code == 400
+    request = RequestFactory().get('/menu/result_stream', {'day': 'bogus'})
+    assert async_to_sync(async_views.result_stream)(request).status_code == 400
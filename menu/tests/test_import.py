@@ -0,0 +1,63 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from menu.models import Restaurant, Menu, MenuDish
+
+FUTURE = (date.today() + timedelta(days=7)).isoformat()
+
+
+@pytest.fixture
+def files(tmp_path):
+    restaurants = tmp_path / 'restaurants.csv'
+    restaurants.write_text('name\nFirst\nSecond\nFirst\n')
+    menus = tmp_path / 'menus.jsonl'
+    rows = [
+        {'name': 'Lunch', 'restaurant': 'First', 'menu_date': FUTURE, 'menu_data': {'soup': 5}},
+        {'name': 'Lunch', 'restaurant': 'Second', 'menu_date': FUTURE, 'menu_data': {'salad': 7}},
+        {'name': 'Lunch', 'restaurant': 'First', 'menu_date': FUTURE, 'menu_data': {'soup': 5}},
+        {'name': 'Old', 'restaurant': 'First', 'menu_date': '2020-01-01', 'menu_data': {}},
+        {'name': 'Lost', 'restaurant': 'Nowhere', 'menu_date': FUTURE, 'menu_data': {}},
+    ]
+    menus.write_text('\n'.join(json.dumps(row) for row in rows) + '\nnot json\n')
+    return restaurants, menus
+
+
+@pytest.mark.django_db
+def test_import_validates_and_is_idempotent(files):
+    restaurants, menus = files
+    call_command('import_menus', restaurants=[str(restaurants)], menus=[str(menus)], chunk_size=2)
+
+    assert sorted(Restaurant.objects.values_list('name', flat=True)) == ['First', 'Second']
+    assert sorted(Menu.objects.values_list('restaurant__name', flat=True)) == ['First', 'Second']
+    assert MenuDish.objects.count() == 2
+    rejected = [json.loads(line) for line in open(f'{menus}.rejected.jsonl')]
+    assert [row['line'] for row in rejected] == [4, 5, 6]
+    assert 'menu_date' in rejected[0]['errors']
+    assert 'restaurant' in rejected[1]['errors']
+
+    call_command('import_menus', restaurants=[str(restaurants)], menus=[str(menus)])
+    assert Restaurant.objects.count() == 2
+    assert Menu.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_csv_menus(tmp_path):
+    Restaurant.objects.create(name='First')
+    menus = tmp_path / 'menus.csv'
+    menus.write_text(f'name,restaurant,menu_date,menu_data\nLunch,First,{FUTURE},"{{""soup"": 5}}"\n')
+    call_command('import_menus', menus=[str(menus)])
+    assert Menu.objects.get().menu_data == {'soup': 5}
+
+
+@pytest.mark.django_db
+def test_import_drops_cached_menus_of_its_dates(files, django_capture_on_commit_callbacks):
+    restaurants, menus = files
+    client = APIClient()
+    assert client.get('/menu/get_menus_for_date', {'day': FUTURE}).data == []
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command('import_menus', restaurants=[str(restaurants)], menus=[str(menus)])
+    assert len(client.get('/menu/get_menus_for_date', {'day': FUTURE}).data) == 2
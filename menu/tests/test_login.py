@@ -0,0 +1,61 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from menu.models import EmployeeProfile
+
+
+@pytest.fixture(autouse=True)
+def cheap_hashes(settings):
+    settings.PASSWORD_HASH_ITERATIONS = 1000
+
+
+def login(username, password):
+    return APIClient().post('/api/token/', {'username': username, 'password': password}, format='json')
+
+
+@pytest.mark.django_db
+def test_login_runs_one_query():
+    user = User.objects.create_user(username='employee', password='password123')
+    EmployeeProfile.objects.create(user=user)
+    with CaptureQueriesContext(connection) as queries:
+        response = login('employee', 'password123')
+    assert response.status_code == 200
+    assert len(queries) == 1
+    assert AccessToken(response.data['access_token'])['employee'] is True
+
+
+@pytest.mark.django_db
+def test_basic_user_token_has_no_employee_claim():
+    User.objects.create_user(username='basic', password='password123')
+    response = login('basic', 'password123')
+    assert AccessToken(response.data['access_token'])['employee'] is False
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('username, password', [('employee', 'wrong'), ('nobody', 'password123'), ('employee', None)])
+def test_bad_credentials(username, password):
+    User.objects.create_user(username='employee', password='password123')
+    assert login(username, password).status_code == 401
+
+
+@pytest.mark.django_db
+def test_inactive_user_cannot_log_in():
+    User.objects.create_user(username='employee', password='password123', is_active=False)
+    assert login('employee', 'password123').status_code == 401
+
+
+@pytest.mark.django_db
+def test_plaintext_and_outdated_passwords_are_rehashed(settings):
+    User.objects.create(username='legacy', password='password123')
+    assert login('legacy', 'wrong').status_code == 401
+    assert login('legacy', 'password123').status_code == 200
+    encoded = User.objects.get(username='legacy').password
+    assert encoded.startswith('pbkdf2_sha256$1000$')
+
+    settings.PASSWORD_HASH_ITERATIONS = 2000
+    assert login('legacy', 'password123').status_code == 200
+    assert User.objects.get(username='legacy').password.startswith('pbkdf2_sha256$2000$')
@@ -0,0 +1,92 @@
+import time
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import User
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from menu.metrics import MetricsMiddleware, _current, _install, _RequestStats, _uninstall, registry, timed
+from menu.models import Restaurant
+from menu.serializers import RestaurantSerializer
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    registry.reset()
+
+
+@pytest.mark.django_db
+def test_requests_are_recorded_per_route():
+    Restaurant.objects.create(name='Test Restaurant')
+    client = APIClient()
+    client.get('/restaurants/get_all_restaurants')
+    client.get('/restaurants/get_all_restaurants')
+    client.force_authenticate(User.objects.create_user(username='admin', is_staff=True))
+    body = client.get('/metrics').content.decode()
+    labels = 'route="restaurants/get_all_restaurants",method="GET"'
+    assert f'menu_http_requests_total{{{labels},status="200"}} 2' in body
+    assert f'menu_http_request_duration_seconds_count{{{labels}}} 2' in body
+    assert f'menu_http_db_queries_total{{{labels}}} 2' in body
+    assert f'menu_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in body
+
+
+@pytest.mark.django_db
+def test_serialization_is_timed_without_its_sql():
+    Restaurant.objects.create(name='Test Restaurant')
+
+    def slow_query(execute, sql, params, many, context):
+        time.sleep(0.05)
+        return execute(sql, params, many, context)
+
+    stats = _RequestStats()
+    token = _current.set(stats)
+    _install(stats)
+    try:
+        with connection.execute_wrapper(slow_query), timed('serialize_time'):
+            data = RestaurantSerializer(Restaurant.objects.all(), many=True).data
+    finally:
+        _uninstall(stats)
+        _current.reset(token)
+    assert data[0]['name'] == 'Test Restaurant'
+    assert stats.db_time >= 0.05
+    assert 0 <= stats.serialize_time < 0.05
+
+    APIClient().get('/restaurants/get_all_restaurants')
+    assert 'menu_http_serialize_duration_seconds_total{route="restaurants/get_all_restaurants",method="GET"}' \
+        in registry.render()
+
+
+@pytest.mark.django_db
+def test_metrics_are_for_staff_and_allowed_scrapers(settings):
+    client = APIClient()
+    assert client.get('/metrics').status_code == 401
+    client.force_authenticate(User.objects.create_user(username='employee'))
+    assert client.get('/metrics').status_code == 403
+    settings.METRICS_ALLOWED_IPS = ['127.0.0.1']
+    response = APIClient().get('/metrics')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain')
+
+
+@pytest.mark.django_db
+def test_sample_rate_zero_records_nothing(settings):
+    settings.METRICS_SAMPLE_RATE = 0
+    APIClient().get('/restaurants/get_all_restaurants')
+    assert 'restaurants/get_all_restaurants' not in registry.render()
+
+
+@pytest.mark.django_db
+def test_async_chain_stays_async_and_counts_queries():
+    Restaurant.objects.create(name='Test Restaurant')
+
+    async def get_response(request):
+        await Restaurant.objects.acount()
+        return HttpResponse()
+
+    middleware = MetricsMiddleware(get_response)
+    assert iscoroutinefunction(middleware)
+    async_to_sync(middleware)(RequestFactory().get('/anything'))
+    assert 'menu_http_db_queries_total{route="unmatched",method="GET"} 1' in registry.render()
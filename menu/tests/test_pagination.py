@@ -0,0 +1,37 @@
+import json
+
+import pytest
+from rest_framework.test import APIClient
+
+from menu.models import Restaurant
+
+
+@pytest.fixture
+def restaurants():
+    return [Restaurant.objects.create(name=f'Restaurant {i}') for i in range(5)]
+
+
+@pytest.mark.django_db
+def test_keyset_pages_cover_all_rows(restaurants):
+    client = APIClient()
+    response = client.get('/restaurants/get_all_restaurants', {'page_size': 2})
+    names = [row['name'] for row in response.data['results']]
+    while response.data['next']:
+        response = client.get(response.data['next'])
+        names += [row['name'] for row in response.data['results']]
+    assert names == [restaurant.name for restaurant in restaurants]
+
+
+@pytest.mark.django_db
+def test_streamed_list_matches_plain_list(restaurants):
+    client = APIClient()
+    plain = client.get('/restaurants/get_all_restaurants')
+    streamed = client.get('/restaurants/get_all_restaurants', {'stream': '1'})
+    body = b''.join(streamed.streaming_content)
+    assert json.loads(body) == json.loads(plain.content)
+
+
+@pytest.mark.django_db
+def test_plain_list_is_unpaginated(restaurants):
+    response = APIClient().get('/restaurants/get_all_restaurants')
+    assert len(response.data) == 5
@@ -0,0 +1,109 @@
+import json
+import threading
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from menu import provisioning
+from menu.models import EmployeeProfile
+from menu.provisioning import provision_users
+
+
+@pytest.fixture(autouse=True)
+def fast_hasher(settings):
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+@pytest.fixture
+def admin_client():
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username='admin', is_staff=True))
+    return client
+
+
+@pytest.mark.django_db
+def test_provision_users_reports_every_row():
+    User.objects.create_user(username='taken')
+    rows = [
+        {'username': 'ann', 'password': 'secret 1'},
+        {'username': 'bob', 'password': 'secret 2', 'user_type': 'basic'},
+        {'username': 'taken', 'password': 'secret 3'},
+        {'username': 'ann', 'password': 'secret 4'},
+        {'username': 'bad name!', 'password': 'secret 5'},
+        'not an object',
+    ]
+    with CaptureQueriesContext(connection) as queries:
+        report = provision_users(enumerate(rows), workers=2).as_dict()
+    statements = [q['sql'].split()[0] for q in queries if 'SAVEPOINT' not in q['sql']]
+    # One lookup of existing usernames, one INSERT of users, one of profiles.
+    assert statements == ['SELECT', 'INSERT', 'INSERT']
+
+    assert [(row['row'], row['status']) for row in report['rows']] == [
+        (0, 'created'), (1, 'created'), (2, 'exists'), (3, 'duplicate'), (4, 'rejected'), (5, 'rejected')]
+    assert (report['created'], report['exists'], report['duplicate'], report['rejected']) == (2, 1, 1, 2)
+    assert 'username' in report['rows'][4]['errors']
+    assert set(report['seconds']) == {'validate', 'lookup', 'hash', 'write', 'total'}
+
+    ann = User.objects.get(username='ann')
+    assert report['rows'][0]['id'] == ann.pk
+    assert ann.check_password('secret 1')
+    assert list(EmployeeProfile.objects.values_list('user__username', flat=True)) == ['ann']
+
+
+@pytest.mark.django_db
+def test_bulk_endpoint(admin_client):
+    users = [{'username': f'user {i}'.replace(' ', '_'), 'password': 'password123'} for i in range(3)]
+    response = admin_client.post('/register/bulk', {'users': users}, format='json')
+    assert response.status_code == 201
+    assert response.data['created'] == 3
+
+    again = admin_client.post('/register/bulk', users, format='json')
+    assert again.status_code == 200
+    assert again.data['exists'] == 3
+    assert EmployeeProfile.objects.count() == 3
+
+    token = APIClient().post('/api/token/', {'username': 'user_0', 'password': 'password123'}, format='json')
+    assert token.status_code == 200
+
+
+@pytest.mark.django_db
+def test_bulk_endpoint_is_for_staff(admin_client):
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username='employee'))
+    assert client.post('/register/bulk', [{'username': 'a', 'password': 'b'}], format='json').status_code == 403
+    assert admin_client.post('/register/bulk', {'users': []}, format='json').status_code == 400
+
+
+@pytest.mark.django_db
+def test_bulk_endpoint_hashes_on_the_login_pool(admin_client, settings, monkeypatch):
+    settings.PROVISION_MAX_USERS = 2
+    users = [{'username': name, 'password': 'password123'} for name in ('ann', 'bob', 'cid')]
+    response = admin_client.post('/register/bulk', users, format='json')
+    assert response.status_code == 400
+    assert 'provision_users' in response.data['error']
+
+    threads = set()
+
+    def make_password(password):
+        threads.add(threading.current_thread().name)
+        return password
+
+    monkeypatch.setattr(provisioning, 'make_password', make_password)
+    assert admin_client.post('/register/bulk', users[:2], format='json').status_code == 201
+    assert {name.split('_')[0] for name in threads} == {'login-hash'}
+
+
+@pytest.mark.django_db
+def test_provision_users_command(tmp_path):
+    users = tmp_path / 'users.csv'
+    users.write_text('username,password,user_type\nann,pw1,employee\nbob,pw2,manager\n')
+    call_command('provision_users', str(users), workers=1)
+
+    assert list(User.objects.values_list('username', flat=True)) == ['ann']
+    report = [json.loads(line) for line in open(f'{users}.report.jsonl')]
+    assert [(row['row'], row['status']) for row in report] == [(2, 'created'), (3, 'rejected')]
+    assert 'user_type' in report[1]['errors']
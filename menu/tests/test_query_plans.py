@@ -0,0 +1,80 @@
+import re
+from datetime import date, timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from menu.models import Restaurant, Menu, Vote, VoteTally
+
+DAYS = 365
+MENUS_PER_DAY = 10
+FIRST_DAY = date(2023, 1, 1)
+
+FULL_SCAN = re.compile(r'Seq Scan on (\w+)|\bSCAN (?:TABLE )?(\w+)')
+
+
+@pytest.fixture
+def dataset():
+    restaurants = Restaurant.objects.bulk_create(Restaurant(name=f'Restaurant {i}') for i in range(MENUS_PER_DAY))
+    menus = Menu.objects.bulk_create(
+        Menu(name=f'Menu {day}/{i}', restaurant=restaurants[i], menu_data={'test_product_1': 10},
+             menu_date=FIRST_DAY + timedelta(days=day))
+        for day in range(DAYS) for i in range(MENUS_PER_DAY)
+    )
+    users = User.objects.bulk_create(User(username=f'user {i}') for i in range(20))
+    # Every other day gets votes, so both the tally and the no-votes fallback are planned.
+    Vote.objects.bulk_create(
+        Vote(user=user, menu=menu, vote_date=menu.menu_date)
+        for menu in menus[::3] if menu.menu_date.toordinal() % 2 for user in users
+    )
+    VoteTally.rebuild()
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def full_scans(sql):
+    """
+    Return the tables the database would read in full to run the statement.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+        plan = '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+    return {table for match in FULL_SCAN.finditer(plan) for table in match.groups() if table}
+
+
+def endpoint_queries(url, day):
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        response = APIClient().get(url, {'day': day.isoformat()})
+    assert response.status_code == 200
+    return [query['sql'] for query in queries]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', ['/menu/get_menus_for_date', '/menu/get_result_for_date'])
+@pytest.mark.parametrize('day', [FIRST_DAY, FIRST_DAY + timedelta(days=1)])
+def test_date_reads_use_indexes(dataset, url, day):
+    for sql in endpoint_queries(url, day):
+        assert full_scans(sql) == set(), sql
+
+
+@pytest.mark.django_db
+def test_dish_search_uses_indexes(dataset):
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        response = APIClient().get('/menu/search_dishes', {
+            'dish': 'test_prod', 'date_from': FIRST_DAY.isoformat(), 'date_to': FIRST_DAY.isoformat()})
+    assert response.status_code == 200
+    for query in queries:
+        assert full_scans(query['sql']) == set(), query['sql']
+
+
+@pytest.mark.django_db
+def test_full_scan_is_detected(dataset):
+    with CaptureQueriesContext(connection) as queries:
+        list(Menu.objects.filter(name='Menu 1/1'))
+    assert full_scans(queries[0]['sql']) == {'menu_menu'}
@@ -0,0 +1,48 @@
+import json
+from datetime import date
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from menu.models import Restaurant, Menu
+from menu.renderers import FastJSONRenderer, MessagePackRenderer
+from menu.serializers import MenuSerializer, RestaurantSerializer, values_rows
+
+
+@pytest.fixture
+def menus():
+    restaurant = Restaurant.objects.create(name='Test Restaurant')
+    return [Menu.objects.create(name=f'Menu {i}', restaurant=restaurant, menu_date=date(2023, 9, 23),
+                                menu_data={'soup': 5, 'nested': {'dish': ['a', 'ü']}})
+            for i in range(3)]
+
+
+@pytest.mark.django_db
+def test_values_rows_match_serializer(menus):
+    assert values_rows(Menu.objects.all(), MenuSerializer) == MenuSerializer(Menu.objects.all(), many=True).data
+    assert values_rows(Restaurant.objects.all(), RestaurantSerializer) == \
+        RestaurantSerializer(Restaurant.objects.all(), many=True).data
+
+
+@pytest.mark.django_db
+def test_list_endpoints_skip_model_instances(menus, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        response = APIClient().get('/menu/get_all_menus')
+    assert response.json() == json.loads(JSONRenderer().render(MenuSerializer(menus, many=True).data))
+
+
+def test_fast_json_matches_drf():
+    data = {'day': date(2023, 9, 23), 'menus': [{'id': 1, 'menu_data': {'dish': 'ü'}}], 'empty': None}
+    assert json.loads(FastJSONRenderer().render(data)) == json.loads(JSONRenderer().render(data))
+    indented = FastJSONRenderer().render(data, 'application/json; indent=2')
+    assert indented == JSONRenderer().render(data, 'application/json; indent=2')
+
+
+@pytest.mark.django_db
+def test_accept_header_selects_msgpack(menus):
+    msgpack = pytest.importorskip('msgpack')
+    response = APIClient().get('/menu/get_all_menus', HTTP_ACCEPT=MessagePackRenderer.media_type)
+    assert response['Content-Type'] == MessagePackRenderer.media_type
+    assert msgpack.unpackb(response.content) == values_rows(Menu.objects.all(), MenuSerializer)
+    assert APIClient().get('/menu/get_all_menus')['Content-Type'] == 'application/json'
@@ -0,0 +1,119 @@
+import logging
+from datetime import date
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import AsyncClient
+from django.db import connections
+from rest_framework.test import APIClient
+
+from menu.metrics import registry
+from menu.models import Menu, Restaurant
+from menu.replicas import STICKY_COOKIE, health
+from menu.tokens import EmployeeRefreshToken
+
+
+@pytest.fixture
+def replica(settings, tmp_path):
+    """
+    A second SQLite file registered as the 'replica' alias, with a row only it has.
+    """
+    config = {**connections['default'].settings_dict, 'NAME': str(tmp_path / 'replica.sqlite3')}
+    connections.databases['replica'] = config
+    settings.DATABASE_REPLICAS = ['replica']
+    health.reset()
+    call_command('migrate', database='replica', verbosity=0)
+    Restaurant.objects.using('replica').create(name='Replica only')
+    yield 'replica'
+    connections['replica'].close()
+    del connections['replica']
+    del connections.databases['replica']
+    health.reset()
+
+
+def names(response):
+    return [restaurant['name'] for restaurant in response.data]
+
+
+@pytest.mark.django_db
+def test_read_views_use_replica(replica):
+    Restaurant.objects.create(name='Primary')
+    client = APIClient()
+    assert names(client.get('/restaurants/get_all_restaurants')) == ['Replica only']
+    assert list(Restaurant.objects.values_list('name', flat=True)) == ['Primary']
+
+
+@pytest.mark.django_db
+def test_client_sticks_to_primary_after_write(replica, django_user_model):
+    client = APIClient()
+    client.force_authenticate(django_user_model.objects.create_user(username='writer'))
+    response = client.post('/restaurants/add_restaurants', {'name': 'Written'}, format='json')
+    assert response.status_code == 201
+    assert STICKY_COOKIE in response.cookies
+    assert names(client.get('/restaurants/get_all_restaurants')) == ['Written']
+
+    del client.cookies[STICKY_COOKIE]
+    assert names(client.get('/restaurants/get_all_restaurants')) == ['Replica only']
+
+
+@pytest.mark.django_db
+def test_token_client_sticks_by_user_id(replica, django_user_model):
+    writer, other = (django_user_model.objects.create_user(username=name) for name in ('writer', 'other'))
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {EmployeeRefreshToken.for_user(writer).access_token}')
+    assert client.post('/restaurants/add_restaurants', {'name': 'Written'}, format='json').status_code == 201
+
+    # Token clients do not keep cookies.
+    del client.cookies[STICKY_COOKIE]
+    assert names(client.get('/restaurants/get_all_restaurants')) == ['Written']
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {EmployeeRefreshToken.for_user(other).access_token}')
+    assert names(client.get('/restaurants/get_all_restaurants')) == ['Replica only']
+
+
+@pytest.mark.django_db
+def test_menu_cache_is_filled_from_primary(replica):
+    cache.clear()
+    restaurant = Restaurant.objects.create(name='Primary')
+    Menu.objects.create(name='Fresh', restaurant=restaurant, menu_date=date.today(), menu_data={})
+    response = APIClient().get('/menu/get_menus_for_date')
+    assert [menu['name'] for menu in response.data] == ['Fresh']
+
+
+@pytest.mark.django_db
+def test_unhealthy_replica_falls_back_to_primary(replica, settings):
+    Restaurant.objects.create(name='Primary')
+    connections['replica'].close()
+    connections.databases['replica']['NAME'] = '/nonexistent/replica.sqlite3'
+    del connections['replica']
+    health.reset()
+    assert names(APIClient().get('/restaurants/get_all_restaurants')) == ['Primary']
+
+
+@pytest.mark.django_db
+def test_replica_queries_are_measured(replica):
+    registry.reset()
+    assert names(APIClient().get('/restaurants/get_all_restaurants')) == ['Replica only']
+    route = registry._routes[('restaurants/get_all_restaurants', 'GET')]
+    assert route.queries >= 1
+    assert route.db_time > 0
+
+
+@pytest.mark.django_db
+def test_async_chain_uses_replica(replica):
+    Restaurant.objects.create(name='Primary')
+
+    async def get():
+        return await AsyncClient().get('/restaurants/get_all_restaurants')
+
+    response = async_to_sync(get)()
+    assert [restaurant['name'] for restaurant in response.json()] == ['Replica only']
+    assert list(Restaurant.objects.values_list('name', flat=True)) == ['Primary']
+
+
+def test_asgi_middleware_chain_is_not_adapted(caplog):
+    with caplog.at_level(logging.DEBUG, logger='django.request'):
+        ASGIHandler()
+    assert not [record for record in caplog.records if 'adapted' in record.getMessage()]
@@ -0,0 +1,65 @@
+from datetime import date, timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from menu.models import Restaurant, Menu, Vote, VoteTally
+
+FIRST_DAY = date(2023, 9, 1)
+
+
+@pytest.fixture
+def votes():
+    restaurant = Restaurant.objects.create(name='Test Restaurant')
+    users = [User.objects.create_user(username=f'user {i}') for i in range(3)]
+    # Day 0: menu B wins 2-1; day 1: only menu A, 1 vote; day 2: no votes.
+    plan = {0: {'A': 1, 'B': 2}, 1: {'A': 1}, 2: {'A': 0}}
+    for offset, counts in plan.items():
+        day = FIRST_DAY + timedelta(days=offset)
+        for name, count in counts.items():
+            menu = Menu.objects.create(name=name, restaurant=restaurant, menu_data={}, menu_date=day)
+            for user in users[:count]:
+                Vote.objects.create(user=user, menu=menu, vote_date=day)
+    VoteTally.rebuild()
+
+
+@pytest.mark.django_db
+def test_range_matches_daily_results(votes, django_assert_num_queries):
+    client = APIClient()
+    with django_assert_num_queries(1):
+        response = client.get('/menu/get_results_for_range', {
+            'from': FIRST_DAY.isoformat(), 'to': (FIRST_DAY + timedelta(days=2)).isoformat()})
+    assert response.status_code == 200
+    days = response.data
+    assert [day['day'] for day in days] == [FIRST_DAY, FIRST_DAY + timedelta(days=1)]
+    assert (days[0]['winner']['name'], days[0]['winner']['vote_count']) == ('B', 2)
+    assert (days[0]['runner_up']['name'], days[0]['runner_up']['vote_count']) == ('A', 1)
+    assert days[1]['runner_up'] is None
+    for day in days:
+        daily = client.get('/menu/get_result_for_date', {'day': day['day'].isoformat()})
+        assert daily.data['id'] == day['winner']['menu']
+
+
+@pytest.mark.django_db
+def test_ties_go_to_the_same_menu_everywhere():
+    restaurant = Restaurant.objects.create(name='Test Restaurant')
+    menus = [Menu.objects.create(name=name, restaurant=restaurant, menu_data={}, menu_date=FIRST_DAY)
+             for name in ('A', 'B')]
+    for menu in reversed(menus):
+        VoteTally.increment(menu.pk, FIRST_DAY, 2)
+    client = APIClient()
+    daily = client.get('/menu/get_result_for_date', {'day': FIRST_DAY.isoformat()})
+    ranged = client.get('/menu/get_results_for_range', {'from': FIRST_DAY.isoformat(), 'to': FIRST_DAY.isoformat()})
+    assert daily.data['id'] == ranged.data[0]['winner']['menu'] == menus[0].pk
+    assert [row['menu'] for row in VoteTally.totals_for_menu_date(FIRST_DAY)] == [menu.pk for menu in menus]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', [
+    {'from': '2023-09-02', 'to': '2023-09-01'},
+    {'from': '2020-01-01', 'to': '2023-01-01'},
+    {'from': '2023-09-01'},
+])
+def test_invalid_ranges_are_rejected(params):
+    assert APIClient().get('/menu/get_results_for_range', params).status_code == 400
@@ -0,0 +1,67 @@
+from datetime import date
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from menu.models import Restaurant, Menu, Vote, VoteTally, EmployeeProfile, RestaurantRollup, RolledUpDay
+from menu.rollups import rollup_pending_days
+
+DAYS = [date(2023, 9, 4), date(2023, 9, 5)]
+
+
+@pytest.fixture
+def history():
+    first, second = Restaurant.objects.create(name='First'), Restaurant.objects.create(name='Second')
+    users = [User.objects.create_user(username=f'user {i}') for i in range(4)]
+    for user in users:
+        EmployeeProfile.objects.create(user=user)
+    # Day one: First wins 3-1. Day two: Second wins 2-0 with two menus.
+    plan = [(DAYS[0], first, users[:3]), (DAYS[0], second, users[3:]),
+            (DAYS[1], second, users[:1]), (DAYS[1], second, users[1:2]), (DAYS[1], first, [])]
+    for day, restaurant, voters in plan:
+        menu = Menu.objects.create(name='Menu', restaurant=restaurant, menu_data={}, menu_date=day)
+        for user in voters:
+            Vote.objects.create(user=user, menu=menu, vote_date=day)
+    VoteTally.rebuild()
+    return first, second
+
+
+def stats(period, restaurant):
+    row = RestaurantRollup.objects.get(period=period, restaurant=restaurant)
+    return row.menus, row.votes, row.wins, row.voters
+
+
+@pytest.mark.django_db
+def test_rollup_days_weeks_and_months(history):
+    first, second = history
+    assert rollup_pending_days(today=date(2023, 9, 6)) == DAYS
+    assert stats('week', first) == (2, 3, 1, 3)
+    assert stats('week', second) == (3, 3, 1, 3)
+    assert stats('month', second) == stats('week', second)
+    row = RestaurantRollup.objects.get(period='month', restaurant=second)
+    assert (row.average_votes, row.participation_rate) == (1.0, 0.75)
+
+
+@pytest.mark.django_db
+def test_rollup_is_incremental(history, django_assert_max_num_queries):
+    rollup_pending_days(today=date(2023, 9, 5))
+    assert list(RolledUpDay.objects.values_list('day', flat=True)) == DAYS[:1]
+    rollup_pending_days(today=date(2023, 9, 6))
+    assert stats('week', history[1]) == (3, 3, 1, 3)
+    with django_assert_max_num_queries(1):
+        assert rollup_pending_days(today=date(2023, 9, 6)) == []
+
+
+@pytest.mark.django_db
+def test_stats_endpoint(history):
+    call_command('rollup_restaurant_stats')
+    client = APIClient()
+    client.force_authenticate(User.objects.first())
+    response = client.get('/analytics/restaurants', {'period': 'day', 'from': '2023-09-01', 'to': '2023-09-30'})
+    assert response.status_code == 200
+    assert [(row['period_start'], row['restaurant_name'], row['wins']) for row in response.data] == [
+        ('2023-09-04', 'First', 1), ('2023-09-04', 'Second', 0),
+        ('2023-09-05', 'First', 0), ('2023-09-05', 'Second', 1),
+    ]
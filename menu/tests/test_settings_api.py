@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from menu import settings_api
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+# Loads the profile with a SQLite database, so the test does not need the database server.
+SCRIPT = """
+from django.conf import settings
+settings.DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}
+import django
+django.setup()
+from django.core.management import call_command
+from django.urls import get_resolver
+call_command('check')
+print(*[pattern.pattern for pattern in get_resolver().url_patterns])
+"""
+
+
+def run_profile():
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'menu.settings_api'}
+    return subprocess.run([sys.executable, '-c', SCRIPT], cwd=BASE_DIR, env=env, check=True,
+                          capture_output=True, text=True).stdout
+
+
+def test_api_profile_drops_browser_only_parts():
+    assert 'django.contrib.admin' not in settings_api.INSTALLED_APPS
+    assert 'django.contrib.sessions.middleware.SessionMiddleware' not in settings_api.MIDDLEWARE
+    assert 'menu.metrics.MetricsMiddleware' in settings_api.MIDDLEWARE
+    assert settings_api.REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] == [
+        'rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication']
+
+
+def test_api_profile_passes_checks_and_serves_api_routes():
+    output = run_profile()
+    assert 'no issues' in output
+    routes = output.splitlines()[-1].split()
+    assert 'vote' in routes and 'menu/get_all_menus' in routes
+    assert 'admin/' not in routes
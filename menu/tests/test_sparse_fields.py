@@ -0,0 +1,74 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from menu import async_views
+from menu.models import Restaurant, Menu
+
+DAY = '2023-09-23'
+
+
+@pytest.fixture(autouse=True)
+def menus():
+    cache.clear()
+    restaurants = [Restaurant.objects.create(name=f'Restaurant {i}') for i in range(2)]
+    return [Menu.objects.create(name=f'Menu {i}', restaurant=restaurants[i % 2],
+                                menu_data={'soup': 5}, menu_date=DAY)
+            for i in range(4)]
+
+
+def get(path, **params):
+    with CaptureQueriesContext(connection) as queries:
+        response = APIClient().get(path, params)
+        if response.streaming:
+            return json.loads(b''.join(response.streaming_content)), queries
+    data = response.json()
+    return (data['results'] if 'results' in data else data), queries
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', [{}, {'stream': 1}, {'page_size': 10}])
+def test_fields_narrow_output_and_sql(menus, params):
+    rows, queries = get('/menu/get_all_menus', fields='id,name,restaurant', **params)
+    assert rows[0] == {'id': menus[0].pk, 'name': 'Menu 0', 'restaurant': menus[0].restaurant_id}
+    assert all('menu_data' not in query['sql'] for query in queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', [{}, {'stream': 1}, {'page_size': 10}])
+def test_expand_restaurant_uses_one_join(menus, params):
+    rows, queries = get('/menu/get_all_menus', fields='name,restaurant', expand='restaurant', **params)
+    assert [row['restaurant'] for row in rows] == [
+        {'id': menu.restaurant_id, 'name': menu.restaurant.name} for menu in menus]
+    assert len(queries) == 1
+    assert 'JOIN' in queries[0]['sql']
+
+
+@pytest.mark.django_db
+def test_menus_for_date_caches_each_fieldset(menus):
+    full, _ = get('/menu/get_menus_for_date', day=DAY)
+    narrow, _ = get('/menu/get_menus_for_date', day=DAY, fields='id,name')
+    assert full[0]['menu_data'] == {'soup': 5}
+    assert narrow[0] == {'id': menus[0].pk, 'name': 'Menu 0'}
+    _, queries = get('/menu/get_menus_for_date', day=DAY, fields='name,id')
+    assert len(queries) == 0
+
+
+@pytest.mark.django_db
+def test_async_views_take_fieldsets(menus):
+    request = RequestFactory().get('/menu/get_menus_for_date', {'day': DAY, 'fields': 'id', 'expand': 'restaurant'})
+    response = async_to_sync(async_views.get_menus_for_date)(request)
+    assert json.loads(response.content) == [{'id': menu.pk} for menu in menus]
+
+
+@pytest.mark.django_db
+def test_unknown_fields_are_rejected():
+    response = APIClient().get('/menu/get_all_menus', {'fields': 'id,price', 'expand': 'votes'})
+    assert response.status_code == 400
+    assert set(response.data) == {'fields', 'expand'}
@@ -0,0 +1,51 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import Sum
+from rest_framework.test import APIClient
+
+from menu.models import Restaurant, Menu, Vote, VoteTally
+
+
+@pytest.fixture
+def menus():
+    restaurant = Restaurant.objects.create(name='Test Restaurant')
+    return [
+        Menu.objects.create(name=f'Menu {i}', restaurant=restaurant,
+                            menu_data={'test_product_1': 10}, menu_date='2023-09-23')
+        for i in range(2)
+    ]
+
+
+def vote_for(menu, count):
+    for i in range(count):
+        user = User.objects.create_user(username=f'{menu.name}-{i}', password='password123')
+        Vote.objects.create(user=user, menu=menu, vote_date='2023-09-23')
+        VoteTally.increment(menu.pk, '2023-09-23')
+
+
+@pytest.mark.django_db
+def test_increment_sums_over_shards(menus, settings):
+    settings.VOTE_TALLY_SHARDS = 4
+    vote_for(menus[0], 10)
+    total = VoteTally.objects.filter(menu=menus[0]).aggregate(total=Sum('count'))['total']
+    assert total == 10
+    assert VoteTally.objects.filter(menu=menus[0]).count() <= 4
+
+
+@pytest.mark.django_db
+def test_result_for_date_reads_tallies(menus):
+    vote_for(menus[0], 1)
+    vote_for(menus[1], 2)
+    response = APIClient().get('/menu/get_result_for_date', {'day': '2023-09-23'})
+    assert response.status_code == 200
+    assert response.data['id'] == menus[1].pk
+
+
+@pytest.mark.django_db
+def test_rebuild_matches_votes(menus):
+    vote_for(menus[0], 3)
+    VoteTally.objects.update(count=100)
+    call_command('rebuild_vote_tallies', '--day', '2023-09-23')
+    tally = VoteTally.objects.get(menu=menus[0])
+    assert (tally.shard, tally.count) == (0, 3)
@@ -0,0 +1,52 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from menu.models import Restaurant, Menu, EmployeeProfile, VoteTally
+
+
+def token_client(username, employee):
+    user = User.objects.create(username=username, password='password123')
+    if employee:
+        EmployeeProfile.objects.create(user=user)
+    client = APIClient()
+    response = client.post('/api/token/', {'username': username, 'password': 'password123'}, format='json')
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access_token']}")
+    return client
+
+
+@pytest.fixture
+def menu():
+    restaurant = Restaurant.objects.create(name='Test Restaurant')
+    return Menu.objects.create(name='Test Menu', restaurant=restaurant,
+                               menu_data={'test_product_1': 10}, menu_date='2023-09-23')
+
+
+@pytest.mark.django_db
+def test_token_vote_runs_no_auth_queries(menu, settings, django_capture_on_commit_callbacks):
+    settings.VOTE_TALLY_SHARDS = 1
+    VoteTally.objects.create(menu=menu, vote_date='2023-09-23', count=0)
+    client = token_client('employee', employee=True)
+    with CaptureQueriesContext(connection) as queries, django_capture_on_commit_callbacks(execute=True):
+        response = client.post('/vote', {'menu': menu.pk, 'vote_date': '2023-09-23'}, format='json')
+    assert response.status_code == 201
+    assert [q['sql'].split()[0] for q in queries if 'SAVEPOINT' not in q['sql']] == ['INSERT', 'UPDATE']
+
+
+@pytest.mark.django_db
+def test_token_without_employee_claim_cannot_vote(menu):
+    client = token_client('basic', employee=False)
+    response = client.post('/vote', {'menu': menu.pk}, format='json')
+    assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_token_add_restaurant_runs_no_auth_queries():
+    client = token_client('basic', employee=False)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post('/restaurants/add_restaurants', {'name': 'Test Restaurant'}, format='json')
+    assert response.status_code == 201
+    # The change feed number (UPDATE, SELECT) and the restaurant; no user lookups.
+    assert [q['sql'].split()[0] for q in queries if 'SAVEPOINT' not in q['sql']] == ['UPDATE', 'SELECT', 'INSERT']
@@ -0,0 +1,60 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from menu.models import Restaurant, Menu, Vote, VoteTally, EmployeeProfile
+
+
+@pytest.fixture
+def menu():
+    restaurant = Restaurant.objects.create(name='Test Restaurant')
+    return Menu.objects.create(name='Test Menu', restaurant=restaurant,
+                               menu_data={'test_product_1': 10}, menu_date='2023-09-23')
+
+
+@pytest.fixture
+def employee():
+    user = User.objects.create_user(username='employee', password='password123')
+    EmployeeProfile.objects.create(user=user)
+    return user
+
+
+@pytest.fixture
+def client(employee):
+    client = APIClient()
+    client.force_authenticate(employee)
+    return client
+
+
+@pytest.mark.django_db
+def test_vote_is_a_single_insert(client, menu, settings, django_capture_on_commit_callbacks):
+    settings.VOTE_TALLY_SHARDS = 1
+    VoteTally.objects.create(menu=menu, vote_date='2023-09-23', count=0)
+    with CaptureQueriesContext(connection) as queries, django_capture_on_commit_callbacks(execute=True):
+        response = client.post('/vote', {'menu': menu.pk, 'vote_date': '2023-09-23'}, format='json')
+    assert response.status_code == 201
+    statements = [q['sql'].split()[0] for q in queries if 'SAVEPOINT' not in q['sql']]
+    # Eligibility check, the vote and the tally bump; no user, menu, uniqueness or
+    # menu date lookups, including when the results are published on commit.
+    assert statements == ['SELECT', 'INSERT', 'UPDATE']
+    assert VoteTally.objects.get(menu=menu).count == 1
+
+
+@pytest.mark.django_db
+def test_repeated_vote_conflicts(client, menu):
+    payload = {'menu': menu.pk, 'vote_date': '2023-09-23'}
+    assert client.post('/vote', payload, format='json').status_code == 201
+    response = client.post('/vote', payload, format='json')
+    assert response.status_code == 409
+    assert Vote.objects.count() == 1
+    assert sum(VoteTally.objects.values_list('count', flat=True)) == 1
+
+
+@pytest.mark.django_db
+def test_vote_requires_employee(menu):
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username='basic', password='password123'))
+    response = client.post('/vote', {'menu': menu.pk}, format='json')
+    assert response.status_code == 403
@@ -0,0 +1,128 @@
+from datetime import date
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from menu import vote_buffer
+from menu.models import Restaurant, Menu, Vote, VoteTally, EmployeeProfile
+
+DAY = date(2023, 9, 23)
+
+
+@pytest.fixture
+def buffer(settings, monkeypatch):
+    """
+    A fresh buffer that is flushed by the test instead of the background thread.
+    """
+    settings.VOTE_BUFFER_ENABLED = True
+    monkeypatch.setattr(vote_buffer.VoteBuffer, 'start', lambda self: None)
+    monkeypatch.setattr(vote_buffer, '_buffer', None)
+    return vote_buffer.get_vote_buffer()
+
+
+@pytest.fixture
+def menus():
+    restaurant = Restaurant.objects.create(name='Test Restaurant')
+    return [Menu.objects.create(name=name, restaurant=restaurant, menu_data={}, menu_date=DAY)
+            for name in ('A', 'B')]
+
+
+def employee_client(username):
+    user = User.objects.create_user(username=username)
+    EmployeeProfile.objects.create(user=user)
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.mark.django_db
+def test_votes_are_acknowledged_then_flushed(buffer, menus):
+    clients = [employee_client(f'user {i}') for i in range(3)]
+    for i, client in enumerate(clients):
+        response = client.post('/vote', {'menu': menus[i % 2].pk, 'vote_date': DAY.isoformat()}, format='json')
+        assert response.status_code == 202
+    assert not Vote.objects.exists()
+
+    with CaptureQueriesContext(connection) as queries:
+        assert buffer.flush() == 3
+    statements = [q['sql'].split()[0] for q in queries if 'SAVEPOINT' not in q['sql']]
+    # One lookup, one INSERT for all votes and each menu's first tally shard; the
+    # results are published without a query.
+    assert statements == ['SELECT', 'INSERT'] + ['UPDATE', 'INSERT'] * 2
+    assert Vote.objects.count() == 3
+    totals = {row['menu']: row['vote_count'] for row in VoteTally.totals_for_menu_date(DAY)}
+    assert totals == {menus[0].pk: 2, menus[1].pk: 1}
+
+
+@pytest.mark.django_db
+def test_repeats_are_rejected_and_dropped(buffer, menus):
+    client = employee_client('voter')
+    payload = {'menu': menus[0].pk, 'vote_date': DAY.isoformat()}
+    assert client.post('/vote', payload, format='json').status_code == 202
+    assert client.post('/vote', payload, format='json').status_code == 409
+    assert client.post('/vote', {'menu': 999, 'vote_date': DAY.isoformat()}, format='json').status_code == 400
+
+    # A vote already stored (e.g. by another worker) is skipped by the flush.
+    Vote.objects.create(user=User.objects.get(username='voter'), menu=menus[1], vote_date=DAY)
+    buffer.submit(User.objects.get(username='voter').pk, menus[1].pk, DAY)
+    assert buffer.flush() == 1
+    assert Vote.objects.count() == 2
+    assert sum(VoteTally.objects.values_list('count', flat=True)) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_votes_breaking_a_foreign_key_are_dropped(buffer, menus, caplog):
+    voter = User.objects.create_user(username='voter')
+    buffer.submit(voter.pk, menus[0].pk, DAY)
+    buffer.submit(voter.pk + 1, menus[0].pk, DAY)
+    buffer.submit(voter.pk, menus[1].pk + 1, DAY)
+    assert buffer.flush() == 1
+    assert buffer.flush() == 0
+    assert list(Vote.objects.values_list('user_id', 'menu_id')) == [(voter.pk, menus[0].pk)]
+    assert sum(VoteTally.objects.values_list('count', flat=True)) == 1
+    assert len([record for record in caplog.records if 'Dropped buffered vote' in record.getMessage()]) == 2
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('store', [vote_buffer.LocalVoteStore, vote_buffer.CacheVoteStore])
+def test_dropped_votes_can_be_cast_again(store, buffer, menus):
+    cache.clear()
+    buffer.store = store()
+    voter = User.objects.create_user(username='voter')
+    buffer.submit(voter.pk, menus[0].pk, DAY)
+    buffer.submit(voter.pk, menus[1].pk + 1, DAY)
+    assert buffer.flush() == 1
+    assert not buffer.submit(voter.pk, menus[0].pk, DAY)
+    assert buffer.submit(voter.pk, menus[1].pk + 1, DAY)
+
+
+@pytest.mark.django_db
+def test_votes_stored_during_the_flush_are_not_counted(buffer, menus, monkeypatch):
+    voters = [User.objects.create_user(username=f'voter {i}') for i in range(2)]
+    for voter in voters:
+        buffer.submit(voter.pk, menus[0].pk, DAY)
+    # Another worker stores the first vote after the flush looked up the stored ones.
+    Vote.objects.create(user=voters[0], menu=menus[0], vote_date=DAY)
+    stored = Vote.objects.filter
+
+    def lookup_before_the_other_worker(*args, **kwargs):
+        monkeypatch.setattr(Vote.objects, 'filter', stored)
+        return Vote.objects.none()
+
+    monkeypatch.setattr(Vote.objects, 'filter', lookup_before_the_other_worker)
+    assert buffer.flush() == 1
+    assert Vote.objects.count() == 2
+    assert sum(VoteTally.objects.values_list('count', flat=True)) == 1
+
+
+@pytest.mark.django_db
+def test_full_buffer_writes_synchronously(buffer, menus, settings):
+    settings.VOTE_BUFFER_MAX_PENDING = 1
+    assert employee_client('first').post('/vote', {'menu': menus[0].pk}, format='json').status_code == 202
+    assert employee_client('second').post('/vote', {'menu': menus[0].pk}, format='json').status_code == 201
+    buffer.stop()
+    assert Vote.objects.count() == 2